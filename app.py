@@ -1,78 +1,188 @@
+import importlib
+import time
+
 from kivy.app import App
-from kivy.uix.screenmanager import ScreenManager
 from kivy.clock import Clock
 from kivy.logger import Logger
-from kivy.core.text import Label as CoreLabel
 from kivy.utils import platform as kivy_platform
 
 from utils.data_manager import DataManager
 from utils.android_utils import AndroidUtils
-from screens.welcome_screen import WelcomeScreen
-from screens.main_screen import MainScreen
-from screens.edit_screen import EditScreen
-from screens.about_screen import AboutScreen
+from utils.draft_manager import DraftManager
+from utils.capability_probe import CapabilityProber
+from utils.startup_profiler import phase, finish_on_first_frame
+from utils.perf_overlay import PerfOverlay
+from utils.error_collector import flush_errors
+from utils.touch_recorder import TouchRecorder
+from utils.thumbnail_cache import ThumbnailCache
+from utils.markdown_blocks import MarkdownCache
+from utils.file_watcher import FileWatcher
+from utils import tracing
+from screens.lazy_screen_manager import LazyScreenManager
 
 class NotesApp(App):
     """Основное приложение Kivy для заметок с поддержкой Android-функций."""
+    # main.py --leak-check=N: прогнать N циклов поиска утечек и выйти
+    leak_check_cycles = 0
+    leak_detector = None
+    touch_recorder = None
+    sync_engine = None
+    notes_watcher = None
+
+    # Экраны создаются лениво через LazyScreenManager при первом обращении
+    @property
+    def welcome_screen(self):
+        return self.sm.get_screen('welcome')
+
+    @property
+    def main_screen(self):
+        return self.sm.get_screen('main')
+
+    @property
+    def edit_screen(self):
+        return self.sm.get_screen('edit')
+
+    @property
+    def view_screen(self):
+        return self.sm.get_screen('view')
+
+    @property
+    def about_screen(self):
+        return self.sm.get_screen('about')
+
     def build(self):
         """Создает и настраивает интерфейс приложения."""
+        with phase('build'):
+            return self._build()
+
+    def _build(self):
         try:
             # Инициализируем менеджер данных (заметки, настройки)
-            self.data_manager = DataManager()
+            with phase('data_manager'):
+                self.data_manager = DataManager()
         except Exception as e:
             Logger.error(f"NotesApp: DataManager initialization error: {e}")
             self.data_manager = None
         
+        # Сработавшие напоминания показываются уведомлением
+        if self.data_manager:
+            self.data_manager.reminder_listeners.append(self._on_reminders)
+            # Правки notes.json другими программами: перестраиваются только их карточки
+            self.data_manager.external_change_listeners.append(self._on_notes_changed_externally)
+            # Запись, отложенная из-за правки notes.json извне
+            self.data_manager.save_listeners.append(self._on_save_state)
+            self._save_delay_shown = False
+        
+        # Синхронизация (настройка "sync_url"): создается сразу, чтобы запоминать удаления заметок
+        if self.data_manager and self.data_manager.settings.get('sync_url'):
+            self.setup_sync(self.data_manager.settings['sync_url'])
+        
+        # Трассировка в формате Chrome Trace (настройка "tracing" в settings.json)
+        if self.data_manager and self.data_manager.settings.get('tracing'):
+            tracing.enable(self.data_manager.settings.get('trace_file', 'trace.json'))
+            Logger.info("NotesApp: Tracing enabled")
+        
         try:
             # Инициализируем Android утилиты (фонарик, яркость)
-            self.android_utils = AndroidUtils()
+            with phase('android_utils'):
+                self.android_utils = AndroidUtils()
         except Exception as e:
             Logger.error(f"NotesApp: AndroidUtils initialization error: {e}")
             self.android_utils = None
         
-        # Создаем менеджер экранов
-        self.sm = ScreenManager()
+        try:
+            # Автосохранение черновиков редактора (отдельно от notes.json)
+            with phase('draft_manager'):
+                self.draft_manager = DraftManager()
+        except Exception as e:
+            Logger.error(f"NotesApp: DraftManager initialization error: {e}")
+            self.draft_manager = None
         
-        # Создаем экраны
-        self.welcome_screen = WelcomeScreen()
-        self.main_screen = MainScreen()
-        self.edit_screen = EditScreen()
-        self.about_screen = AboutScreen()
+        # Миниатюры вложений: кэш на диске и LRU текстур, декодирование в фоновом потоке
+        self.thumbnail_cache = ThumbnailCache()
+        # Разобранный Markdown заметок (превью в списке и экран просмотра)
+        self.markdown_cache = MarkdownCache()
         
-        # Добавляем экраны в менеджер
-        self.sm.add_widget(self.welcome_screen)
-        self.sm.add_widget(self.main_screen)
-        self.sm.add_widget(self.edit_screen)
-        self.sm.add_widget(self.about_screen)
+        # Возможности устройства: сразу из кэша, свежая проверка — в фоне после старта
+        self.capability_prober = CapabilityProber(self.data_manager, self.android_utils)
+        self.capability_prober.listeners.append(self._on_capabilities)
+        if self.android_utils:
+            self.android_utils.apply_capabilities(self.capability_prober.capabilities)
+            self.android_utils.capability_listener = self.capability_prober.record
         
-        # Устанавливаем ссылки на приложение для экранов
-        self.welcome_screen.app = self
-        self.main_screen.app = self
-        self.edit_screen.app = self
-        self.about_screen.app = self
+        # Создаем менеджер экранов: экраны строятся при первом переходе на них
+        self.sm = LazyScreenManager()
+        self.sm.register('welcome', lambda: self._make_screen('screens.welcome_screen', 'WelcomeScreen'))
+        self.sm.register('main', lambda: self._make_screen('screens.main_screen', 'MainScreen'))
+        # Редактор открывается почти в каждом сеансе — достроим его в простое после старта
+        self.sm.register('edit', lambda: self._make_screen('screens.edit_screen', 'EditScreen'), prewarm=True)
+        # Просмотр открывается тапом по карточке — тоже достраиваем заранее
+        self.sm.register('view', lambda: self._make_screen('screens.view_screen', 'ViewScreen'), prewarm=True)
+        self.sm.register('about', lambda: self._make_screen('screens.about_screen', 'AboutScreen'))
+        self.sm.bind(current=self._trace_screen_change)
         
         # Определяем стартовый экран
         try:
-            if self.data_manager and self.data_manager.should_show_welcome():
-                self.sm.current = 'welcome'
-            else:
-                self.sm.current = 'main'
+            with phase('start_screen'):
+                if self.data_manager and self.data_manager.should_show_welcome():
+                    self.sm.current = 'welcome'
+                else:
+                    self.sm.current = 'main'
         except Exception as e:
             Logger.error(f"NotesApp: Screen selection error: {e}")
             self.sm.current = 'main'
         
+        # Зашифрованные заметки откроются после ввода пароля
+        if self.data_manager and self.data_manager.is_locked:
+            Clock.schedule_once(lambda dt: self._offer_unlock(), 0)
+        
+        # Если прошлый сеанс завершился с несохраненным черновиком — предложим восстановить
+        try:
+            draft = self.draft_manager.load_draft() if self.draft_manager else None
+            # Пока заметки зашифрованы и не открыты, черновик подставить некуда
+            if draft and not (self.data_manager and self.data_manager.is_locked):
+                Clock.schedule_once(lambda dt: self._offer_draft_recovery(draft), 0)
+        except Exception as e:
+            Logger.error(f"NotesApp: Draft recovery error: {e}")
+        
         Logger.info("NotesApp: Application initialized successfully")
         return self.sm
     
     def on_start(self):
         """Вызывается при запуске приложения."""
         Logger.info("NotesApp: Application started")
+        finish_on_first_frame()
+        # Первый кадр уже запланирован — остальное достраиваем после него
+        self.sm.start_prewarm(delay=0.5)
+        Clock.schedule_once(lambda dt: self.capability_prober.start(), 1.0)
+        # Файлы вложений, оставшиеся от удаленных заметок, чистим в фоне; ссылки
+        # снимаются сейчас, пока заметки в памяти совпадают с notes.json
+        if self.data_manager:
+            self.data_manager.collect_attachment_garbage()
+            # Напоминания, срок которых прошел, пока приложение было закрыто, срабатывают сразу
+            self.data_manager.reminders.start()
+            # notes.json могут править скриптами, пока приложение открыто
+            self.notes_watcher = FileWatcher(self.data_manager.notes_file, self.data_manager.reload_if_changed)
+            self.notes_watcher.start()
+            # Индекс дубликатов нужен при создании заметки — строим его в фоне заранее
+            Clock.schedule_once(lambda dt: self.data_manager.prepare_duplicates(), 1.0)
+        # Панель производительности: F12 на десктопе или кнопка на экране "Об авторе"
+        self.perf_overlay = PerfOverlay()
+        if self.data_manager and self.data_manager.settings.get('perf_overlay'):
+            self.perf_overlay.show()
+        self._setup_leak_detector()
+        # Запись касаний для benchmarks/bench_touch.py --replay
+        if self.data_manager and self.data_manager.settings.get('touch_record'):
+            self.touch_recorder = TouchRecorder()
+            self.touch_recorder.start()
         # Обработчик кнопки Назад на Android: всегда возвращать на 'main'
         try:
             from kivy.base import EventLoop
             win = EventLoop.window
             if win and kivy_platform == 'android':
                 win.bind(on_keyboard=self._on_back_button)
+            if win:
+                win.bind(on_keyboard=self._on_debug_key)
         except Exception as e:
             Logger.warning(f"NotesApp: Cannot bind back button: {e}")
     
@@ -81,17 +191,46 @@ class NotesApp(App):
         Logger.info("NotesApp: Application paused")
         # Выключаем фонарик и возвращаем яркость при приостановке
         self.cleanup_on_exit()
+        # В фоне таймеры Kivy не идут — пропущенное сверим в on_resume
+        if self.data_manager:
+            self.data_manager.reminders.pause()
+        # Android может убить процесс в фоне — сбрасываем черновик и отложенную запись сразу
+        if self.draft_manager:
+            self.draft_manager.flush()
+        self._flush_pending_save()
+        flush_errors()
+        self._write_trace()
+        self._save_touches()
         return True
     
     def on_resume(self):
         """Вызывается при возобновлении приложения."""
         Logger.info("NotesApp: Application resumed")
+        # Activity могла быть пересоздана — кэшированные JNI-объекты больше не валидны
+        if self.android_utils:
+            self.android_utils.on_activity_recreated()
+        # Напоминания, пришедшиеся на время паузы, срабатывают сразу
+        if self.data_manager:
+            self.data_manager.reminders.resume()
+            # Файл могли изменить, пока приложение было в фоне
+            self.data_manager.reload_if_changed()
     
     def on_stop(self):
         """Вызывается при остановке приложения."""
         Logger.info("NotesApp: Application stopped")
         # Выключаем фонарик и возвращаем яркость при остановке
         self.cleanup_on_exit()
+        if self.data_manager:
+            self.data_manager.reminders.pause()
+        self._flush_pending_save()
+        if self.notes_watcher:
+            self.notes_watcher.stop()
+        if self.draft_manager:
+            self.draft_manager.close()
+        self.thumbnail_cache.close()
+        flush_errors()
+        self._write_trace()
+        self._save_touches()
 
     def _on_back_button(self, window, key, *args):
         # key == 27 соответствует Android back
@@ -108,10 +247,8 @@ class NotesApp(App):
                     Logger.error(f"NotesApp: Error stopping app: {e}")
                 # Дополнительно попросим Android закрыть Activity
                 try:
-                    if kivy_platform == 'android':
-                        from jnius import autoclass
-                        PythonActivity = autoclass('org.kivy.android.PythonActivity')
-                        PythonActivity.mActivity.finish()
+                    if kivy_platform == 'android' and self.android_utils:
+                        self.android_utils.finish_activity()
                 except Exception as e:
                     Logger.error(f"NotesApp: Error finishing activity: {e}")
                 return True
@@ -120,9 +257,33 @@ class NotesApp(App):
                 return False
         return False
     
+    def _on_debug_key(self, window, key, *args):
+        # F12 — показать/скрыть панель производительности
+        if key == 293:
+            self.toggle_perf_overlay()
+            return True
+        return False
+
+    def toggle_perf_overlay(self):
+        """Показывает/скрывает панель производительности и запоминает выбор."""
+        try:
+            visible = self.perf_overlay.toggle()
+            if self.data_manager:
+                self.data_manager.settings['perf_overlay'] = visible
+                self.data_manager.save_settings()
+        except Exception as e:
+            Logger.error(f"NotesApp: Cannot toggle perf overlay: {e}")
+
     def cleanup_on_exit(self):
         """Гарантированно выключает фонарик и возвращает яркость при выходе."""
         try:
+            # Шаблон мигания мог быть запущен с любого экрана — останавливаем всегда
+            if self.android_utils and self.android_utils.is_pattern_playing():
+                self.android_utils.stop_flashlight_pattern()
+                Logger.info("NotesApp: Flashlight pattern stopped on exit")
+            # Главный экран еще не создан — значит, фонарик и яркость не включались
+            if not self.sm.is_built('main'):
+                return
             # Выключаем фонарик
             if hasattr(self.main_screen, 'flashlight_on') and self.main_screen.flashlight_on:
                 self.android_utils.turn_off_flashlight()
@@ -136,6 +297,213 @@ class NotesApp(App):
         except Exception as e:
             Logger.error(f"NotesApp: Error during cleanup: {e}")
     
+    def setup_sync(self, url):
+        """Подключает синхронизацию с сервером url (пустой адрес отключает ее)."""
+        if self.sync_engine is not None:
+            if self.sync_engine.url == url.rstrip('/'):
+                return self.sync_engine
+            self.sync_engine.close()
+            self.sync_engine = None
+        if not url or not self.data_manager:
+            return None
+        try:
+            # http.client, gzip и пул потоков нужны только с настроенной синхронизацией
+            from utils.sync import SyncEngine
+            self.sync_engine = SyncEngine(self.data_manager, url)
+        except Exception as e:
+            Logger.error(f"NotesApp: Sync setup error: {e}")
+        return self.sync_engine
+
+    def _offer_unlock(self):
+        """Запрашивает пароль зашифрованного хранилища заметок."""
+        from kivy.uix.boxlayout import BoxLayout
+        from kivy.uix.label import Label
+        from kivy.uix.button import Button
+        from kivy.uix.popup import Popup
+        from kivy.uix.textinput import TextInput
+        from kivy.metrics import dp
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        password_input = TextInput(hint_text='Пароль', password=True, multiline=False,
+                                   size_hint_y=None, height=dp(44))
+        message = Label(text='Заметки зашифрованы', font_size='16sp', size_hint_y=None, height=dp(32))
+        content.add_widget(message)
+        content.add_widget(password_input)
+        open_btn = Button(text='Открыть', size_hint_y=None, height=dp(48))
+        content.add_widget(open_btn)
+        popup = Popup(title='Пароль', content=content, size_hint=(0.85, 0.4), auto_dismiss=False)
+        def unlock(*_):
+            try:
+                ok = self.data_manager.unlock(password_input.text)
+            except Exception as e:
+                Logger.error(f"NotesApp: Unlock error: {e}")
+                ok = False
+            if not ok:
+                message.text = 'Неверный пароль'
+                password_input.text = ''
+                return
+            popup.dismiss()
+            Logger.info("NotesApp: Notes unlocked")
+            if self.sm.current == 'main':
+                self.main_screen.refresh_notes()
+        open_btn.bind(on_release=unlock)
+        password_input.bind(on_text_validate=unlock)
+        popup.open()
+
+    def _offer_draft_recovery(self, draft):
+        """Предлагает восстановить черновик, оставшийся после сбоя."""
+        from kivy.uix.boxlayout import BoxLayout
+        from kivy.uix.label import Label
+        from kivy.uix.button import Button
+        from kivy.uix.popup import Popup
+        from kivy.metrics import dp
+        title = draft.get('title') or draft.get('content', '')[:30] or 'Без заголовка'
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        message = Label(text=f'Найден несохраненный черновик:\n{title}\n\nВосстановить?',
+                        font_size='16sp', halign='center', valign='middle')
+        message.bind(size=message.setter('text_size'))
+        content.add_widget(message)
+        row = BoxLayout(orientation='horizontal', spacing=10, size_hint_y=None, height=dp(48))
+        no_btn = Button(text='Удалить')
+        yes_btn = Button(text='Восстановить')
+        row.add_widget(no_btn)
+        row.add_widget(yes_btn)
+        content.add_widget(row)
+        popup = Popup(title='Черновик', content=content, size_hint=(0.85, 0.4), auto_dismiss=False)
+        def discard(*_):
+            popup.dismiss()
+            self.draft_manager.clear()
+        def restore(*_):
+            popup.dismiss()
+            note = None
+            if draft.get('note_id') is not None and self.data_manager:
+                # Если заметку успели удалить — восстановим как новую
+                note = self.data_manager.open_note(draft['note_id'])
+            self.edit_screen.set_note(note)
+            self.edit_screen.set_recovered_draft(draft)
+            self.sm.current = 'edit'
+        no_btn.bind(on_release=discard)
+        yes_btn.bind(on_release=restore)
+        popup.open()
+    
+    def _setup_leak_detector(self):
+        # Отладочный режим: снимки виджетов/памяти на каждом переходе экранов
+        try:
+            if self.leak_check_cycles:
+                from utils.leak_detector import run_leak_check
+                Clock.schedule_once(lambda dt: run_leak_check(self, self.leak_check_cycles), 0.5)
+            elif self.data_manager and self.data_manager.settings.get('leak_detector'):
+                from utils.leak_detector import LeakDetector
+                self.leak_detector = LeakDetector(self.sm)
+                self.leak_detector.attach()
+                self.sm.bind(current=self._report_leaks)
+        except Exception as e:
+            Logger.error(f"NotesApp: Cannot start leak detector: {e}")
+
+    def _report_leaks(self, sm, name):
+        # Снимок делается после анимации перехода — отчет смотрим при следующей смене экрана
+        if name == 'edit' and self.leak_detector.has_leaks():
+            Logger.warning(self.leak_detector.format_report())
+
+    def _trace_screen_change(self, sm, name):
+        # Интервал перехода: от смены current до окончания анимации
+        tracer = tracing.get_tracer()
+        if tracer is None:
+            return
+        start = time.perf_counter()
+        transition = sm.transition
+
+        def on_complete(*args):
+            transition.unbind(on_complete=on_complete)
+            tracer.complete(f"transition:{name}", "screen", start, time.perf_counter())
+
+        transition.bind(on_complete=on_complete)
+
+    def _write_trace(self):
+        try:
+            path = tracing.write()
+            if path:
+                Logger.info(f"NotesApp: Trace written to {path}")
+        except Exception as e:
+            Logger.error(f"NotesApp: Cannot write trace: {e}")
+
+    def _save_touches(self):
+        if self.touch_recorder is None:
+            return
+        try:
+            path = self.touch_recorder.save()
+            Logger.info(f"NotesApp: Touches written to {path}")
+        except Exception as e:
+            Logger.error(f"NotesApp: Cannot write touches: {e}")
+
+    def _on_reminders(self, fired):
+        """Показывает сработавшие напоминания: системное уведомление и сообщение в списке."""
+        for note, item in fired:
+            message = note.get('title', '')
+            if item.missed:
+                message += f" (пропущено повторов: {item.missed})"
+            Logger.info(f"NotesApp: Reminder for note {note.get('id')}")
+            if self.android_utils:
+                self.android_utils.notify('Напоминание', message)
+            try:
+                if self.sm.current == 'main':
+                    self.main_screen.show_toast(f"Напоминание: {message}")
+            except Exception as e:
+                Logger.error(f"NotesApp: Reminder display error: {e}")
+        # Срок напоминания на карточках изменился
+        if self.sm.current == 'main':
+            self.main_screen.refresh_notes()
+
+    def _on_notes_changed_externally(self, note_ids):
+        """notes.json изменили другой программой: обновляем карточки затронутых заметок."""
+        if not self.sm.is_built('main'):
+            return
+        try:
+            self.main_screen.update_note_cards(note_ids)
+            if self.sm.current == 'main':
+                self.main_screen.show_toast(f"Заметки изменены извне: {len(note_ids)}")
+        except Exception as e:
+            Logger.error(f"NotesApp: External change display error: {e}")
+
+    def _flush_pending_save(self):
+        # Таймеры Kivy после паузы/остановки могут не дойти до отложенной записи
+        if self.data_manager and self.data_manager.save_pending:
+            try:
+                self.data_manager.save_notes(force=True)
+            except Exception as e:
+                Logger.error(f"NotesApp: Pending save failed: {e}")
+
+    def _on_save_state(self, saved):
+        """Отложенная запись notes.json: сообщаем, если она затянулась и когда выполнена."""
+        def show(message):
+            if self.sm.is_built('main') and self.sm.current == 'main':
+                self.main_screen.show_toast(message)
+
+        def check(dt):
+            # Обычно правки файла переносятся за доли секунды — сообщаем, только если запись все еще ждет
+            if self.data_manager.save_pending:
+                self._save_delay_shown = True
+                show("notes.json занят другой программой — сохранение отложено")
+
+        if not saved:
+            Clock.schedule_once(check, 1.0)
+        elif self._save_delay_shown:
+            self._save_delay_shown = False
+            show("Заметки сохранены")
+
+    def _on_capabilities(self, capabilities):
+        if self.android_utils:
+            self.android_utils.apply_capabilities(capabilities)
+        if self.sm.is_built('main'):
+            self.main_screen.apply_capabilities(capabilities)
+    
+    def _make_screen(self, module_name, class_name):
+        # Модуль экрана импортируется только при первом построении экрана
+        with phase(f'screen:{class_name}'):
+            screen_class = getattr(importlib.import_module(module_name), class_name)
+            screen = screen_class()
+        screen.app = self
+        return screen
+    
     def _setup_font(self):
         """Настраивает шрифт для лучшей поддержки символов"""
         # Без кастомного шрифта по умолчанию, чтобы избежать падений на десктопе
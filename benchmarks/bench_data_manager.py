@@ -0,0 +1,150 @@
+"""
+Бенчмарк DataManager на синтетических наборах заметок.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.bench_data_manager --sizes 10,1000,100000 --output bench.json
+    python -m benchmarks.bench_data_manager --baseline bench.json --threshold 0.2
+
+Для каждого размера набора замеряются load_data, save_notes, add_note,
+update_note, get_notes, toggle_pin_notes и delete_notes: перцентили времени
+и пиковая память (tracemalloc, отдельным прогоном, чтобы не искажать время).
+При заданном --baseline процесс завершается с кодом 1, если есть регрессии.
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from .corpus import write_corpus
+from .stats import compare, environment, load_report, print_comparison, summarize, write_report
+
+DEFAULT_SIZES = (10, 1000, 10000, 100000)
+OPERATIONS = ("load_data", "save_notes", "add_note", "update_note", "get_notes",
+              "toggle_pin_notes", "delete_notes")
+
+
+def _measure(func: Callable[[], Any], repeats: int, budget: float) -> List[float]:
+    """Выполняет func до repeats раз, но не дольше budget секунд (минимум один раз)."""
+    samples: List[float] = []
+    started = time.perf_counter()
+    gc.collect()
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t0)
+        if time.perf_counter() - started > budget:
+            break
+    return samples
+
+
+def _peak_memory(func: Callable[[], Any]) -> int:
+    """Пиковый прирост памяти Python за один вызов func, в байтах."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func()
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def _operations(manager, rng: random.Random) -> Dict[str, Callable[[], Any]]:
+    def random_ids(count: int) -> List[int]:
+        notes = manager.notes
+        return [notes[rng.randrange(len(notes))]["id"] for _ in range(min(count, len(notes)))]
+
+    def update():
+        ids = random_ids(1)
+        if ids:
+            manager.update_note(ids[0], "Обновленный заголовок", "Новый текст заметки, updated body")
+
+    return {
+        "load_data": manager.load_data,
+        "save_notes": manager.save_notes,
+        "add_note": lambda: manager.add_note("Новая заметка", "Текст новой заметки with latin words"),
+        "update_note": update,
+        "get_notes": manager.get_notes,
+        "toggle_pin_notes": lambda: manager.toggle_pin_notes(random_ids(10)),
+        "delete_notes": lambda: manager.delete_notes(random_ids(10)),
+    }
+
+
+def bench_size(size: int, repeats: int, budget: float, seed: int,
+               operations: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Замеры для одного размера набора (в текущем каталоге создается notes.json)."""
+    from utils.data_manager import DataManager
+    write_corpus("notes.json", size, seed)
+    results: Dict[str, Any] = {"file_bytes": os.path.getsize("notes.json")}
+    manager = DataManager()
+    ops = _operations(manager, random.Random(seed))
+    for name in operations or OPERATIONS:
+        samples = _measure(ops[name], repeats, budget)
+        stats = summarize(samples)
+        stats["peak_memory_bytes"] = _peak_memory(ops[name])
+        results[name] = stats
+        print(f"  {size:>8} {name:<17} p50={stats['p50_ms']} ms p99={stats['p99_ms']} ms "
+              f"peak={stats['peak_memory_bytes'] // 1024} KiB", file=sys.stderr)
+    return results
+
+
+def run(sizes, repeats: int = 20, budget: float = 5.0, seed: int = 0,
+        operations: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Прогоняет бенчмарк во временном каталоге и возвращает отчет."""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    cwd = os.getcwd()
+    report: Dict[str, Any] = {
+        "benchmark": "data_manager",
+        "environment": environment(),
+        "config": {"sizes": list(sizes), "repeats": repeats, "budget_s": budget, "seed": seed},
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="notes-bench-") as workdir:
+        # DataManager работает с файлами относительно текущего каталога
+        os.chdir(workdir)
+        try:
+            for size in sizes:
+                report["results"][str(size)] = bench_size(size, repeats, budget, seed, operations)
+        finally:
+            os.chdir(cwd)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк DataManager на синтетических заметках")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="размеры наборов через запятую (до 1000000)")
+    parser.add_argument("--repeats", type=int, default=20, help="максимум повторов на операцию")
+    parser.add_argument("--budget", type=float, default=5.0, help="лимит времени на операцию, с")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--operations", help=f"подмножество операций: {','.join(OPERATIONS)}")
+    parser.add_argument("--output", help="файл отчета JSON (по умолчанию stdout)")
+    parser.add_argument("--baseline", help="отчет для сравнения; код выхода 1 при регрессии")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимый рост метрики (доля)")
+    parser.add_argument("--metric", default="p50_ms",
+                        help="метрика сравнения (min_ms устойчивее к шуму на общих машинах)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    operations = args.operations.split(",") if args.operations else None
+    report = run(sizes, args.repeats, args.budget, args.seed, operations)
+    if args.baseline:
+        report["comparison"] = compare(report, load_report(args.baseline), metric=args.metric,
+                                       threshold=args.threshold)
+        print_comparison(report["comparison"])
+    write_report(report, args.output)
+    return 1 if report.get("comparison", {}).get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
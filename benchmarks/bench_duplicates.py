@@ -0,0 +1,152 @@
+"""
+Бенчмарк поиска почти одинаковых заметок (utils/duplicates.py).
+
+Запуск из корня проекта:
+
+    python -m benchmarks.bench_duplicates --sizes 1000,10000,100000 --output duplicates.json
+    python -m benchmarks.bench_duplicates --baseline duplicates.json
+
+К набору из benchmarks/corpus.py добавляются --planted копий случайных
+заметок с небольшой правкой (слово дописано, строка добавлена). Замеряются
+построение индекса, поиск похожих для одной заметки (время не должно расти
+с размером набора), список групп и память индекса (tracemalloc); для
+сравнения на наборах до 10 000 — поиск полным перебором. Доля найденных
+копий ниже --min-recall — код выхода 2.
+"""
+
+import argparse
+import copy
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+from .corpus import generate_notes
+from .stats import compare, environment, load_report, print_comparison, summarize, write_report
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+# Полный перебор на больших наборах занимает минуты и ничего нового не показывает
+SCAN_LIMIT = 10000
+
+
+def plant_duplicates(notes: List[Dict[str, Any]], count: int, rng: random.Random) -> List[Tuple[int, int]]:
+    """Дописывает в notes count правленых копий; возвращает пары (id исходной, id копии)."""
+    pairs = []
+    next_id = max(note["id"] for note in notes) + 1
+    for original in rng.sample(notes, min(count, len(notes))):
+        if len(original["content"]) < 40:
+            continue
+        copy_note = copy.deepcopy(original)
+        copy_note["id"] = next_id
+        words = copy_note["content"].split(" ")
+        index = rng.randrange(len(words))
+        words[index] += rng.choice(("!", "ы", " и"))
+        copy_note["content"] = " ".join(words)
+        if rng.random() < 0.5:
+            copy_note["content"] += "\nЕще одна строка"
+        notes.append(copy_note)
+        pairs.append((original["id"], next_id))
+        next_id += 1
+    return pairs
+
+
+def bench_size(size: int, planted: int, lookups: int, seed: int) -> Dict[str, Any]:
+    from utils.duplicates import DuplicateIndex, jaccard, note_text, shingles
+    rng = random.Random(seed)
+    notes = generate_notes(size, seed)
+    pairs = plant_duplicates(notes, planted, rng)
+    results: Dict[str, Any] = {"notes": len(notes), "planted": len(pairs)}
+
+    gc.collect()
+    t0 = time.perf_counter()
+    index = DuplicateIndex(notes)
+    results["build_seconds"] = round(time.perf_counter() - t0, 3)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        measured = DuplicateIndex(notes)
+        results["index_bytes"] = tracemalloc.get_traced_memory()[0]
+        del measured
+    finally:
+        tracemalloc.stop()
+
+    by_id = {note["id"]: note for note in notes}
+    found = sum(1 for original, planted_id in pairs
+                if any(note["id"] == original for note, _ in index.duplicates_of(by_id[planted_id])))
+    results["recall"] = round(found / len(pairs), 3) if pairs else 1.0
+
+    samples = []
+    for note in rng.sample(notes, min(lookups, len(notes))):
+        text = note_text(note)
+        t0 = time.perf_counter()
+        index.find(text, exclude=note["id"])
+        samples.append(time.perf_counter() - t0)
+    results["find"] = summarize(samples)
+
+    if len(notes) <= SCAN_LIMIT:
+        scan = []
+        for note in rng.sample(notes, min(20, len(notes))):
+            t0 = time.perf_counter()
+            items = shingles(note_text(note))
+            [other for other in notes if jaccard(items, shingles(note_text(other))) >= index.threshold]
+            scan.append(time.perf_counter() - t0)
+        results["find_scan"] = summarize(scan)
+
+    gc.collect()
+    t0 = time.perf_counter()
+    clusters = index.clusters()
+    results["clusters_seconds"] = round(time.perf_counter() - t0, 3)
+    results["clusters"] = len(clusters)
+    scan_text = f", scan p50={results['find_scan']['p50_ms']} ms" if "find_scan" in results else ""
+    print(f"  {size:>8} build {results['build_seconds']} s, {results['index_bytes'] // 1024} KiB; "
+          f"find p50={results['find']['p50_ms']} ms{scan_text}; clusters {results['clusters']} "
+          f"in {results['clusters_seconds']} s; recall {results['recall']}", file=sys.stderr)
+    return results
+
+
+def run(sizes, planted: int = 200, lookups: int = 500, seed: int = 0) -> Dict[str, Any]:
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    report: Dict[str, Any] = {
+        "benchmark": "duplicates",
+        "environment": environment(),
+        "config": {"sizes": list(sizes), "planted": planted, "lookups": lookups, "seed": seed},
+        "results": {},
+    }
+    for size in sizes:
+        report["results"][str(size)] = bench_size(size, planted, lookups, seed)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк поиска дубликатов заметок")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="размеры наборов через запятую")
+    parser.add_argument("--planted", type=int, default=200, help="правленых копий в наборе")
+    parser.add_argument("--lookups", type=int, default=500, help="замеров поиска")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-recall", type=float, default=0.9, help="минимальная доля найденных копий")
+    parser.add_argument("--output", help="файл отчета JSON (по умолчанию stdout)")
+    parser.add_argument("--baseline", help="отчет для сравнения; код выхода 1 при регрессии")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимый рост метрики (доля)")
+    parser.add_argument("--metric", default="p50_ms")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    report = run(sizes, args.planted, args.lookups, args.seed)
+    if args.baseline:
+        report["comparison"] = compare(report, load_report(args.baseline), metric=args.metric,
+                                       threshold=args.threshold)
+        print_comparison(report["comparison"])
+    write_report(report, args.output)
+    if any(result["recall"] < args.min_recall for result in report["results"].values()):
+        return 2
+    return 1 if report.get("comparison", {}).get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Бенчмарк импорта каталога заметок (utils/bulk_import.py).
+
+Запуск из корня проекта:
+
+    python -m benchmarks.bench_import --sizes 1000,50000 --output import.json
+    python -m benchmarks.bench_import --sizes 1000,50000 --baseline import.json
+
+Для каждого размера во временном каталоге создается дерево .md/.txt файлов
+(текст из benchmarks/corpus.py, по 500 файлов в подкаталоге, у части —
+заголовок "# ..." и front matter с тегами). Замеряются чтение и разбор
+пулом потоков (--workers, по умолчанию — как в приложении) и одним потоком,
+затем DataManager.import_notes — добавление всех заметок с одной записью
+notes.json; пиковая память — отдельным прогоном (tracemalloc).
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, Optional
+
+from .corpus import iter_notes
+from .stats import compare, environment, load_report, print_comparison, summarize, write_report
+
+DEFAULT_SIZES = (1000, 10000, 50000)
+FILES_PER_DIR = 500
+
+
+def write_tree(root: str, count: int, seed: int) -> int:
+    """Создает count файлов заметок в root; возвращает их общий размер в байтах."""
+    total = 0
+    for index, note in enumerate(iter_notes(count, seed)):
+        directory = os.path.join(root, f"folder{index // FILES_PER_DIR:03d}")
+        if index % FILES_PER_DIR == 0:
+            os.makedirs(directory, exist_ok=True)
+        if index % 3 == 0:
+            name, text = f"note{index:06d}.txt", note["content"]
+        elif index % 3 == 1:
+            name, text = f"note{index:06d}.md", f"# {note['title']}\n\n{note['content']}"
+        else:
+            name = f"note{index:06d}.md"
+            text = f"---\ntitle: {note['title']}\ntags: [bench, t{index % 7}]\n---\n{note['content']}"
+        data = text.encode('utf-8')
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(data)
+        total += len(data)
+    return total
+
+
+def _timed(func, repeats: int):
+    samples, result = [], None
+    for _ in range(repeats):
+        gc.collect()
+        t0 = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - t0)
+    return samples, result
+
+
+def bench_size(workdir: str, size: int, repeats: int, workers: Optional[int], seed: int) -> Dict[str, Any]:
+    from utils.bulk_import import BulkImporter
+    from utils.data_manager import DataManager
+    root = os.path.join(workdir, f"tree-{size}")
+    os.makedirs(root)
+    results: Dict[str, Any] = {"bytes": write_tree(root, size, seed)}
+
+    progress_calls = []
+    importer = BulkImporter(root, workers=workers, on_progress=progress_calls.append)
+    samples, records = _timed(importer.run, repeats)
+    results["read_parallel"] = summarize(samples)
+    results["read_parallel"]["workers"] = importer.workers
+    results["progress_reports"] = len(progress_calls) // repeats
+    samples, _ = _timed(BulkImporter(root, workers=1).run, repeats)
+    results["read_single"] = summarize(samples)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        BulkImporter(root, workers=workers).run()
+        results["read_parallel"]["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    commit = []
+    for attempt in range(repeats):
+        store = os.path.join(workdir, f"store-{size}-{attempt}")
+        os.makedirs(store)
+        cwd = os.getcwd()
+        # DataManager работает с файлами относительно текущего каталога
+        os.chdir(store)
+        try:
+            manager = DataManager()
+            gc.collect()
+            t0 = time.perf_counter()
+            manager.import_notes(records)
+            commit.append(time.perf_counter() - t0)
+        finally:
+            os.chdir(cwd)
+    results["import_notes"] = summarize(commit)
+    results["imported"] = len(records)
+    print(f"  {size:>8} read p50={results['read_parallel']['p50_ms']} ms ({importer.workers} threads), "
+          f"single p50={results['read_single']['p50_ms']} ms, import_notes p50={results['import_notes']['p50_ms']} ms, "
+          f"peak={results['read_parallel']['peak_memory_bytes'] // 1024} KiB", file=sys.stderr)
+    return results
+
+
+def run(sizes, repeats: int = 3, workers: Optional[int] = None, seed: int = 0) -> Dict[str, Any]:
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    report: Dict[str, Any] = {
+        "benchmark": "import",
+        "environment": environment(),
+        "config": {"sizes": list(sizes), "repeats": repeats, "workers": workers, "seed": seed},
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="notes-import-") as workdir:
+        for size in sizes:
+            report["results"][str(size)] = bench_size(workdir, size, repeats, workers, seed)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк импорта каталога заметок")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="число файлов, через запятую")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--workers", type=int, help="потоков чтения (по умолчанию — как в приложении)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="файл отчета JSON (по умолчанию stdout)")
+    parser.add_argument("--baseline", help="отчет для сравнения; код выхода 1 при регрессии")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимый рост метрики (доля)")
+    parser.add_argument("--metric", default="p50_ms")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    report = run(sizes, args.repeats, args.workers, args.seed)
+    if args.baseline:
+        report["comparison"] = compare(report, load_report(args.baseline), metric=args.metric,
+                                       threshold=args.threshold)
+        print_comparison(report["comparison"])
+    write_report(report, args.output)
+    return 1 if report.get("comparison", {}).get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
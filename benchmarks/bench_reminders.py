@@ -0,0 +1,165 @@
+"""
+Бенчмарк планировщика напоминаний (utils/reminders.py).
+
+Запуск из корня проекта:
+
+    python -m benchmarks.bench_reminders --sizes 1000,10000,100000 --output reminders.json
+    python -m benchmarks.bench_reminders --baseline reminders.json
+
+Время и таймер подменяются (FakeClock), поэтому Kivy не нужен, а срабатывания
+проверяются без ожидания. Для каждого размера очереди замеряются add, remove
+и pop_due (одно срабатывание) сериями по 1000 операций — при O(log n) время
+серии почти не растет с размером очереди — и считается, сколько раз
+заводился таймер: он перезаводится, только когда меняется ближайший срок.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+from .stats import compare, environment, load_report, print_comparison, summarize, write_report
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+OPERATIONS = ("add", "remove", "pop_due")
+
+
+class FakeEvent:
+    def __init__(self, clock, callback, due):
+        self.clock = clock
+        self.callback = callback
+        self.due = due
+
+    def cancel(self):
+        if self in self.clock.events:
+            self.clock.events.remove(self)
+
+
+class FakeClock:
+    """Время и schedule_once для ReminderScheduler; advance() вызывает наступившие таймеры."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+        self.events: List[FakeEvent] = []
+        self.scheduled = 0
+
+    def time(self) -> float:
+        return self.now
+
+    def schedule_once(self, callback, timeout=0):
+        self.scheduled += 1
+        event = FakeEvent(self, callback, self.now + timeout)
+        self.events.append(event)
+        return event
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+        for event in sorted((e for e in self.events if e.due <= self.now), key=lambda e: e.due):
+            if event in self.events:
+                self.events.remove(event)
+                event.callback(self.now - event.due)
+
+
+def _timed(func, count: int) -> float:
+    t0 = time.perf_counter()
+    func(count)
+    return time.perf_counter() - t0
+
+
+def bench_size(size: int, repeats: int, seed: int) -> Dict[str, Any]:
+    from utils.reminders import ReminderScheduler
+    rng = random.Random(seed)
+    clock = FakeClock()
+    fired: List[Any] = []
+    scheduler = ReminderScheduler(on_due=fired.extend, clock=clock, time_func=clock.time)
+    # Сроки в пределах года, каждое десятое напоминание — ежедневное
+    day = 86400.0
+    scheduler.reset((key, rng.uniform(day, 365 * day), day if key % 10 == 0 else None)
+                    for key in range(size))
+    scheduler.start()
+    batch = 1000
+    samples: Dict[str, List[float]] = {name: [] for name in OPERATIONS}
+    next_key = size
+    for _ in range(repeats):
+        keys = list(range(next_key, next_key + batch))
+        next_key += batch
+        dues = [rng.uniform(day, 365 * day) for _ in keys]
+
+        def add(count, keys=keys, dues=dues):
+            for key, due in zip(keys, dues):
+                scheduler.add(key, due)
+
+        def remove(count, keys=keys):
+            for key in keys:
+                scheduler.remove(key)
+
+        samples["add"].append(_timed(add, batch))
+        samples["remove"].append(_timed(remove, batch))
+
+        def pop(count):
+            for _ in range(count):
+                clock.now = scheduler.next_due()
+                scheduler.pop_due()
+
+        samples["pop_due"].append(_timed(pop, batch))
+        # Снятые одноразовые возвращаем, чтобы размер очереди не менялся
+        while len(scheduler) < size:
+            scheduler.add(next_key, clock.now + rng.uniform(day, 365 * day))
+            next_key += 1
+
+    # Срабатывание через таймер: сдвигаем время к ближайшему сроку
+    scheduled_before = clock.scheduled
+    target = scheduler.next_due()
+    clock.advance(target - clock.now)
+    results: Dict[str, Any] = {name: summarize(values) for name, values in samples.items()}
+    results["timer"] = {
+        "fired_on_advance": len(fired),
+        "rearms": clock.scheduled - scheduled_before,
+        "pending_events": len(clock.events),
+    }
+    for name in OPERATIONS:
+        print(f"  {size:>8} {name:<8} p50={results[name]['p50_ms']} ms / {batch} ops", file=sys.stderr)
+    return results
+
+
+def run(sizes, repeats: int = 10, seed: int = 0) -> Dict[str, Any]:
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    report: Dict[str, Any] = {
+        "benchmark": "reminders",
+        "environment": environment(),
+        "config": {"sizes": list(sizes), "repeats": repeats, "seed": seed},
+        "results": {},
+    }
+    for size in sizes:
+        report["results"][str(size)] = bench_size(size, repeats, seed)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк планировщика напоминаний")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="число напоминаний в очереди, через запятую")
+    parser.add_argument("--repeats", type=int, default=10, help="серий по 1000 операций")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="файл отчета JSON (по умолчанию stdout)")
+    parser.add_argument("--baseline", help="отчет для сравнения; код выхода 1 при регрессии")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимый рост метрики (доля)")
+    parser.add_argument("--metric", default="p50_ms")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    report = run(sizes, args.repeats, args.seed)
+    if args.baseline:
+        report["comparison"] = compare(report, load_report(args.baseline), metric=args.metric,
+                                       threshold=args.threshold)
+        print_comparison(report["comparison"])
+    write_report(report, args.output)
+    return 1 if report.get("comparison", {}).get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
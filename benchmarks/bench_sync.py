@@ -0,0 +1,159 @@
+"""
+Бенчмарк синхронизации (utils/sync.py) с сервером в том же процессе.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.bench_sync --sizes 1000,10000,100000 --output sync.json
+    python -m benchmarks.bench_sync --baseline sync.json
+
+Для каждого размера набора два устройства (DataManager в отдельных каталогах)
+синхронизируются через StandInServer (benchmarks/sync_server.py): первая
+синхронизация переносит все заметки, затем серии по --changes правок.
+Замеряется время синхронизации без записи notes.json (она целиком
+переписывает файл при любой правке и от синхронизации не зависит), запросы,
+соединения и байты. При синхронизации правок эти числа не должны расти с
+размером набора. Если после замеров устройства не пришли к одинаковым
+заметкам — код выхода 2. Сценарии синхронизации (перенос, конфликт,
+удаление) проверяются тестами: tests/test_sync.py.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+from .corpus import write_corpus
+from .stats import compare, environment, load_report, print_comparison, summarize, write_report
+from .sync_server import StandInServer
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+class Device:
+    """DataManager и SyncEngine в своем каталоге; время записи notes.json считается отдельно."""
+
+    def __init__(self, workdir: str, name: str, url: str, size: int = 0, seed: int = 0):
+        from utils.data_manager import DataManager
+        from utils.sync import SyncEngine
+        path = os.path.join(workdir, name)
+        os.makedirs(path)
+        if size:
+            write_corpus(os.path.join(path, "notes.json"), size, seed)
+        cwd = os.getcwd()
+        # DataManager работает с файлами относительно текущего каталога
+        os.chdir(path)
+        try:
+            self.manager = DataManager()
+        finally:
+            os.chdir(cwd)
+        self.manager.notes_file = os.path.join(path, "notes.json")
+        self.manager.settings_file = os.path.join(path, "settings.json")
+        self.manager.attachments.base_dir = os.path.join(path, "attachments")
+        self.engine = SyncEngine(self.manager, url, state_file=os.path.join(path, "sync.json"))
+        self.save_seconds = 0.0
+        save = self.manager.save_notes
+
+        def timed_save(force=False):
+            t0 = time.perf_counter()
+            saved = save(force=force)
+            self.save_seconds += time.perf_counter() - t0
+            return saved
+        self.manager.save_notes = timed_save
+
+    def sync(self) -> Dict[str, Any]:
+        self.save_seconds = 0.0
+        t0 = time.perf_counter()
+        result = self.engine.sync()
+        result["seconds"] = time.perf_counter() - t0 - self.save_seconds
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        from utils.sync import sync_record
+        return {note["uid"]: sync_record(note) for note in self.manager.notes}
+
+
+def bench_size(workdir: str, size: int, changes: int, repeats: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    with StandInServer() as server:
+        a = Device(workdir, f"a-{size}", server.url, size=size, seed=seed)
+        b = Device(workdir, f"b-{size}", server.url)
+        initial_push = a.sync()
+        initial_pull = b.sync()
+        results: Dict[str, Any] = {
+            "initial_push": {"seconds": round(initial_push["seconds"], 3), "bytes_sent": initial_push["bytes_sent"],
+                             "requests": initial_push["requests"]},
+            "initial_pull": {"seconds": round(initial_pull["seconds"], 3),
+                             "bytes_received": initial_pull["bytes_received"], "requests": initial_pull["requests"]},
+        }
+        push_samples, pull_samples = [], []
+        traffic = {"requests": 0, "connections": 0, "bytes_sent": 0, "bytes_received": 0}
+        for _ in range(repeats):
+            notes = a.manager.notes
+            for note in rng.sample(notes, min(changes, len(notes))):
+                note["content"] += f"\nПравка {rng.random():.6f}"
+                note["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+                a.manager.mark_changed(note)
+            pushed = a.sync()
+            pulled = b.sync()
+            push_samples.append(pushed["seconds"])
+            pull_samples.append(pulled["seconds"])
+            for key in traffic:
+                traffic[key] += pushed[key] + pulled[key]
+        results["delta_push"] = summarize(push_samples)
+        results["delta_pull"] = summarize(pull_samples)
+        results["delta_traffic"] = {key: value // repeats for key, value in traffic.items()}
+        results["converged"] = a.snapshot() == b.snapshot()
+    print(f"  {size:>8} initial push {results['initial_push']['seconds']} s, "
+          f"pull {results['initial_pull']['seconds']} s; {changes} changes: "
+          f"push p50={results['delta_push']['p50_ms']} ms, pull p50={results['delta_pull']['p50_ms']} ms, "
+          f"{results['delta_traffic']['bytes_sent'] + results['delta_traffic']['bytes_received']} bytes, "
+          f"{results['delta_traffic']['requests']} requests", file=sys.stderr)
+    return results
+
+
+def run(sizes, changes: int = 10, repeats: int = 10, seed: int = 0) -> Dict[str, Any]:
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    report: Dict[str, Any] = {
+        "benchmark": "sync",
+        "environment": environment(),
+        "config": {"sizes": list(sizes), "changes": changes, "repeats": repeats, "seed": seed},
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="notes-sync-") as workdir:
+        for size in sizes:
+            report["results"][str(size)] = bench_size(workdir, size, changes, repeats, seed)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк синхронизации заметок")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="размеры наборов через запятую")
+    parser.add_argument("--changes", type=int, default=10, help="правок между синхронизациями")
+    parser.add_argument("--repeats", type=int, default=10, help="серий правок")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="файл отчета JSON (по умолчанию stdout)")
+    parser.add_argument("--baseline", help="отчет для сравнения; код выхода 1 при регрессии")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимый рост метрики (доля)")
+    parser.add_argument("--metric", default="p50_ms")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    report = run(sizes, args.changes, args.repeats, args.seed)
+    if args.baseline:
+        report["comparison"] = compare(report, load_report(args.baseline), metric=args.metric,
+                                       threshold=args.threshold)
+        print_comparison(report["comparison"])
+    write_report(report, args.output)
+    if not all(result["converged"] for result in report["results"].values()):
+        return 2
+    return 1 if report.get("comparison", {}).get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
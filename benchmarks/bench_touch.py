@@ -0,0 +1,451 @@
+"""
+Воспроизведение потоков касаний и замер задержки «ввод -> обновление экрана».
+
+Запуск из корня проекта:
+
+    python -m benchmarks.bench_touch --sizes 50 --output touch.json
+    python -m benchmarks.bench_touch --baseline touch.json --max-p99-ms 150
+    python -m benchmarks.bench_touch --replay touches.json   # запись из приложения
+
+Касания подаются через собственный поставщик ввода (MotionEventProvider),
+то есть проходят тот же путь, что и настоящие: EventLoop, постобработка,
+ScrollView, обработчики экранов. Сценарий по умолчанию: тап по карточке
+(открытие просмотра), длинное нажатие на пороге long_press_duration, выбор
+многих карточек, fling-прокрутка, переход в редактор, фокус и отмена в нем. Задержка — время от момента ввода до первого кадра (on_flip),
+на котором ожидаемое изменение уже видно; для длинного нажатия отсчет идет
+от момента, когда истек long_press_duration.
+
+Запись касаний в приложении включается настройкой "touch_record": true
+(файл touches.json пишется при паузе/выходе); при воспроизведении записи
+задержка считается для каждого события до следующего кадра.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .bench_ui import PROJECT_ROOT, prepare_workdir, run_in_child
+from .stats import compare, environment, load_report, print_comparison, summarize, write_report
+
+DEFAULT_SIZES = (50,)
+FRAME = 1.0 / 60
+
+# (t, etype, uid, sx, sy): время от начала взаимодействия и нормализованные координаты
+TouchEvent = Tuple[float, str, int, float, float]
+
+
+class Interaction:
+    """Одно взаимодействие: события, момент ввода и признак видимого результата.
+
+    build(app) возвращает (events, context) или None, если взаимодействие
+    невозможно (например, карточек на экране меньше, чем нужно). Задержка
+    отсчитывается от события events[trigger] плюс trigger_delay до первого
+    кадра, на котором expect(app, context) истинно.
+    """
+
+    def __init__(self, name: str, build: Callable, expect: Callable, trigger: int = 0,
+                 trigger_delay: float = 0.0, cleanup: Optional[Callable] = None,
+                 settle: float = 0.3, timeout: float = 3.0):
+        self.name = name
+        self.build = build
+        self.expect = expect
+        self.trigger = trigger
+        self.trigger_delay = trigger_delay
+        self.cleanup = cleanup
+        self.settle = settle
+        self.timeout = timeout
+
+
+def _replay_classes():
+    """Классы ввода Kivy (импорт kivy только в дочернем процессе)."""
+    import time
+    from collections import deque
+    from kivy.input.motionevent import MotionEvent
+    from kivy.input.provider import MotionEventProvider
+
+    class ReplayMotionEvent(MotionEvent):
+        def depack(self, args):
+            self.sx, self.sy = args
+            if not self.profile:
+                self.profile.append('pos')
+            super().depack(args)
+
+    class ReplayProvider(MotionEventProvider):
+        """Выдает запланированные касания в EventLoop по наступлении их времени."""
+
+        def __init__(self):
+            super().__init__('replay', None)
+            self.queue = deque()
+            self.touches: Dict[int, Any] = {}
+            self.counter = 0
+            # (due, etype) поданных, но еще не отрисованных событий
+            self.dispatched: List[Tuple[float, str]] = []
+
+        def schedule(self, events: List[TouchEvent], start: float) -> None:
+            for t, etype, uid, sx, sy in sorted(events, key=lambda e: e[0]):
+                self.queue.append((start + t, etype, uid, sx, sy))
+
+        def pending(self) -> bool:
+            return bool(self.queue)
+
+        def update(self, dispatch_fn):
+            now = time.perf_counter()
+            queue = self.queue
+            while queue and queue[0][0] <= now:
+                due, etype, uid, sx, sy = queue.popleft()
+                if etype == 'begin':
+                    self.counter += 1
+                    me = ReplayMotionEvent('replay', f'replay{self.counter}', (sx, sy), is_touch=True)
+                    self.touches[uid] = me
+                else:
+                    me = self.touches.get(uid)
+                    if me is None:
+                        continue
+                    me.move((sx, sy))
+                    if etype == 'end':
+                        me.update_time_end()
+                        del self.touches[uid]
+                dispatch_fn(etype, me)
+                self.dispatched.append((due, etype))
+
+    return ReplayMotionEvent, ReplayProvider
+
+
+# Построение сценария
+def _norm(widget, x: Optional[float] = None, y: Optional[float] = None) -> Tuple[float, float]:
+    """Нормализованные координаты окна для точки виджета (по умолчанию центр)."""
+    from kivy.core.window import Window
+    wx, wy = widget.to_window(widget.center_x if x is None else x,
+                              widget.center_y if y is None else y)
+    return wx / Window.width, wy / Window.height
+
+
+def _visible_cards(app) -> List[Any]:
+    screen = app.main_screen
+    scroll = screen.notes_layout.parent
+    bottom = scroll.to_window(scroll.x, scroll.y)[1]
+    top = scroll.to_window(scroll.x, scroll.top)[1]
+    cards = [c for c in reversed(screen.notes_layout.children) if hasattr(c, 'note_id')]
+    return [c for c in cards if bottom + 10 < c.to_window(*c.center)[1] < top - 10]
+
+
+def _find_button(root, text: str):
+    from kivy.uix.button import Button
+    stack = [root]
+    while stack:
+        widget = stack.pop()
+        if isinstance(widget, Button) and widget.text == text:
+            return widget
+        stack.extend(widget.children)
+    return None
+
+
+def _tap(pos: Tuple[float, float], hold: float = 0.05) -> List[TouchEvent]:
+    return [(0.0, 'begin', 0, pos[0], pos[1]), (hold, 'end', 0, pos[0], pos[1])]
+
+
+def _card(index: int):
+    def build(app):
+        cards = _visible_cards(app)
+        if len(cards) <= index:
+            return None
+        return cards[index], {"card": cards[index]}
+    return build
+
+
+def _tap_card(index: int, hold: float = 0.05):
+    def build(app):
+        found = _card(index)(app)
+        if found is None:
+            return None
+        card, context = found
+        return _tap(_norm(card), hold), context
+    return build
+
+
+def _close_view(app):
+    app.view_screen.on_back()
+
+
+def _cancel_selection(app):
+    app.main_screen.cancel_selection(None)
+
+
+def _fling(app):
+    scroll = app.main_screen.notes_layout.parent
+    x, _ = _norm(scroll)
+    _, y0 = _norm(scroll, y=scroll.y + scroll.height * 0.25)
+    _, y1 = _norm(scroll, y=scroll.y + scroll.height * 0.75)
+    # Быстрый жест вверх: 6 кадров, после отпускания ScrollView докручивает по инерции
+    steps = 6
+    events: List[TouchEvent] = [(0.0, 'begin', 0, x, y0)]
+    for i in range(1, steps + 1):
+        events.append((i * FRAME, 'update', 0, x, y0 + (y1 - y0) * i / steps))
+    events.append(((steps + 1) * FRAME, 'end', 0, x, y1))
+    return events, {"scroll": scroll, "scroll_y": scroll.scroll_y}
+
+
+def _reset_scroll(app):
+    app.main_screen.notes_layout.parent.scroll_y = 1.0
+
+
+def _tap_widget(getter: Callable):
+    def build(app):
+        widget = getter(app)
+        if widget is None:
+            return None
+        return _tap(_norm(widget)), {"widget": widget}
+    return build
+
+
+def default_scenario(app, repeats: int = 3, select_count: int = 5) -> List[Interaction]:
+    """Типовые взаимодействия с MainScreen, ViewScreen и EditScreen."""
+    long_press = app.main_screen.long_press_duration
+    # ScrollView передает касание карточке только через scroll_timeout (если палец
+    # не сдвинулся), поэтому удерживаем дольше; задержка ScrollView входит в замер
+    hold = long_press + app.main_screen.notes_layout.parent.scroll_timeout / 1000.0 + 0.2
+    on_view = lambda app, ctx: app.sm.current == 'view'
+    on_edit = lambda app, ctx: app.sm.current == 'edit'
+    on_main = lambda app, ctx: app.sm.current == 'main'
+    selected = lambda app, ctx: ctx["card"].checkbox.active
+    interactions: List[Interaction] = []
+    for i in range(repeats):
+        interactions.append(Interaction('tap_open', _tap_card(i), on_view, trigger=1,
+                                        cleanup=_close_view, settle=0.8))
+    for i in range(repeats):
+        interactions.append(Interaction('long_press', _tap_card(i, hold),
+                                        lambda app, ctx: app.main_screen.is_selection_mode,
+                                        trigger_delay=long_press, cleanup=_cancel_selection))
+    # Выбор многих карточек: длинное нажатие, затем тапы по остальным
+    interactions.append(Interaction('long_press', _tap_card(0, hold), selected,
+                                    trigger_delay=long_press))
+    for i in range(1, select_count + 1):
+        interactions.append(Interaction('select', _tap_card(i), selected, trigger=1, settle=0.1))
+    interactions[-1].cleanup = _cancel_selection
+    for _ in range(repeats):
+        interactions.append(Interaction(
+            'fling', _fling, lambda app, ctx: ctx["scroll"].scroll_y != ctx["scroll_y"],
+            trigger=1, cleanup=_reset_scroll, settle=1.5))
+    # Редактор: открыть заметку, перейти к правке, поставить фокус в текст, отменить
+    interactions.append(Interaction('tap_open', _tap_card(0), on_view, trigger=1, settle=0.8))
+    interactions.append(Interaction('view_edit', _tap_widget(lambda app: _find_button(app.view_screen, 'Изменить')),
+                                    on_edit, trigger=1, settle=0.8))
+    interactions.append(Interaction('edit_focus', _tap_widget(lambda app: app.edit_screen.text_input),
+                                    lambda app, ctx: app.edit_screen.text_input.focus, trigger=1))
+    interactions.append(Interaction('edit_cancel', _tap_widget(lambda app: _find_button(app.edit_screen, 'Отмена')),
+                                    on_main, trigger=1, settle=0.8))
+    return interactions
+
+
+# Дочерний процесс
+def run_child(result_file: str, repeats: int, replay_file: Optional[str]) -> None:
+    import time
+    from kivy.base import EventLoop
+    from kivy.clock import Clock
+    from kivy.config import Config
+    Config.set('graphics', 'maxfps', '0')
+    from kivy.core.window import Window
+    from kivy.logger import Logger
+    sys.path.insert(0, PROJECT_ROOT)
+    from app import NotesApp
+
+    perf_counter = time.perf_counter
+    _, ReplayProvider = _replay_classes()
+    latencies: Dict[str, List[float]] = {}
+    failures: Dict[str, int] = {}
+    skipped: Dict[str, int] = {}
+
+    class Runner:
+        def __init__(self, app, provider):
+            self.app = app
+            self.provider = provider
+            self.queue: List[Interaction] = []
+            self.current: Optional[Interaction] = None
+            self.on_done: Optional[Callable] = None
+            Window.bind(on_flip=self._on_flip)
+            # Без перерисовки кадров нет, поэтому таймаут проверяется еще и по часам
+            self._watchdog = Clock.schedule_interval(self._check_timeout, 0.1)
+
+        def run(self, interactions: List[Interaction], on_done: Callable) -> None:
+            self.queue = list(interactions)
+            self.on_done = on_done
+            self._next()
+
+        def _next(self, *args):
+            if self.provider.pending():
+                # Хвост предыдущего жеста еще не подан
+                Clock.schedule_once(self._next, 0.05)
+                return
+            if not self.queue:
+                Window.unbind(on_flip=self._on_flip)
+                self._watchdog.cancel()
+                self.on_done()
+                return
+            interaction = self.queue.pop(0)
+            try:
+                built = interaction.build(self.app)
+            except Exception as e:
+                Logger.warning(f"BenchTouch: {interaction.name}: build failed: {e}")
+                built = None
+            if built is None:
+                # Сценарий не подходит к данным (мало карточек на экране) — пропускаем
+                Logger.warning(f"BenchTouch: {interaction.name}: skipped")
+                skipped[interaction.name] = skipped.get(interaction.name, 0) + 1
+                self.current = interaction
+                self._complete()
+                return
+            events, context = built
+            start = perf_counter() + 0.02
+            self.provider.schedule(events, start)
+            self.current = interaction
+            self.context = context
+            self.trigger_time = start + events[interaction.trigger][0] + interaction.trigger_delay
+            self.deadline = start + events[-1][0] + interaction.timeout
+
+        def _on_flip(self, *args):
+            interaction = self.current
+            if interaction is None:
+                return
+            now = perf_counter()
+            if now >= self.trigger_time and interaction.expect(self.app, self.context):
+                latencies.setdefault(interaction.name, []).append(now - self.trigger_time)
+                self._complete()
+
+        def _check_timeout(self, dt):
+            if self.current is not None and perf_counter() > self.deadline:
+                failures[self.current.name] = failures.get(self.current.name, 0) + 1
+                Logger.warning(f"BenchTouch: {self.current.name}: no visual update")
+                self._complete()
+
+        def _complete(self):
+            interaction = self.current
+            self.current = None
+            Clock.schedule_once(lambda dt: self._finish(interaction), 0)
+
+        def _finish(self, interaction):
+            if self.provider.pending():
+                Clock.schedule_once(lambda dt: self._finish(interaction), 0.05)
+                return
+            if interaction.cleanup is not None:
+                interaction.cleanup(self.app)
+            Clock.schedule_once(self._next, interaction.settle)
+
+    class ReplayRecording:
+        """Воспроизводит запись как есть; задержка — от события до следующего кадра."""
+
+        def __init__(self, provider, events):
+            self.provider = provider
+            self.events = events
+
+        def run(self, on_done):
+            self.on_done = on_done
+            self.provider.schedule([tuple(e) for e in self.events], perf_counter() + 0.02)
+            Window.bind(on_flip=self._on_flip)
+
+        def _on_flip(self, *args):
+            now = perf_counter()
+            for due, etype in self.provider.dispatched:
+                latencies.setdefault(f"replay_{etype}", []).append(now - due)
+            self.provider.dispatched.clear()
+            if not self.provider.pending() and not self.provider.touches:
+                Window.unbind(on_flip=self._on_flip)
+                Clock.schedule_once(lambda dt: self.on_done(), 0.5)
+
+    class BenchApp(NotesApp):
+        def on_start(self):
+            super().on_start()
+            self.replay_provider = ReplayProvider()
+            EventLoop.add_input_provider(self.replay_provider)
+            Clock.schedule_once(self._start_replay, 1.5)
+
+        def _start_replay(self, dt):
+            if replay_file:
+                from utils.touch_recorder import load_touches
+                # Ссылку храним: Window.bind и Clock держат методы только слабо
+                self.runner = ReplayRecording(self.replay_provider, load_touches(replay_file)["events"])
+                self.runner.run(self._finish)
+            else:
+                self.runner = Runner(self, self.replay_provider)
+                self.runner.run(default_scenario(self, repeats), self._finish)
+
+        def _finish(self):
+            result = {name: summarize(values) for name, values in latencies.items()}
+            for key, counts in (("failures", failures), ("skipped", skipped)):
+                for name, count in counts.items():
+                    result.setdefault(name, {"count": 0})[key] = count
+            with open(result_file, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            self.stop()
+
+    BenchApp().run()
+
+
+def bench_size(size: int, seed: int, repeats: int, replay_file: Optional[str],
+               gl_backend: Optional[str], timeout: float) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="notes-touch-bench-") as workdir:
+        prepare_workdir(workdir, size, seed)
+        result_file = os.path.join(workdir, "result.json")
+        args = ["--repeats", str(repeats)]
+        if replay_file:
+            args += ["--replay", os.path.abspath(replay_file)]
+        result = run_in_child("benchmarks.bench_touch", workdir, result_file, args, gl_backend, timeout)
+    for name, stats in sorted(result.items()):
+        print(f"  {size:>6} {name:<12} n={stats['count']} p50={stats.get('p50_ms')} ms "
+              f"p99={stats.get('p99_ms')} ms failures={stats.get('failures', 0)}", file=sys.stderr)
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Задержка отклика на касания (offscreen-окно)")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3, help="повторов каждого взаимодействия")
+    parser.add_argument("--replay", help="воспроизвести запись touches.json вместо сценария")
+    parser.add_argument("--gl-backend", help="KIVY_GL_BACKEND для дочерних процессов (например, mock)")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--output", help="файл отчета JSON (по умолчанию stdout)")
+    parser.add_argument("--baseline", help="отчет для сравнения; код выхода 1 при регрессии")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--metric", default="p50_ms")
+    parser.add_argument("--max-p99-ms", type=float, help="код выхода 1, если p99 любого взаимодействия больше")
+    parser.add_argument("--child", metavar="RESULT_FILE", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child, args.repeats, args.replay)
+        return 0
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    report: Dict[str, Any] = {
+        "benchmark": "touch",
+        "environment": environment(),
+        "config": {"sizes": sizes, "seed": args.seed, "repeats": args.repeats, "replay": args.replay,
+                   "gl_backend": args.gl_backend or os.environ.get("KIVY_GL_BACKEND")},
+        "results": {},
+    }
+    for size in sizes:
+        report["results"][str(size)] = bench_size(size, args.seed, args.repeats, args.replay,
+                                                  args.gl_backend, args.timeout)
+    failed = False
+    for size, interactions in report["results"].items():
+        for name, stats in interactions.items():
+            if stats.get("failures"):
+                print(f"Нет отклика: {size}/{name} ({stats['failures']} раз)", file=sys.stderr)
+                failed = True
+            if args.max_p99_ms is not None and stats.get("p99_ms", 0) > args.max_p99_ms:
+                print(f"Превышена задержка: {size}/{name} p99={stats['p99_ms']} ms", file=sys.stderr)
+                failed = True
+    if args.baseline:
+        report["comparison"] = compare(report, load_report(args.baseline), metric=args.metric,
+                                       threshold=args.threshold)
+        print_comparison(report["comparison"])
+        failed = failed or bool(report["comparison"]["regressions"])
+    write_report(report, args.output)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Бенчмарк отрисовки списка заметок без экрана (offscreen-окно SDL2).
+
+Запуск из корня проекта:
+
+    python -m benchmarks.bench_ui --sizes 10,100,1000 --output ui.json
+    python -m benchmarks.bench_ui --baseline ui.json
+
+Для каждого размера набора в отдельном процессе (приложение Kivy можно
+запустить только один раз за процесс) замеряются: время NotesApp.build и
+время до первого кадра, время MainScreen.refresh_notes и число виджетов,
+длительности кадров при программной прокрутке ScrollView со списком.
+Ограничение FPS отключается, поэтому длительность кадра — это работа, а не
+ожидание vsync. Без OpenGL (CI без Mesa) используйте --gl-backend mock:
+кадры тогда не рисуются, но раскладка и обновление виджетов замеряются.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from .corpus import write_corpus
+from .stats import compare, environment, load_report, print_comparison, summarize, write_report
+
+DEFAULT_SIZES = (10, 100, 1000)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_child(result_file: str, refresh_repeats: int, scroll_frames: int) -> None:
+    """Замеры в текущем процессе; notes.json уже лежит в текущем каталоге."""
+    import time
+    from kivy.config import Config
+    Config.set('graphics', 'maxfps', '0')
+    from kivy.clock import Clock
+    from kivy.core.window import Window
+    sys.path.insert(0, PROJECT_ROOT)
+    from app import NotesApp
+    from utils.perf_overlay import count_widgets
+
+    perf_counter = time.perf_counter
+    result: Dict[str, Any] = {}
+
+    class BenchApp(NotesApp):
+        def build(self):
+            self._build_started = perf_counter()
+            root = super().build()
+            result["build_ms"] = round((perf_counter() - self._build_started) * 1000, 3)
+            Window.bind(on_flip=self._on_first_flip)
+            return root
+
+        def on_start(self):
+            super().on_start()
+            # Даем завершиться фоновым задачам старта (prewarm, проверка возможностей)
+            Clock.schedule_once(self._bench_refresh, 1.5)
+
+        def _on_first_flip(self, *args):
+            Window.unbind(on_flip=self._on_first_flip)
+            result["ttff_ms"] = round((perf_counter() - self._build_started) * 1000, 3)
+
+        def _bench_refresh(self, dt):
+            screen = self.main_screen
+            samples = []
+            for _ in range(refresh_repeats):
+                t0 = perf_counter()
+                screen.refresh_notes()
+                samples.append(perf_counter() - t0)
+            result["refresh_notes"] = summarize(samples)
+            result["widgets"] = count_widgets(screen)
+            result["window_widgets"] = count_widgets(Window)
+            # Раскладка нового списка — на следующем кадре, прокрутку начинаем после нее
+            Clock.schedule_once(self._bench_scroll, 0.2)
+
+        def _bench_scroll(self, dt):
+            scroll = self.main_screen.notes_layout.parent
+            frames: List[float] = []
+            state = {"last": None, "step": 0}
+
+            def on_flip(*args):
+                now = perf_counter()
+                if state["last"] is not None:
+                    frames.append(now - state["last"])
+                state["last"] = now
+
+            def step(dt):
+                # Вниз до конца списка и обратно, по кадру на шаг
+                half = scroll_frames // 2
+                i = state["step"]
+                scroll.scroll_y = 1.0 - (i / half if i <= half else (scroll_frames - i) / half)
+                state["step"] += 1
+                if state["step"] > scroll_frames:
+                    Window.unbind(on_flip=on_flip)
+                    result["scroll_frames"] = summarize(frames)
+                    result["scroll_jank_frames"] = sum(1 for f in frames if f > 1 / 60)
+                    self._finish()
+                    return False
+                return True
+
+            Window.bind(on_flip=on_flip)
+            Clock.schedule_interval(step, 0)
+
+        def _finish(self):
+            with open(result_file, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            self.stop()
+
+    BenchApp().run()
+
+
+def prepare_workdir(workdir: str, size: int, seed: int) -> None:
+    """Набор заметок и настройки без стартового окна — приложение сразу открывает список."""
+    write_corpus(os.path.join(workdir, "notes.json"), size, seed)
+    with open(os.path.join(workdir, "settings.json"), 'w', encoding='utf-8') as f:
+        json.dump({"show_welcome": False}, f)
+
+
+def run_in_child(module: str, workdir: str, result_file: str, args: List[str],
+                 gl_backend: Optional[str], timeout: float) -> Dict[str, Any]:
+    """Запускает `python -m module --child result_file ...` в offscreen-окне и читает результат."""
+    env = dict(os.environ)
+    env.setdefault("SDL_VIDEODRIVER", "offscreen")
+    env.setdefault("KIVY_WINDOW", "sdl2")
+    env.setdefault("KIVY_NO_CONSOLELOG", "1")
+    env.setdefault("KIVY_NO_ARGS", "1")
+    if gl_backend:
+        env["KIVY_GL_BACKEND"] = gl_backend
+    env["PYTHONPATH"] = PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    cmd = [sys.executable, "-m", module, "--child", result_file] + args
+    proc = subprocess.run(cmd, cwd=workdir, env=env, timeout=timeout,
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    if not os.path.exists(result_file):
+        tail = proc.stdout.decode('utf-8', 'replace')[-2000:]
+        raise RuntimeError(f"{module} failed (code {proc.returncode}):\n{tail}")
+    with open(result_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def bench_size(size: int, seed: int, refresh_repeats: int, scroll_frames: int,
+               gl_backend: Optional[str], timeout: float) -> Dict[str, Any]:
+    """Запускает замеры для одного размера набора в отдельном процессе."""
+    with tempfile.TemporaryDirectory(prefix="notes-ui-bench-") as workdir:
+        prepare_workdir(workdir, size, seed)
+        result_file = os.path.join(workdir, "result.json")
+        args = ["--refresh-repeats", str(refresh_repeats), "--scroll-frames", str(scroll_frames)]
+        result = run_in_child("benchmarks.bench_ui", workdir, result_file, args, gl_backend, timeout)
+    print(f"  {size:>6} build={result['build_ms']} ms ttff={result.get('ttff_ms')} ms "
+          f"refresh p50={result['refresh_notes']['p50_ms']} ms widgets={result['widgets']} "
+          f"scroll p50={result['scroll_frames']['p50_ms']} ms p99={result['scroll_frames']['p99_ms']} ms",
+          file=sys.stderr)
+    return result
+
+
+def run(sizes, seed: int = 0, refresh_repeats: int = 5, scroll_frames: int = 120,
+        gl_backend: Optional[str] = None, timeout: float = 600) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        "benchmark": "ui",
+        "environment": environment(),
+        "config": {"sizes": list(sizes), "seed": seed, "refresh_repeats": refresh_repeats,
+                   "scroll_frames": scroll_frames,
+                   "gl_backend": gl_backend or os.environ.get("KIVY_GL_BACKEND")},
+        "results": {},
+    }
+    for size in sizes:
+        result = bench_size(size, seed, refresh_repeats, scroll_frames, gl_backend, timeout)
+        # Плоские значения оформляем как метрики, чтобы их можно было сравнивать с базой
+        for name in ("build_ms", "ttff_ms"):
+            if name in result:
+                result[name.replace("_ms", "")] = {"p50_ms": result.pop(name)}
+        report["results"][str(size)] = result
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк списка заметок в offscreen-окне")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--refresh-repeats", type=int, default=5)
+    parser.add_argument("--scroll-frames", type=int, default=120)
+    parser.add_argument("--gl-backend", help="KIVY_GL_BACKEND для дочерних процессов (например, mock)")
+    parser.add_argument("--timeout", type=float, default=600, help="лимит на один размер, с")
+    parser.add_argument("--output", help="файл отчета JSON (по умолчанию stdout)")
+    parser.add_argument("--baseline", help="отчет для сравнения; код выхода 1 при регрессии")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--metric", default="p50_ms")
+    parser.add_argument("--child", metavar="RESULT_FILE", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child, args.refresh_repeats, args.scroll_frames)
+        return 0
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    report = run(sizes, args.seed, args.refresh_repeats, args.scroll_frames, args.gl_backend, args.timeout)
+    if args.baseline:
+        report["comparison"] = compare(report, load_report(args.baseline), metric=args.metric,
+                                       threshold=args.threshold)
+        print_comparison(report["comparison"])
+    write_report(report, args.output)
+    return 1 if report.get("comparison", {}).get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Генератор синтетических наборов заметок для бенчмарков.
+
+Заметки похожи на настоящие: смесь кириллицы и латиницы, длины с тяжелым
+хвостом (большинство короткие, единицы — очень длинные), часть закреплена.
+Генерация детерминирована (seed), поэтому результаты разных запусков
+сравнимы между собой.
+"""
+
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+
+CYRILLIC_WORDS = (
+    "заметка список купить молоко хлеб встреча завтра позвонить маме проект отчет "
+    "задача идея книга фильм работа дом дача врач запись экзамен лекция конспект "
+    "пароль адрес телефон рецепт суп пирог праздник подарок поездка билет поезд"
+).split()
+LATIN_WORDS = (
+    "todo note meeting call email deadline review release build test python kivy "
+    "android app server api bug fix feature draft idea plan sprint backlog notes"
+).split()
+PUNCTUATION = (".", ",", "!", "?", ":", "")
+BASE_DATE = datetime(2025, 1, 1)
+
+
+def _words(rng: random.Random, count: int) -> List[str]:
+    # Примерно 70% кириллицы, 30% латиницы, как в типичных заметках
+    return [rng.choice(CYRILLIC_WORDS if rng.random() < 0.7 else LATIN_WORDS) for _ in range(count)]
+
+
+def _text(rng: random.Random, length: int) -> str:
+    lines = []
+    size = 0
+    while size < length:
+        line = " ".join(_words(rng, rng.randint(3, 12))) + rng.choice(PUNCTUATION)
+        lines.append(line.capitalize())
+        size += len(line) + 1
+    return "\n".join(lines)[:length]
+
+
+def iter_notes(count: int, seed: int = 0, pinned_ratio: float = 0.05) -> Iterator[Dict[str, Any]]:
+    """Генерирует count заметок в формате notes.json (id от 1 до count)."""
+    rng = random.Random(seed)
+    for note_id in range(1, count + 1):
+        # Логнормальное распределение: медиана ~150 символов, редкие заметки до 20 000
+        length = min(20000, max(1, int(rng.lognormvariate(5.0, 1.2))))
+        created = BASE_DATE + timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+        updated = created + timedelta(seconds=rng.randint(0, 30 * 24 * 3600))
+        title = "" if rng.random() < 0.1 else " ".join(_words(rng, rng.randint(1, 5))).capitalize()
+        yield {
+            "id": note_id,
+            "title": title or "Без заголовка",
+            "content": _text(rng, length),
+            "created_at": created.isoformat(),
+            "updated_at": updated.isoformat(),
+            "pinned": rng.random() < pinned_ratio,
+        }
+
+
+def generate_notes(count: int, seed: int = 0, pinned_ratio: float = 0.05) -> List[Dict[str, Any]]:
+    return list(iter_notes(count, seed, pinned_ratio))
+
+
+def write_corpus(path: str, count: int, seed: int = 0, pinned_ratio: float = 0.05) -> None:
+    """Записывает набор в файл в том же формате, что DataManager.save_notes."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(generate_notes(count, seed, pinned_ratio), f, ensure_ascii=False, indent=2)
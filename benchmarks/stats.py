@@ -0,0 +1,93 @@
+"""
+Общие функции бенчмарков: перцентили, сведения об окружении, сравнение с базой.
+"""
+
+import json
+import platform
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Перцентиль q (0..100) с линейной интерполяцией; values уже отсортированы."""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q / 100.0
+    low = int(pos)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (pos - low)
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """Статистика по замерам в секундах; в отчете — миллисекунды."""
+    values = sorted(samples)
+    ms = lambda v: round(v * 1000, 4)
+    return {
+        "count": len(values),
+        "min_ms": ms(values[0]) if values else 0.0,
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+        "p50_ms": ms(percentile(values, 50)),
+        "p90_ms": ms(percentile(values, 90)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else 0.0,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], metric: str = "p50_ms",
+            threshold: float = 0.2, min_delta_ms: float = 0.5) -> Dict[str, Any]:
+    """Сравнивает results[size][operation][metric] с базовым отчетом.
+
+    Регрессия — рост больше чем на threshold (доля) и больше чем на
+    min_delta_ms: очень быстрые операции иначе «регрессируют» от шума.
+    """
+    regressions, improvements, missing = [], [], []
+    for size, operations in current.get("results", {}).items():
+        for name, stats in operations.items():
+            if not isinstance(stats, dict):
+                continue
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if not isinstance(base, dict) or metric not in base or metric not in stats:
+                missing.append(f"{size}/{name}")
+                continue
+            old, new = base[metric], stats[metric]
+            entry = {"size": size, "operation": name, "baseline": old, "current": new,
+                     "ratio": round(new / old, 3) if old else None}
+            if new - old > min_delta_ms and new > old * (1 + threshold):
+                regressions.append(entry)
+            elif old - new > min_delta_ms and new < old * (1 - threshold):
+                improvements.append(entry)
+    return {"metric": metric, "threshold": threshold, "regressions": regressions,
+            "improvements": improvements, "missing": missing}
+
+
+def load_report(path: str) -> Optional[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_report(report: Dict[str, Any], path: Optional[str]) -> None:
+    """Пишет отчет в файл или, если путь не задан, в stdout."""
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+def print_comparison(comparison: Dict[str, Any]) -> None:
+    for kind, label in (("regressions", "Регрессия"), ("improvements", "Улучшение")):
+        for entry in comparison[kind]:
+            print(f"{label}: {entry['size']}/{entry['operation']} {comparison['metric']} "
+                  f"{entry['baseline']} -> {entry['current']} (x{entry['ratio']})", file=sys.stderr)
@@ -0,0 +1,161 @@
+"""
+Сервер синхронизации для проверки и бенчмарков utils/sync.py.
+
+Работает в том же процессе, в фоновом потоке, и хранит заметки в памяти:
+
+    with StandInServer() as server:
+        engine = SyncEngine(data_manager, server.url)
+        engine.sync()
+
+Протокол:
+
+    POST /push     {"changes": [{"uid", "base_rev", "note" | "deleted": true}]}
+                   -> {"accepted": {uid: rev}, "stale": [запись]}
+    GET  /changes?since=N&limit=M
+                   -> {"changes": [запись], "cursor": K, "more": bool}
+
+Запись — {"uid", "rev", "note"} или {"uid", "rev", "deleted": true}. Тела
+запросов и ответов — JSON, сжатый gzip (Content-Encoding). Журнал ревизий
+упорядочен по номеру, поэтому изменения после курсора находятся бинарным
+поиском, а не просмотром всех заметок.
+"""
+
+import bisect
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+class SyncStore:
+    """Последние версии заметок по uid и журнал ревизий."""
+
+    def __init__(self):
+        self.records: Dict[str, Tuple[int, Optional[Dict[str, Any]]]] = {}
+        self.revs: List[int] = []
+        self.uids: List[str] = []
+        self.rev = 0
+        self._lock = threading.Lock()
+
+    def entry(self, uid: str) -> Dict[str, Any]:
+        rev, note = self.records[uid]
+        if note is None:
+            return {"uid": uid, "rev": rev, "deleted": True}
+        return {"uid": uid, "rev": rev, "note": note}
+
+    def push(self, changes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        accepted: Dict[str, int] = {}
+        stale: List[Dict[str, Any]] = []
+        with self._lock:
+            for change in changes:
+                uid = change["uid"]
+                current = self.records.get(uid)
+                if current is None and change.get("deleted"):
+                    accepted[uid] = 0  # удалять нечего
+                    continue
+                if current is not None and change.get("base_rev", 0) != current[0]:
+                    stale.append(self.entry(uid))
+                    continue
+                self.rev += 1
+                self.records[uid] = (self.rev, None if change.get("deleted") else change["note"])
+                self.revs.append(self.rev)
+                self.uids.append(uid)
+                accepted[uid] = self.rev
+        return {"accepted": accepted, "stale": stale}
+
+    def changes(self, since: int, limit: int) -> Dict[str, Any]:
+        with self._lock:
+            start = bisect.bisect_right(self.revs, since)
+            result = []
+            cursor = since
+            index = start
+            while index < len(self.revs) and len(result) < limit:
+                rev, uid = self.revs[index], self.uids[index]
+                cursor = rev
+                index += 1
+                # Запись журнала, перекрытая более новой ревизией той же заметки, пропускается
+                if self.records[uid][0] == rev:
+                    result.append(self.entry(uid))
+            return {"changes": result, "cursor": cursor, "more": index < len(self.revs)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: клиент переиспользует соединения
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.stand_in.stats["connections"] += 1
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path != "/changes":
+            self._reply(404, {"error": "not found"})
+            return
+        query = parse_qs(parts.query)
+        since = int(query.get("since", ["0"])[0])
+        limit = int(query.get("limit", ["200"])[0])
+        self._reply(200, self.server.stand_in.store.changes(since, limit))
+
+    def do_POST(self):
+        if self.path != "/push":
+            self._reply(404, {"error": "not found"})
+            return
+        data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            data = gzip.decompress(data)
+        try:
+            payload = json.loads(data.decode("utf-8"))
+        except ValueError:
+            self._reply(400, {"error": "bad json"})
+            return
+        self._reply(200, self.server.stand_in.store.push(payload.get("changes", [])))
+
+    def _reply(self, status: int, payload: Any):
+        self.server.stand_in.stats["requests"] += 1
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=6)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer:
+    """HTTP-сервер синхронизации на 127.0.0.1 (порт выбирается свободный)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.store = SyncStore()
+        self.stats = {"requests": 0, "connections": 0}
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.stand_in = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="SyncStandIn", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -15,11 +15,14 @@ source.dir = .
 # (list) Source files to include (let empty to include all the files)
 source.include_exts = py,png,jpg,kv,atlas,json
 
+# (list) List of directory to exclude (let empty to not exclude anything)
+source.exclude_dirs = benchmarks, tests
+
 # (str) Application versioning (method 1)
 version = 0.1
 
 # (list) Application requirements
-requirements = python3,kivy,plyer,pyjnius
+requirements = python3,kivy,plyer,pyjnius,cryptography
 
 # (str) Supported orientation (landscape, portrait or all)
 orientation = portrait
@@ -3,21 +3,44 @@
 
 import sys
 import os
-from kivy.logger import Logger
 
 # Добавляем текущую директорию в путь для импорта модулей
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# --profile-startup[=файл]: отчет о фазах старта и времени импортов.
+# Разбираем до импорта kivy — kivy не знает этот ключ и сам разбирает sys.argv
+for _arg in list(sys.argv[1:]):
+    if _arg == '--profile-startup' or _arg.startswith('--profile-startup='):
+        sys.argv.remove(_arg)
+        from utils import startup_profiler
+        startup_profiler.start(_arg.partition('=')[2] or 'startup_profile.json')
+
+# --leak-check[=N]: N циклов main -> edit -> main, код выхода 1 при утечке
+leak_check_cycles = 0
+for _arg in list(sys.argv[1:]):
+    if _arg == '--leak-check' or _arg.startswith('--leak-check='):
+        sys.argv.remove(_arg)
+        leak_check_cycles = int(_arg.partition('=')[2] or 10)
+
+from utils.startup_profiler import phase
+
+with phase('import_kivy'):
+    from kivy.logger import Logger
+
 # Доп. совместимость не требуется
 
 try:
-    from app import NotesApp
+    with phase('import_app'):
+        from app import NotesApp
     
     if __name__ == '__main__':
         Logger.info("NotesApp: Starting application...")
         try:
             app = NotesApp()
+            app.leak_check_cycles = leak_check_cycles
             app.run()
+            if leak_check_cycles and (app.leak_detector is None or app.leak_detector.has_leaks()):
+                sys.exit(1)
         except Exception as e:
             Logger.error(f"NotesApp: Runtime error - {e}")
             print(f"Ошибка выполнения: {e}")
@@ -89,6 +89,66 @@ class AboutScreen(Screen):
             font_size='18sp',
             background_color=(0.3, 0.6, 1, 1)
         )
+        # Панель производительности (FPS, время операций, память)
+        perf_btn = Button(
+            text='Панель производительности',
+            size_hint_y=None,
+            height=dp(44),
+            font_size='14sp'
+        )
+        perf_btn.bind(on_press=self.toggle_perf_overlay)
+        main_layout.add_widget(perf_btn)
+        
+        # Шифрование notes.json паролем
+        self.encryption_btn = Button(
+            text='Шифрование заметок',
+            size_hint_y=None,
+            height=dp(44),
+            font_size='14sp'
+        )
+        self.encryption_btn.bind(on_press=self.show_encryption)
+        main_layout.add_widget(self.encryption_btn)
+        
+        # Резервные копии (инкрементальные zip-архивы)
+        backup_btn = Button(
+            text='Резервные копии',
+            size_hint_y=None,
+            height=dp(44),
+            font_size='14sp'
+        )
+        backup_btn.bind(on_press=self.show_backups)
+        main_layout.add_widget(backup_btn)
+        
+        # Синхронизация с сервером
+        sync_btn = Button(
+            text='Синхронизация',
+            size_hint_y=None,
+            height=dp(44),
+            font_size='14sp'
+        )
+        sync_btn.bind(on_press=self.show_sync)
+        main_layout.add_widget(sync_btn)
+        
+        # Импорт каталога .txt/.md файлов
+        import_btn = Button(
+            text='Импорт заметок из папки',
+            size_hint_y=None,
+            height=dp(44),
+            font_size='14sp'
+        )
+        import_btn.bind(on_press=self.show_import)
+        main_layout.add_widget(import_btn)
+        
+        # Почти одинаковые заметки: группы и объединение
+        duplicates_btn = Button(
+            text='Поиск дубликатов',
+            size_hint_y=None,
+            height=dp(44),
+            font_size='14sp'
+        )
+        duplicates_btn.bind(on_press=self.show_duplicates)
+        main_layout.add_widget(duplicates_btn)
+        
         back_btn.bind(on_press=self.go_back)
         main_layout.add_widget(back_btn)
         
@@ -113,6 +173,362 @@ class AboutScreen(Screen):
         except Exception:
             pass
     
+    def toggle_perf_overlay(self, instance):
+        """Показывает/скрывает панель производительности"""
+        if hasattr(self, 'app') and self.app:
+            self.app.toggle_perf_overlay()
+    
+    def show_encryption(self, instance):
+        """Включение шифрования (пароль дважды) или отключение (пароль для проверки)"""
+        if not hasattr(self, 'app') or not self.app or not self.app.data_manager:
+            return
+        from kivy.uix.popup import Popup
+        from kivy.uix.textinput import TextInput
+        from utils import note_crypto
+        data_manager = self.app.data_manager
+        encrypted = data_manager.is_encrypted
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        message = Label(size_hint_y=None, height=dp(48), halign='center', valign='middle')
+        message.bind(size=message.setter('text_size'))
+        content.add_widget(message)
+        popup = Popup(title='Шифрование заметок', content=content, size_hint=(0.9, 0.5))
+        if not encrypted and not note_crypto.available():
+            message.text = 'Для шифрования нужен пакет cryptography'
+            close_btn = Button(text='Закрыть', size_hint_y=None, height=dp(48))
+            close_btn.bind(on_release=popup.dismiss)
+            content.add_widget(close_btn)
+            popup.open()
+            return
+        password_input = TextInput(hint_text='Пароль', password=True, multiline=False,
+                                   size_hint_y=None, height=dp(44))
+        content.add_widget(password_input)
+        repeat_input = TextInput(hint_text='Повторите пароль', password=True, multiline=False,
+                                 size_hint_y=None, height=dp(44))
+        if encrypted:
+            message.text = 'Заметки зашифрованы. Введите пароль, чтобы отключить шифрование'
+        else:
+            message.text = 'Текст заметок будет храниться зашифрованным. Пароль не восстановить'
+            content.add_widget(repeat_input)
+        action_btn = Button(text='Отключить' if encrypted else 'Включить', size_hint_y=None, height=dp(48))
+        content.add_widget(action_btn)
+        def apply(*_):
+            password = password_input.text
+            try:
+                if encrypted:
+                    if not data_manager.disable_encryption(password):
+                        message.text = 'Неверный пароль'
+                        return
+                else:
+                    if not password or password != repeat_input.text:
+                        message.text = 'Пароли не совпадают'
+                        return
+                    data_manager.enable_encryption(password)
+            except Exception as e:
+                from utils.error_collector import report_error
+                report_error("Ошибка шифрования", e)
+                return
+            popup.dismiss()
+        action_btn.bind(on_release=apply)
+        popup.open()
+
+    def show_backups(self, instance):
+        """Список резервных копий: создание новой и восстановление выбранной"""
+        if not hasattr(self, 'app') or not self.app or not self.app.data_manager:
+            return
+        from datetime import datetime
+        from kivy.uix.gridlayout import GridLayout
+        from kivy.uix.popup import Popup
+        data_manager = self.app.data_manager
+        backups = data_manager.backups
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        status = Label(text='', size_hint_y=None, height=dp(32))
+        content.add_widget(status)
+        create_btn = Button(text='Создать копию', size_hint_y=None, height=dp(48))
+        content.add_widget(create_btn)
+        scroll = ScrollView()
+        grid = GridLayout(cols=1, size_hint_y=None, spacing=dp(4))
+        grid.bind(minimum_height=grid.setter('height'))
+        scroll.add_widget(grid)
+        content.add_widget(scroll)
+        popup = Popup(title='Резервные копии', content=content, size_hint=(0.95, 0.8))
+
+        def fill():
+            grid.clear_widgets()
+            for summary in backups.list_backups():
+                created = datetime.fromisoformat(summary['created_at']).strftime('%d.%m.%Y %H:%M')
+                kind = 'полная' if summary['kind'] == 'full' else f"изменено {summary['written']}"
+                btn = Button(text=f"{created}  заметок: {summary['notes']}  ({kind})",
+                             size_hint_y=None, height=dp(44), font_size='13sp')
+                btn.bind(on_release=lambda *_, name=summary['name'], title=created: confirm_restore(name, title))
+                grid.add_widget(btn)
+            if not grid.children:
+                grid.add_widget(Label(text='Копий пока нет', size_hint_y=None, height=dp(40)))
+
+        def set_busy(text):
+            status.text = text
+            create_btn.disabled = bool(text)
+            for child in grid.children:
+                child.disabled = bool(text)
+
+        def on_created(summary, error):
+            set_busy('')
+            if error is not None:
+                from utils.error_collector import report_error
+                report_error("Ошибка резервной копии", error)
+                return
+            status.text = f"Сохранено заметок: {summary['written']} из {summary['notes']}"
+            fill()
+
+        def create(*_):
+            try:
+                records, encryption = data_manager.backup_snapshot()
+            except Exception as e:
+                from utils.error_collector import report_error
+                report_error("Ошибка резервной копии", e)
+                return
+            set_busy('Создается копия...')
+            backups.create_async(records, encryption, on_done=on_created)
+
+        def on_restored(result, error):
+            set_busy('')
+            if error is not None:
+                from utils.error_collector import report_error
+                report_error("Ошибка восстановления", error)
+                return
+            records, encryption = result
+            try:
+                data_manager.restore_snapshot(records, encryption)
+            except Exception as e:
+                from utils.error_collector import report_error
+                report_error("Ошибка восстановления", e)
+                return
+            popup.dismiss()
+            if data_manager.is_locked:
+                # Копия зашифрована другим паролем
+                self.app._offer_unlock()
+            self.app.main_screen.refresh_notes()
+
+        def confirm_restore(name, title):
+            confirm = BoxLayout(orientation='vertical', spacing=10, padding=10)
+            confirm.add_widget(Label(text=f'Заменить все заметки копией от {title}?', halign='center'))
+            row = BoxLayout(orientation='horizontal', spacing=10, size_hint_y=None, height=dp(48))
+            no_btn = Button(text='Нет')
+            yes_btn = Button(text='Восстановить')
+            row.add_widget(no_btn)
+            row.add_widget(yes_btn)
+            confirm.add_widget(row)
+            dialog = Popup(title='Восстановление', content=confirm, size_hint=(0.85, 0.35))
+            def restore(*_):
+                dialog.dismiss()
+                set_busy('Восстановление...')
+                backups.restore_async(name, on_restored)
+            no_btn.bind(on_release=dialog.dismiss)
+            yes_btn.bind(on_release=restore)
+            dialog.open()
+
+        create_btn.bind(on_release=create)
+        fill()
+        popup.open()
+
+    def show_sync(self, instance):
+        """Адрес сервера синхронизации и запуск синхронизации"""
+        if not hasattr(self, 'app') or not self.app or not self.app.data_manager:
+            return
+        from kivy.uix.popup import Popup
+        from kivy.uix.textinput import TextInput
+        data_manager = self.app.data_manager
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        url_input = TextInput(text=data_manager.settings.get('sync_url', ''), hint_text='http://сервер:порт',
+                              multiline=False, size_hint_y=None, height=dp(44))
+        content.add_widget(url_input)
+        status = Label(text='', size_hint_y=None, height=dp(48), halign='center', valign='middle')
+        status.bind(size=status.setter('text_size'))
+        content.add_widget(status)
+        sync_btn = Button(text='Синхронизировать', size_hint_y=None, height=dp(48))
+        content.add_widget(sync_btn)
+        popup = Popup(title='Синхронизация', content=content, size_hint=(0.9, 0.45))
+
+        def on_synced(result, error):
+            sync_btn.disabled = False
+            if error is not None:
+                status.text = 'Ошибка синхронизации'
+                from utils.error_collector import report_error
+                report_error("Ошибка синхронизации", error)
+                return
+            status.text = (f"Отправлено: {result['pushed']}, получено: {result['pulled']}, "
+                           f"удалено: {result['deleted']}, конфликтов: {result['conflicts']}")
+            if self.app.sm.is_built('main'):
+                self.app.main_screen.refresh_notes()
+
+        def start(*_):
+            url = url_input.text.strip()
+            if url != data_manager.settings.get('sync_url', ''):
+                data_manager.settings['sync_url'] = url
+                data_manager.save_settings()
+            if not url:
+                self.app.setup_sync('')
+                status.text = 'Синхронизация отключена'
+                return
+            if data_manager.is_encrypted:
+                status.text = 'Зашифрованные заметки не синхронизируются'
+                return
+            engine = self.app.setup_sync(url)
+            if engine is None:
+                status.text = 'Неверный адрес сервера'
+                return
+            sync_btn.disabled = True
+            status.text = 'Синхронизация...'
+            engine.sync_async(on_done=on_synced)
+
+        sync_btn.bind(on_release=start)
+        popup.open()
+
+    def show_import(self, instance):
+        """Импорт дерева .txt/.md файлов: путь к папке, прогресс, отмена"""
+        if not hasattr(self, 'app') or not self.app or not self.app.data_manager:
+            return
+        import os
+        from kivy.uix.popup import Popup
+        from kivy.uix.progressbar import ProgressBar
+        from kivy.uix.textinput import TextInput
+        from utils.bulk_import import BulkImporter
+        data_manager = self.app.data_manager
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        path_input = TextInput(text=data_manager.settings.get('import_dir', os.path.expanduser('~')),
+                               hint_text='Папка с .txt и .md файлами', multiline=False,
+                               size_hint_y=None, height=dp(44))
+        content.add_widget(path_input)
+        progress_bar = ProgressBar(max=1, value=0, size_hint_y=None, height=dp(24))
+        content.add_widget(progress_bar)
+        status = Label(text='', size_hint_y=None, height=dp(40), halign='center', valign='middle')
+        status.bind(size=status.setter('text_size'))
+        content.add_widget(status)
+        row = BoxLayout(orientation='horizontal', spacing=10, size_hint_y=None, height=dp(48))
+        cancel_btn = Button(text='Закрыть')
+        start_btn = Button(text='Импортировать')
+        row.add_widget(cancel_btn)
+        row.add_widget(start_btn)
+        content.add_widget(row)
+        popup = Popup(title='Импорт заметок', content=content, size_hint=(0.9, 0.5), auto_dismiss=False)
+        state = {'importer': None}
+
+        def on_progress(progress):
+            progress_bar.max = max(1, progress['total'])
+            progress_bar.value = progress['done']
+            status.text = f"Прочитано {progress['done']} из {progress['total']}"
+
+        def on_done(records, error):
+            importer = state['importer']
+            state['importer'] = None
+            start_btn.disabled = False
+            cancel_btn.text = 'Закрыть'
+            if error is not None:
+                from utils.error_collector import report_error
+                report_error("Ошибка импорта", error)
+                status.text = 'Ошибка импорта'
+                return
+            if importer.cancelled:
+                status.text = 'Импорт отменен'
+                return
+            try:
+                # Одна запись notes.json на весь импорт
+                notes = data_manager.import_notes(records)
+            except Exception as e:
+                from utils.error_collector import report_error
+                report_error("Ошибка импорта", e)
+                return
+            skipped = importer.progress['skipped']
+            status.text = f"Импортировано заметок: {len(notes)}" + (f", пропущено: {skipped}" if skipped else "")
+            if self.app.sm.is_built('main'):
+                self.app.main_screen.refresh_notes()
+
+        def start(*_):
+            path = os.path.expanduser(path_input.text.strip())
+            if not os.path.isdir(path):
+                status.text = 'Папка не найдена'
+                return
+            if data_manager.is_locked:
+                status.text = 'Сначала откройте зашифрованные заметки'
+                return
+            data_manager.settings['import_dir'] = path
+            data_manager.save_settings()
+            start_btn.disabled = True
+            cancel_btn.text = 'Отменить'
+            status.text = 'Поиск файлов...'
+            progress_bar.value = 0
+            importer = BulkImporter(path)
+            state['importer'] = importer
+            importer.run_async(on_done, on_progress)
+
+        def cancel(*_):
+            if state['importer'] is not None:
+                state['importer'].cancel()
+            else:
+                popup.dismiss()
+
+        start_btn.bind(on_release=start)
+        cancel_btn.bind(on_release=cancel)
+        popup.open()
+
+    def show_duplicates(self, instance):
+        """Группы почти одинаковых заметок; объединение оставляет последнюю измененную"""
+        if not hasattr(self, 'app') or not self.app or not self.app.data_manager:
+            return
+        from kivy.uix.gridlayout import GridLayout
+        from kivy.uix.popup import Popup
+        from kivy.uix.scrollview import ScrollView
+        data_manager = self.app.data_manager
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        status = Label(text='', size_hint_y=None, height=dp(40), halign='center', valign='middle')
+        status.bind(size=status.setter('text_size'))
+        content.add_widget(status)
+        grid = GridLayout(cols=1, spacing=dp(6), size_hint_y=None)
+        grid.bind(minimum_height=grid.setter('height'))
+        scroll = ScrollView()
+        scroll.add_widget(grid)
+        content.add_widget(scroll)
+        close_btn = Button(text='Закрыть', size_hint_y=None, height=dp(48))
+        content.add_widget(close_btn)
+        popup = Popup(title='Дубликаты заметок', content=content, size_hint=(0.9, 0.8))
+        close_btn.bind(on_release=popup.dismiss)
+        # Больше групп за раз не показываем: после объединения список строится заново
+        max_groups = 50
+
+        def merge(group):
+            try:
+                data_manager.merge_notes([note['id'] for note in group])
+            except Exception as e:
+                from utils.error_collector import report_error
+                report_error("Ошибка объединения заметок", e)
+                return
+            if self.app.sm.is_built('main'):
+                self.app.main_screen.refresh_notes()
+            fill()
+
+        def fill():
+            grid.clear_widgets()
+            if data_manager.is_locked:
+                status.text = 'Сначала откройте зашифрованные заметки'
+                return
+            clusters = data_manager.duplicate_clusters()
+            status.text = f"Групп похожих заметок: {len(clusters)}" if clusters else 'Похожих заметок не найдено'
+            for group in clusters[:max_groups]:
+                lines = [f"«{note.get('title', '')}» — {note.get('updated_at', '')[:16].replace('T', ' ')}"
+                         for note in group[:5]]
+                if len(group) > 5:
+                    lines.append(f"и еще {len(group) - 5}")
+                label = Label(text='\n'.join(lines), size_hint_y=None, height=dp(22) * len(lines) + dp(8),
+                              halign='left', valign='middle', font_size='13sp')
+                label.bind(size=label.setter('text_size'))
+                grid.add_widget(label)
+                merge_btn = Button(text=f"Объединить ({len(group)}) в «{group[0].get('title', '')}»",
+                                   size_hint_y=None, height=dp(40), font_size='13sp')
+                merge_btn.bind(on_release=lambda btn, group=group: merge(group))
+                grid.add_widget(merge_btn)
+
+        fill()
+        popup.open()
+
     def go_back(self, instance):
         """Возвращается к главному экрану"""
         self.manager.current = 'main'
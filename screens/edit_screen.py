@@ -1,9 +1,79 @@
+import os
+from datetime import datetime, timedelta
+
 from kivy.uix.screenmanager import Screen
 from kivy.uix.widget import Widget
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.textinput import TextInput
 from kivy.uix.button import Button
 from kivy.metrics import dp
+from kivy.clock import Clock, mainthread
+
+from utils.tag_index import parse_tags
+from utils.undo_history import EditOperation, UndoHistory
+
+
+class UndoableTextInput(TextInput):
+    """TextInput с отменой/повтором на основе истории правок.
+
+    Правки перехватываются в точках, где Kivy записывает собственную историю,
+    поэтому в историю попадает только сама правка (позиция и текст), а не снимок.
+    Текст хранит только сам TextInput — отдельной копии документа нет.
+    """
+
+    def __init__(self, **kwargs):
+        self.history = UndoHistory()
+        super().__init__(**kwargs)
+        self.reset_history()
+
+    def reset_history(self):
+        """Текущий текст становится исходным: история очищается."""
+        self.history.clear()
+        self.history.mark_clean()
+
+    def sync_from_text(self, old):
+        """Записывает в историю программную замену текста old на текущий (вне клавиатурного ввода)."""
+        op = EditOperation.from_texts(old, self.text)
+        if op is not None:
+            self.history.record(op)
+
+    def do_undo(self):
+        op = self.history.undo()
+        if op is not None:
+            self._replace_in_widget(op.pos, op.inserted, op.removed)
+
+    def do_redo(self):
+        op = self.history.redo()
+        if op is not None:
+            self._replace_in_widget(op.pos, op.removed, op.inserted)
+
+    # Перехват внутренних точек записи истории Kivy
+    def _set_unredo_insert(self, ci, sci, substring, from_undo):
+        if not from_undo:
+            self.history.record(EditOperation(ci, '', substring))
+
+    def _set_unredo_bkspc(self, ol_index, new_index, substring, from_undo, mode):
+        if not from_undo and substring:
+            self.history.record(EditOperation(new_index, substring, ''))
+
+    def _set_unredo_delsel(self, a, b, substring, from_undo):
+        if not from_undo:
+            self.history.record(EditOperation(a, substring, ''))
+
+    def _shift_lines(self, direction, rows=None, old_cursor=None, from_undo=False):
+        # Перенос строк не сообщает правку по частям — сравниваем текст до и после
+        old = self.text
+        super()._shift_lines(direction, rows, old_cursor, from_undo)
+        if not from_undo:
+            self.sync_from_text(old)
+
+    def _replace_in_widget(self, pos, old, new):
+        if old:
+            self.select_text(pos, pos + len(old))
+            self.delete_selection(from_undo=True)
+        self.cursor = self.get_cursor_from_index(pos)
+        if new:
+            self.insert_text(new, from_undo=True)
 
 
 class EditScreen(Screen):
@@ -15,17 +85,50 @@ class EditScreen(Screen):
         layout = BoxLayout(orientation='vertical', padding=12, spacing=8)
         self.title_input = TextInput(hint_text='Заголовок', size_hint_y=None, height=dp(44), multiline=False)
         self.title_input.bind(focus=self._on_title_focus)
-        self.text_input = TextInput(hint_text='Текст заметки', multiline=True)
+        self.text_input = UndoableTextInput(hint_text='Текст заметки', multiline=True)
+        # Теги и папка заметки
+        tags_row = BoxLayout(size_hint_y=None, height=dp(44), spacing=8)
+        self.tags_input = TextInput(hint_text='Теги через запятую', multiline=False)
+        self.folder_input = TextInput(hint_text='Папка', multiline=False, size_hint_x=0.4)
+        tags_row.add_widget(self.tags_input)
+        tags_row.add_widget(self.folder_input)
+        # Напоминание применяется при нажатии ОК: (время или None, повтор в секундах)
+        self._reminder = None
+        self._reminder_changed = False
+        self.reminder_btn = Button(text='Напомнить', size_hint_x=None, width=dp(110))
+        self.reminder_btn.bind(on_release=self.on_reminder)
+        tags_row.add_widget(self.reminder_btn)
+        # Автосохранение черновика при вводе
+        self._loading = False
+        self._recovered_draft = None
+        # Обработка откладывается до следующего кадра: Kivy сообщает об изменении
+        # текста раньше, чем правка попадает в историю, а серия нажатий схлопывается
+        self._trigger_text_changed = Clock.create_trigger(self._on_text_changed)
+        self.title_input.bind(text=self._schedule_text_changed)
+        self.text_input.bind(text=self._schedule_text_changed)
+        self.tags_input.bind(text=self._schedule_text_changed)
+        self.folder_input.bind(text=self._schedule_text_changed)
         row = BoxLayout(size_hint_y=None, height=dp(56), spacing=12, padding=[0,4])
+        self.undo_btn = Button(text='<< Шаг', size_hint_x=None, width=dp(80), disabled=True)
+        self.redo_btn = Button(text='Шаг >>', size_hint_x=None, width=dp(80), disabled=True)
+        self.undo_btn.bind(on_release=self.on_undo)
+        self.redo_btn.bind(on_release=self.on_redo)
+        row.add_widget(self.undo_btn)
+        row.add_widget(self.redo_btn)
         row.add_widget(Widget(size_hint_x=1))
+        # Изображения копируются в хранилище вложений только при нажатии ОК
+        self._new_attachments = []
+        self.attach_btn = Button(text='Фото', size_hint_x=None, width=dp(100))
+        self.attach_btn.bind(on_release=self.on_attach)
+        row.add_widget(self.attach_btn)
         ok_btn = Button(text='ОК', size_hint_x=None, width=dp(120))
         cancel_btn = Button(text='Отмена', size_hint_x=None, width=dp(120))
         ok_btn.bind(on_release=self.on_ok)
         cancel_btn.bind(on_release=self.on_cancel)
         row.add_widget(ok_btn)
         row.add_widget(cancel_btn)
-        row.add_widget(Widget(size_hint_x=1))
         layout.add_widget(self.title_input)
+        layout.add_widget(tags_row)
         layout.add_widget(self.text_input)
         layout.add_widget(row)
         self.add_widget(layout)
@@ -40,15 +143,47 @@ class EditScreen(Screen):
         except Exception:
             pass
         note = getattr(self, 'note', None)
+        self._loading = True
         if note:
             self.title_input.text = note.get('title', '')
             self.text_input.text = note.get('content', '')
+            self.tags_input.text = ', '.join(note.get('tags', []))
+            self.folder_input.text = note.get('folder', '')
         else:
             self.title_input.text = ''
             self.text_input.text = ''
+            self.tags_input.text = ''
+            self.folder_input.text = ''
+        self._new_attachments = []
+        self._update_attach_button()
+        self._reminder = None
+        self._reminder_changed = False
+        if note and note.get('id') is not None and hasattr(self, 'app') and self.app and self.app.data_manager:
+            reminder = self.app.data_manager.get_reminder(note['id'])
+            if reminder:
+                self._reminder = (reminder['due'], reminder['repeat'])
+        self._update_reminder_button()
         # Снимем флаг изменений
         self._initial_title = self.title_input.text
         self._initial_text = self.text_input.text
+        self._initial_tags = self.tags_input.text
+        self._initial_folder = self.folder_input.text
+        self._configure_history()
+        self.text_input.reset_history()
+        # Восстановленный после сбоя черновик подставляем поверх исходного текста
+        draft = self._recovered_draft
+        self._recovered_draft = None
+        if draft:
+            self.title_input.text = draft.get('title', '')
+            old = self.text_input.text
+            self.text_input.text = draft.get('content', '')
+            self.text_input.sync_from_text(old)
+            # В черновиках старых версий тегов, папки и напоминания нет
+            self.tags_input.text = draft.get('tags', self.tags_input.text)
+            self.folder_input.text = draft.get('folder', self.folder_input.text)
+            self._restore_draft_reminder(draft.get('reminder'))
+        self._loading = False
+        self._update_undo_buttons()
 
     def on_leave(self, *args):
         try:
@@ -61,11 +196,33 @@ class EditScreen(Screen):
 
     def on_ok(self, *_):
         if hasattr(self, 'app') and self.app:
+            # Перед созданием новой заметки проверяем, нет ли уже почти такой же
+            if not (getattr(self, 'note', None) and self.note.get('id') is not None):
+                matches = self.app.data_manager.find_duplicates(self.title_input.text, self.text_input.text,
+                                                                limit=1)
+                if matches:
+                    self._confirm_duplicate(*matches[0])
+                    return
+            self._save_note()
+
+    def _save_note(self):
+        if hasattr(self, 'app') and self.app:
+            self._clear_draft()
             # Если редактируем существующую
+            tags = parse_tags(self.tags_input.text)
+            folder = self.folder_input.text.strip()
             if getattr(self, 'note', None) and self.note.get('id') is not None:
-                self.app.data_manager.update_note(self.note['id'], self.title_input.text, self.text_input.text)
+                note_id = self.note['id']
+                self.app.data_manager.update_note(note_id, self.title_input.text, self.text_input.text,
+                                                  tags=tags, folder=folder)
             else:
-                self.app.data_manager.add_note(self.title_input.text, self.text_input.text)
+                note_id = self.app.data_manager.add_note(self.title_input.text, self.text_input.text,
+                                                         tags=tags, folder=folder)['id']
+            self._save_attachments(note_id)
+            if self._reminder_changed:
+                due, repeat = self._reminder or (None, None)
+                self.app.data_manager.set_reminder(note_id, due, repeat)
+                self._reminder_changed = False
             # Обновляем список и возвращаемся на главный экран
             self.app.main_screen.refresh_notes()
             self.app.sm.current = 'main'
@@ -75,12 +232,17 @@ class EditScreen(Screen):
             if self._has_changes():
                 self._confirm_discard()
             else:
+                self._clear_draft()
                 self.app.sm.current = 'main'
 
     # API для MainScreen
     def set_note(self, note):
         self.note = note
 
+    def set_recovered_draft(self, draft):
+        """Подставляет восстановленный черновик при следующем открытии редактора."""
+        self._recovered_draft = draft
+
     def _on_back(self, window, key, *args):
         if key == 27:  # Android back
             if self._has_changes():
@@ -90,9 +252,166 @@ class EditScreen(Screen):
             return True
         return False
 
+    def on_undo(self, *_):
+        self.text_input.do_undo()
+        self._update_undo_buttons()
+
+    def on_redo(self, *_):
+        self.text_input.do_redo()
+        self._update_undo_buttons()
+
+    def on_attach(self, *_):
+        """Выбор изображений для вложения: системный диалог на Android, FileChooser на десктопе."""
+        from kivy.utils import platform
+        if platform == 'android':
+            try:
+                from plyer import filechooser
+                filechooser.open_file(on_selection=self._on_files_selected, multiple=True,
+                                      filters=[["Изображения", "*.png", "*.jpg", "*.jpeg"]])
+                return
+            except Exception as e:
+                from utils.error_collector import report_error
+                report_error("Ошибка выбора файла", e)
+                return
+        from kivy.uix.boxlayout import BoxLayout
+        from kivy.uix.filechooser import FileChooserListView
+        from kivy.uix.popup import Popup
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        chooser = FileChooserListView(filters=['*.png', '*.jpg', '*.jpeg'], multiselect=True,
+                                      path=os.path.expanduser('~'))
+        content.add_widget(chooser)
+        row = BoxLayout(orientation='horizontal', spacing=10, size_hint_y=None, height=dp(48))
+        cancel_btn = Button(text='Отмена')
+        add_btn = Button(text='Добавить')
+        row.add_widget(cancel_btn)
+        row.add_widget(add_btn)
+        content.add_widget(row)
+        popup = Popup(title='Вложения', content=content, size_hint=(0.9, 0.9))
+        def add(*_):
+            popup.dismiss()
+            self._on_files_selected(chooser.selection)
+        cancel_btn.bind(on_release=popup.dismiss)
+        add_btn.bind(on_release=add)
+        popup.open()
+
+    def on_reminder(self, *_):
+        """Время напоминания и повтор; "Убрать" снимает напоминание."""
+        from kivy.uix.label import Label
+        from kivy.uix.popup import Popup
+        from kivy.uix.spinner import Spinner
+        repeats = {'Без повтора': None, 'Каждый день': 86400, 'Каждую неделю': 7 * 86400}
+        due, repeat = self._reminder or (datetime.now().replace(second=0, microsecond=0) + timedelta(hours=1), None)
+        content = BoxLayout(orientation='vertical', spacing=8, padding=8)
+        due_input = TextInput(text=due.strftime('%d.%m.%Y %H:%M'), hint_text='ДД.ММ.ГГГГ ЧЧ:ММ',
+                              multiline=False, size_hint_y=None, height=dp(44))
+        repeat_spinner = Spinner(text=next(name for name, value in repeats.items() if value == repeat),
+                                 values=list(repeats), size_hint_y=None, height=dp(44))
+        error_label = Label(text='', color=(1, 0.4, 0.4, 1), size_hint_y=None, height=dp(24))
+        content.add_widget(due_input)
+        content.add_widget(repeat_spinner)
+        content.add_widget(error_label)
+        row = BoxLayout(orientation='horizontal', spacing=8, size_hint_y=None, height=dp(44))
+        remove_btn = Button(text='Убрать')
+        set_btn = Button(text='Готово')
+        row.add_widget(remove_btn)
+        row.add_widget(set_btn)
+        content.add_widget(row)
+        popup = Popup(title='Напоминание', content=content, size_hint=(0.9, 0.5))
+        def remove(*_):
+            popup.dismiss()
+            self._set_reminder(None)
+        def apply(*_):
+            try:
+                new_due = datetime.strptime(due_input.text.strip(), '%d.%m.%Y %H:%M')
+            except ValueError:
+                error_label.text = 'Формат: ДД.ММ.ГГГГ ЧЧ:ММ'
+                return
+            popup.dismiss()
+            self._set_reminder((new_due, repeats[repeat_spinner.text]))
+        remove_btn.bind(on_release=remove)
+        set_btn.bind(on_release=apply)
+        popup.open()
+
+    def _set_reminder(self, reminder):
+        if reminder != self._reminder:
+            self._reminder = reminder
+            self._reminder_changed = True
+            self._schedule_text_changed()
+        self._update_reminder_button()
+
+    def _draft_reminder(self):
+        if not self._reminder_changed:
+            return None
+        due, repeat = self._reminder or (None, None)
+        return {"due": due.isoformat() if due else None, "repeat": repeat}
+
+    def _restore_draft_reminder(self, reminder):
+        if not isinstance(reminder, dict):
+            return
+        try:
+            due = datetime.fromisoformat(reminder['due']) if reminder.get('due') else None
+        except (TypeError, ValueError):
+            return
+        self._reminder = (due, reminder.get('repeat')) if due else None
+        self._reminder_changed = True
+        self._update_reminder_button()
+
+    def _update_reminder_button(self):
+        if self._reminder:
+            self.reminder_btn.text = self._reminder[0].strftime('%d.%m %H:%M')
+        else:
+            self.reminder_btn.text = 'Напомнить'
+
+    @mainthread
+    def _on_files_selected(self, selection):
+        # plyer на Android вызывает обработчик не из UI-потока
+        for path in selection or []:
+            if path and path not in self._new_attachments:
+                self._new_attachments.append(path)
+        self._update_attach_button()
+
+    def _update_attach_button(self):
+        note = getattr(self, 'note', None)
+        count = len(note.get('attachments', [])) if note else 0
+        count += len(self._new_attachments)
+        self.attach_btn.text = f'Фото ({count})' if count else 'Фото'
+
+    def _save_attachments(self, note_id):
+        for path in self._new_attachments:
+            try:
+                self.app.data_manager.add_attachment(note_id, path)
+            except Exception as e:
+                from utils.error_collector import report_error
+                report_error("Ошибка вложения", e)
+        self._new_attachments = []
+
     def _has_changes(self) -> bool:
-        return (self.title_input.text != getattr(self, '_initial_title', '') or
-                self.text_input.text != getattr(self, '_initial_text', ''))
+        if self._new_attachments or self._reminder_changed:
+            return True
+        if self.title_input.text != getattr(self, '_initial_title', ''):
+            return True
+        if parse_tags(self.tags_input.text) != parse_tags(getattr(self, '_initial_tags', '')):
+            return True
+        if self.folder_input.text.strip() != getattr(self, '_initial_folder', '').strip():
+            return True
+        # Отмена всех правок возвращает историю в исходное состояние — изменений нет
+        if self.text_input.history.is_clean():
+            return False
+        return self.text_input.text != getattr(self, '_initial_text', '')
+
+    def _configure_history(self):
+        # Лимиты истории отмены можно задать в settings.json
+        data_manager = getattr(getattr(self, 'app', None), 'data_manager', None)
+        if data_manager is None:
+            return
+        self.text_input.history.configure(
+            max_operations=data_manager.settings.get('undo_max_operations'),
+            max_chars=data_manager.settings.get('undo_max_chars'),
+        )
+
+    def _update_undo_buttons(self):
+        self.undo_btn.disabled = not self.text_input.history.can_undo
+        self.redo_btn.disabled = not self.text_input.history.can_redo
 
     def _confirm_discard(self):
         from kivy.uix.boxlayout import BoxLayout
@@ -113,13 +432,67 @@ class EditScreen(Screen):
         def close_yes(*_):
             popup.dismiss()
             if hasattr(self, 'app') and self.app:
+                self._clear_draft()
                 self.app.sm.current = 'main'
         no_btn.bind(on_release=close_no)
         yes_btn.bind(on_release=close_yes)
         popup.open()
 
+    def _confirm_duplicate(self, note, similarity):
+        from kivy.uix.label import Label
+        from kivy.uix.popup import Popup
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        message = Label(text=f'Похожая заметка уже есть ({similarity:.0%} совпадения):\n«{note.get("title", "")}»',
+                        font_size='16sp', halign='center', valign='middle')
+        message.bind(size=lambda label, size: setattr(label, 'text_size', size))
+        content.add_widget(message)
+        row = BoxLayout(orientation='horizontal', spacing=10, size_hint_y=None, height=dp(48))
+        back_btn = Button(text='Вернуться')
+        save_btn = Button(text='Сохранить')
+        row.add_widget(back_btn)
+        row.add_widget(save_btn)
+        content.add_widget(row)
+        popup = Popup(title='Возможный дубликат', content=content, size_hint=(0.85, 0.4))
+        def close_back(*_):
+            popup.dismiss()
+        def close_save(*_):
+            popup.dismiss()
+            self._save_note()
+        back_btn.bind(on_release=close_back)
+        save_btn.bind(on_release=close_save)
+        popup.open()
+
     def _on_title_focus(self, instance, focused):
         # Если редактируем заметку, у которой заголовок был "Без заголовка",
         # и пользователь начал ввод — очищаем поле для удобства
         if focused and instance.text.strip() == 'Без заголовка':
-            instance.text = ''
\ No newline at end of file
+            instance.text = ''
+
+    def _schedule_text_changed(self, *_):
+        if not self._loading:
+            self._trigger_text_changed()
+
+    def _on_text_changed(self, *_):
+        self._update_undo_buttons()
+        drafts = getattr(getattr(self, 'app', None), 'draft_manager', None)
+        if drafts is None:
+            return
+        # Черновик пишется открытым текстом — для зашифрованных заметок его не ведем
+        data_manager = getattr(self.app, 'data_manager', None)
+        if data_manager is not None and data_manager.is_encrypted:
+            return
+        if self._has_changes():
+            note = getattr(self, 'note', None)
+            note_id = note.get('id') if note else None
+            drafts.update(note_id, self.title_input.text, self.text_input.text,
+                          tags=self.tags_input.text, folder=self.folder_input.text,
+                          reminder=self._draft_reminder())
+        else:
+            drafts.clear()
+
+    def _clear_draft(self):
+        # Отложенная обработка ввода не должна пересоздать черновик после сохранения
+        self._trigger_text_changed.cancel()
+        drafts = getattr(getattr(self, 'app', None), 'draft_manager', None)
+        if drafts is not None:
+            drafts.clear()
@@ -0,0 +1,72 @@
+from kivy.uix.screenmanager import ScreenManager
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+from utils.tracing import span
+
+
+class LazyScreenManager(ScreenManager):
+    """Менеджер экранов, создающий экран при первом переходе на него.
+
+    Экран регистрируется фабрикой; дерево виджетов строится только когда
+    на экран переключаются (или кто-то запрашивает его через get_screen).
+    Экраны с prewarm=True достраиваются по одному за кадр после старта.
+    """
+
+    def __init__(self, **kwargs):
+        self._factories = {}
+        self._prewarm = []
+        self._prewarm_event = None
+        super().__init__(**kwargs)
+
+    def register(self, name, factory, prewarm=False):
+        """Регистрирует фабрику экрана с именем name."""
+        self._factories[name] = factory
+        if prewarm:
+            self._prewarm.append(name)
+
+    def is_built(self, name) -> bool:
+        """Проверяет, создан ли уже экран."""
+        return self.has_screen(name)
+
+    def ensure_screen(self, name):
+        """Создает экран при первом обращении и возвращает его."""
+        if self.has_screen(name):
+            return super().get_screen(name)
+        factory = self._factories.get(name)
+        if factory is None:
+            return None
+        with span(f'build_screen:{name}', 'screen'):
+            screen = factory()
+        screen.name = name
+        self.add_widget(screen)
+        Logger.info(f"LazyScreenManager: Screen '{name}' built")
+        return screen
+
+    def get_screen(self, name):
+        if name in self._factories:
+            return self.ensure_screen(name)
+        return super().get_screen(name)
+
+    def on_current(self, instance, value):
+        if value is not None:
+            self.ensure_screen(value)
+        super().on_current(instance, value)
+
+    def start_prewarm(self, delay=0):
+        """Достраивает экраны с prewarm=True в простое, по одному за кадр."""
+        if self._prewarm and self._prewarm_event is None:
+            self._prewarm_event = Clock.schedule_once(self._prewarm_next, delay)
+
+    def _prewarm_next(self, dt):
+        self._prewarm_event = None
+        while self._prewarm:
+            name = self._prewarm.pop(0)
+            if not self.has_screen(name):
+                try:
+                    self.ensure_screen(name)
+                except Exception as e:
+                    Logger.error(f"LazyScreenManager: Prewarm of '{name}' failed: {e}")
+                break
+        if self._prewarm:
+            self._prewarm_event = Clock.schedule_once(self._prewarm_next, 0)
@@ -4,14 +4,16 @@ from kivy.uix.gridlayout import GridLayout
 from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.scrollview import ScrollView
-from kivy.uix.popup import Popup
-from kivy.uix.textinput import TextInput
 from kivy.uix.checkbox import CheckBox
 from kivy.uix.widget import Widget
 from kivy.clock import Clock
 from kivy.metrics import dp
 from datetime import datetime
 
+from utils.perf_metrics import measure
+from utils.tag_index import TagFilter
+from utils.tracing import traced
+
 class MainScreen(Screen):
     """Главный экран со списком заметок и верхней панелью.
 
@@ -28,6 +30,12 @@ class MainScreen(Screen):
         self.original_brightness = None
         self.long_press_clock = None
         self.long_press_duration = 0.5  # Длительность длинного нажатия в секундах
+        self._flashlight_long_press = None
+        # Карточки с миниатюрой: card -> (путь, callback), callback задан, пока идет загрузка
+        self._thumbnail_cards = {}
+        self._trigger_thumbnails = Clock.create_trigger(self._load_visible_thumbnails, 0.05)
+        # Текущий фильтр списка по тегам и папке
+        self.tag_filter = TagFilter()
         self.setup_ui()
     
     
@@ -65,6 +73,16 @@ class MainScreen(Screen):
         self.add_btn.bind(on_press=self.add_note)
         self.top_panel.add_widget(self.add_btn)
         
+        # Кнопка фильтра по тегам и папкам
+        self.filter_btn = Button(
+            text='Фильтр',
+            size_hint_x=None,
+            width=dp(84),
+            font_size='12sp'
+        )
+        self.filter_btn.bind(on_press=self.show_tag_filter)
+        self.top_panel.add_widget(self.filter_btn)
+        
         # Невидимый виджет для центрирования
         left_spacer = Widget(size_hint_x=1)
         self.top_panel.add_widget(left_spacer)
@@ -86,7 +104,8 @@ class MainScreen(Screen):
             width=dp(84),
             font_size='12sp'
         )
-        self.flashlight_btn.bind(on_press=self.toggle_flashlight)
+        # Короткое нажатие переключает фонарик, длинное — открывает шаблоны мигания
+        self.flashlight_btn.bind(on_press=self._on_flashlight_press, on_release=self._on_flashlight_release)
         self.top_panel.add_widget(self.flashlight_btn)
         
         # Невидимый виджет для центрирования
@@ -156,20 +175,40 @@ class MainScreen(Screen):
             padding=[10, 5]
         )
         self.notes_layout.bind(minimum_height=self.notes_layout.setter('height'))
+        # Миниатюры загружаются только для карточек, попавших в видимую область
+        scroll.bind(scroll_y=self._trigger_thumbnails, height=self._trigger_thumbnails)
+        self.notes_layout.bind(height=self._trigger_thumbnails)
         
         scroll.add_widget(self.notes_layout)
         notes_container.add_widget(scroll)
         
         parent.add_widget(notes_container)
     
+    @traced(cat='ui')
     def refresh_notes(self):
         """Заполняет список заметок из хранилища."""
+        with measure('refresh_notes'):
+            self._refresh_notes()
+
+    def _refresh_notes(self):
+        self._cancel_thumbnails()
         self.notes_layout.clear_widgets()
         
         if hasattr(self, 'app') and self.app:
-            notes = self.app.data_manager.get_notes()
+            notes = self.app.data_manager.get_notes(self.tag_filter)
             
-            if not notes:
+            if not notes and not self.tag_filter.is_empty():
+                no_notes_label = Label(
+                    text='Нет заметок, подходящих под фильтр.',
+                    font_size='18sp',
+                    size_hint_y=None,
+                    height=dp(100),
+                    halign='center',
+                    valign='middle'
+                )
+                no_notes_label.bind(size=no_notes_label.setter('text_size'))
+                self.notes_layout.add_widget(no_notes_label)
+            elif not notes:
                 # Показываем сообщение, если заметок нет
                 no_notes_label = Label(
                     text='Заметок пока нет.\nНажмите "Добавить" для создания первой заметки.',
@@ -186,15 +225,60 @@ class MainScreen(Screen):
                 for note in notes:
                     note_widget = self.create_note_widget(note)
                     self.notes_layout.add_widget(note_widget)
+                # Раскладка еще не обновлена — видимые карточки определим на следующем кадре
+                self._trigger_thumbnails()
     
+    @traced(cat='ui')
+    def update_note_cards(self, note_ids):
+        """Перестраивает только карточки заметок note_ids (измененных, добавленных, удаленных)."""
+        if not hasattr(self, 'app') or not self.app:
+            return
+        cards = {child.note_id: child for child in self.notes_layout.children if hasattr(child, 'note_id')}
+        notes = self.app.data_manager.get_notes(self.tag_filter)
+        if self.is_selection_mode or not cards or not notes:
+            # Заглушку «нет заметок» и карточки с чекбоксами проще построить заново
+            self.refresh_notes()
+            return
+        changed = set(note_ids)
+        for note_id in changed & cards.keys():
+            self._drop_thumbnail(cards[note_id])
+        widgets = [cards[note['id']] if note['id'] in cards and note['id'] not in changed
+                   else self.create_note_widget(note) for note in notes]
+        current = list(reversed(self.notes_layout.children))
+        if [card.note_id for card in current] == [card.note_id for card in widgets]:
+            # Порядок не изменился — меняем карточки на своих местах
+            for position, (old, new) in enumerate(zip(current, widgets)):
+                if old is not new:
+                    self.notes_layout.remove_widget(old)
+                    self.notes_layout.add_widget(new, index=len(current) - 1 - position)
+        else:
+            shown = {note['id'] for note in notes}
+            for card in current:
+                if card.note_id not in shown:
+                    self._drop_thumbnail(card)
+            self.notes_layout.clear_widgets()
+            for card in widgets:
+                self.notes_layout.add_widget(card)
+        self._trigger_thumbnails()
+
+    def _drop_thumbnail(self, card):
+        path, callback = self._thumbnail_cards.pop(card, (None, None))
+        if callback is not None:
+            self.app.thumbnail_cache.cancel(path, callback)
+
+    @traced(cat='ui')
     def create_note_widget(self, note):
         """Создает карточку заметки."""
         # Определяем заголовок для отображения
         display_title = note['title']
+        # В зашифрованном хранилище тело не расшифровывается ради списка — есть превью из индекса
+        content = note.get('content')
+        if content is None:
+            content = note.get('preview', '')
         if not display_title or display_title == "Без заголовка":
             # Показываем первые 50 символов содержимого
-            content_preview = note['content'][:50]
-            if len(note['content']) > 50:
+            content_preview = content[:50]
+            if len(content) > 50:
                 content_preview += "..."
             display_title = content_preview or "Пустая заметка"
         
@@ -240,6 +324,19 @@ class MainScreen(Screen):
         note_container.checkbox = checkbox
         note_container.note_id = note['id']
         
+        # Миниатюра первого вложения: текстура подставляется, когда карточка видна
+        if note.get('attachments') and hasattr(self, 'app') and self.app:
+            from kivy.uix.image import Image
+            path = self.app.data_manager.get_attachment_paths(note)[0]
+            thumbnail = Image(size_hint_x=None, width=dp(80))
+            texture = self.app.thumbnail_cache.get(path)
+            if texture is not None:
+                thumbnail.texture = texture
+            else:
+                note_container.thumbnail = thumbnail
+                self._thumbnail_cards[note_container] = (path, None)
+            note_container.add_widget(thumbnail)
+        
         # Основной контент заметки
         content_layout = BoxLayout(
             orientation='vertical',
@@ -268,13 +365,18 @@ class MainScreen(Screen):
         title_label.bind(size=title_label.setter('text_size'))
         content_layout.add_widget(title_label)
         
-        # Превью содержимого (если есть)
-        if note['content']:
-            content_preview = note['content'][:100]
-            if len(note['content']) > 100:
-                content_preview += "..."
+        # Превью содержимого (если есть): Markdown из кэша разобранных блоков
+        if content:
+            from utils.markdown_blocks import escape_markup, preview_markup
+            if hasattr(self, 'app') and self.app and 'content' in note:
+                content_preview = preview_markup(self.app.markdown_cache.blocks(note), 100)
+            else:
+                content_preview = escape_markup(content[:100])
+                if len(content) > 100:
+                    content_preview += "..."
             content_label = Label(
                 text=content_preview,
+                markup=True,
                 font_size='14sp',
                 size_hint_y=None,
                 height=dp(30),
@@ -288,8 +390,20 @@ class MainScreen(Screen):
         
         # Дата создания
         created_date = datetime.fromisoformat(note['created_at']).strftime('%d.%m.%Y %H:%M')
+        # Папка и теги — в той же строке, что и дата
+        if note.get('folder'):
+            created_date += f"   {note['folder']}"
+        if note.get('tags'):
+            created_date += '   ' + ' '.join('#' + tag for tag in note['tags'])
+        if note.get('reminder'):
+            try:
+                due = datetime.fromisoformat(note['reminder']['due']).strftime('%d.%m %H:%M')
+                created_date += f"   напомнить {due}"
+            except (KeyError, TypeError, ValueError):
+                pass
         date_label = Label(
             text=created_date,
+            shorten=True,
             font_size='12sp',
             size_hint_y=None,
             height=dp(20),
@@ -308,6 +422,38 @@ class MainScreen(Screen):
         
         return note_container
     
+    def _load_visible_thumbnails(self, *args):
+        """Запрашивает миниатюры видимых карточек и отменяет ушедшие за край экрана."""
+        if not self._thumbnail_cards or not hasattr(self, 'app') or not self.app:
+            return
+        scroll = self.notes_layout.parent
+        # Запас в полэкрана: миниатюры соседних карточек готовы до прокрутки к ним
+        margin = scroll.height / 2
+        bottom = scroll.to_window(scroll.x, scroll.y)[1] - margin
+        top = scroll.to_window(scroll.x, scroll.top)[1] + margin
+        cache = self.app.thumbnail_cache
+        for card, (path, callback) in list(self._thumbnail_cards.items()):
+            card_bottom = card.to_window(card.x, card.y)[1]
+            visible = card_bottom < top and card_bottom + card.height > bottom
+            if visible and callback is None:
+                callback = lambda texture, card=card: self._set_thumbnail(card, texture)
+                self._thumbnail_cards[card] = (path, callback)
+                cache.request(path, callback)
+            elif not visible and callback is not None:
+                cache.cancel(path, callback)
+                self._thumbnail_cards[card] = (path, None)
+
+    def _set_thumbnail(self, card, texture):
+        if self._thumbnail_cards.pop(card, None) is not None:
+            card.thumbnail.texture = texture
+
+    def _cancel_thumbnails(self):
+        if hasattr(self, 'app') and self.app:
+            for path, callback in self._thumbnail_cards.values():
+                if callback is not None:
+                    self.app.thumbnail_cache.cancel(path, callback)
+        self._thumbnail_cards.clear()
+
     def _is_popup_open(self):
         """Проверяет, открыт ли какой-либо попап (ошибка/отладка)."""
         try:
@@ -327,11 +473,97 @@ class MainScreen(Screen):
         """Открывает редактор для существующей заметки."""
         note_id = instance.note_id
         if hasattr(self, 'app') and self.app:
-            note = self.app.data_manager.get_note(note_id)
+            note = self.app.data_manager.open_note(note_id)
             if note:
                 self.manager.current = 'edit'
                 self.app.edit_screen.set_note(note)
     
+    def show_tag_filter(self, instance=None):
+        """Фильтр списка: папка и режим каждого тега (И / ИЛИ / НЕ)."""
+        if not hasattr(self, 'app') or not self.app:
+            return
+        from kivy.uix.popup import Popup
+        from kivy.uix.spinner import Spinner
+
+        index = self.app.data_manager.tag_index
+        modes = ['—', 'И', 'ИЛИ', 'НЕ']
+        tag_modes = {}
+        for tag in self.tag_filter.all_of:
+            tag_modes[tag] = 'И'
+        for tag in self.tag_filter.any_of:
+            tag_modes[tag] = 'ИЛИ'
+        for tag in self.tag_filter.none_of:
+            tag_modes[tag] = 'НЕ'
+
+        content = BoxLayout(orientation='vertical', spacing=8, padding=8)
+        all_folders = 'Все папки'
+        folder_values = {all_folders: None}
+        for folder in index.folders():
+            folder_values[f"{folder} ({index.folder_counts[folder]})"] = folder
+        folder_text = all_folders
+        for text, folder in folder_values.items():
+            if folder is not None and folder == self.tag_filter.folder:
+                folder_text = text
+        folder_spinner = Spinner(text=folder_text, values=list(folder_values),
+                                 size_hint_y=None, height=dp(44))
+        content.add_widget(folder_spinner)
+
+        tags = index.tags()
+        scroll = ScrollView()
+        grid = GridLayout(cols=2, size_hint_y=None, spacing=dp(4))
+        grid.bind(minimum_height=grid.setter('height'))
+        for tag in tags:
+            label = Label(text=f"#{tag} ({index.tag_counts[tag]})", size_hint_y=None, height=dp(40),
+                          halign='left', valign='middle', shorten=True)
+            label.bind(size=label.setter('text_size'))
+            mode_btn = Button(text=tag_modes.get(tag, modes[0]), size_hint=(None, None),
+                              width=dp(72), height=dp(40))
+            def cycle(btn, tag=tag):
+                # Нажатия перебирают режимы по кругу
+                btn.text = modes[(modes.index(btn.text) + 1) % len(modes)]
+                tag_modes[tag] = btn.text
+            mode_btn.bind(on_release=cycle)
+            grid.add_widget(label)
+            grid.add_widget(mode_btn)
+        if not tags:
+            grid.cols = 1
+            grid.add_widget(Label(text='Тегов пока нет', size_hint_y=None, height=dp(40)))
+        scroll.add_widget(grid)
+        content.add_widget(scroll)
+
+        popup = Popup(title='Фильтр', content=content, size_hint=(0.9, 0.8))
+
+        def apply(*_):
+            popup.dismiss()
+            self.set_tag_filter(TagFilter(
+                all_of=[tag for tag, mode in tag_modes.items() if mode == 'И'],
+                any_of=[tag for tag, mode in tag_modes.items() if mode == 'ИЛИ'],
+                none_of=[tag for tag, mode in tag_modes.items() if mode == 'НЕ'],
+                folder=folder_values.get(folder_spinner.text),
+            ))
+
+        def reset(*_):
+            popup.dismiss()
+            self.set_tag_filter(TagFilter())
+
+        row = BoxLayout(orientation='horizontal', spacing=8, size_hint_y=None, height=dp(44))
+        reset_btn = Button(text='Сбросить')
+        reset_btn.bind(on_release=reset)
+        apply_btn = Button(text='Применить')
+        apply_btn.bind(on_release=apply)
+        row.add_widget(reset_btn)
+        row.add_widget(apply_btn)
+        content.add_widget(row)
+        popup.open()
+
+    def set_tag_filter(self, tag_filter):
+        """Применяет фильтр к списку заметок."""
+        self.tag_filter = tag_filter
+        count = len(tag_filter)
+        self.filter_btn.text = f'Фильтр ({count})' if count else 'Фильтр'
+        self.filter_btn.background_color = (0.3, 0.6, 1, 1) if count else (1, 1, 1, 1)
+        self.refresh_notes()
+
     def show_about(self, instance):
         """Переходит на экран "Об авторе"."""
         self.manager.current = 'about'
@@ -346,13 +578,80 @@ class MainScreen(Screen):
                     # Подсвечиваем кнопку вместо изменения текста
                     self.flashlight_btn.background_color = (0.3, 1, 0.3, 1) if self.flashlight_on else (0.7, 0.7, 0.7, 1)
             except Exception as e:
-                from kivy.logger import Logger
-                import traceback
-                error_details = f"MainScreen flashlight error:\n{type(e).__name__}: {e}\n{traceback.format_exc()}"
-                Logger.error(f"MainScreen: Error toggling flashlight: {e}")
-                from utils.debug_utils import show_error_popup
-                show_error_popup("Ошибка фонарика", error_details)
+                from utils.error_collector import report_error
+                report_error("Ошибка фонарика", e)
     
+    def _on_flashlight_press(self, instance):
+        self._flashlight_long_press = Clock.schedule_once(self._on_flashlight_long_press, self.long_press_duration)
+
+    def _on_flashlight_release(self, instance):
+        if self._flashlight_long_press is not None:
+            self._flashlight_long_press.cancel()
+            self._flashlight_long_press = None
+            self.toggle_flashlight(instance)
+
+    def _on_flashlight_long_press(self, dt):
+        self._flashlight_long_press = None
+        self.show_flashlight_patterns()
+
+    def show_flashlight_patterns(self):
+        """Показывает выбор шаблона мигания фонарика (SOS, стробоскоп, Морзе)."""
+        if not hasattr(self, 'app') or not self.app or not self.app.android_utils:
+            return
+        from kivy.uix.popup import Popup
+        from kivy.uix.textinput import TextInput
+        from utils.flashlight_patterns import sos_pattern, strobe_pattern, morse_pattern
+
+        content = BoxLayout(orientation='vertical', spacing=8, padding=8)
+        freq_input = TextInput(text='5', hint_text='Частота, Гц', input_filter='float',
+                               multiline=False, size_hint_y=None, height=dp(40))
+        morse_input = TextInput(hint_text='Текст для азбуки Морзе', multiline=False,
+                                size_hint_y=None, height=dp(40))
+        popup = Popup(title='Шаблоны фонарика', content=content, size_hint=(0.9, 0.6))
+
+        def play(pattern, loop, name):
+            popup.dismiss()
+            self.app.android_utils.play_flashlight_pattern(pattern, loop=loop, name=name)
+            self.flashlight_on = self.app.android_utils.is_pattern_playing()
+            self.flashlight_btn.background_color = (0.3, 1, 0.3, 1) if self.flashlight_on else (0.7, 0.7, 0.7, 1)
+
+        def play_strobe(*_):
+            try:
+                frequency = float(freq_input.text or 5)
+            except ValueError:
+                frequency = 5.0
+            play(strobe_pattern(frequency), True, f'strobe {frequency} Hz')
+
+        def play_morse(*_):
+            if morse_input.text.strip():
+                play(morse_pattern(morse_input.text), False, 'morse')
+
+        def stop(*_):
+            popup.dismiss()
+            self.app.android_utils.stop_flashlight_pattern()
+            self.flashlight_on = False
+            self.flashlight_btn.background_color = (0.7, 0.7, 0.7, 1)
+
+        row = BoxLayout(orientation='horizontal', spacing=8, size_hint_y=None, height=dp(44))
+        sos_btn = Button(text='SOS')
+        sos_btn.bind(on_release=lambda *_: play(sos_pattern(), True, 'SOS'))
+        strobe_btn = Button(text='Стробоскоп')
+        strobe_btn.bind(on_release=play_strobe)
+        row.add_widget(sos_btn)
+        row.add_widget(strobe_btn)
+        content.add_widget(row)
+        content.add_widget(freq_input)
+        content.add_widget(morse_input)
+        row = BoxLayout(orientation='horizontal', spacing=8, size_hint_y=None, height=dp(44))
+        morse_btn = Button(text='Морзе')
+        morse_btn.bind(on_release=play_morse)
+        stop_btn = Button(text='Стоп', background_color=(1, 0.3, 0.3, 1))
+        stop_btn.bind(on_release=stop)
+        row.add_widget(morse_btn)
+        row.add_widget(stop_btn)
+        content.add_widget(row)
+        popup.open()
+
     def toggle_brightness(self, instance):
         """Переключает яркость экрана (макс/предыдущее) без всплывающих уведомлений."""
         if not hasattr(self, 'app') or not self.app or not self.app.android_utils:
@@ -376,12 +675,8 @@ class MainScreen(Screen):
                 # Тихий фейл без уведомлений
                 pass
         except Exception as e:
-            from kivy.logger import Logger
-            import traceback
-            error_details = f"MainScreen brightness error:\n{type(e).__name__}: {e}\n{traceback.format_exc()}"
-            Logger.error(f"MainScreen: Error toggling brightness: {e}")
-            from utils.debug_utils import show_error_popup
-            show_error_popup("Ошибка яркости", error_details)
+            from utils.error_collector import report_error
+            report_error("Ошибка яркости", e)
     
     def on_note_selected(self, checkbox, is_active):
         """Обрабатывает переключение чекбокса заметки."""
@@ -439,6 +734,7 @@ class MainScreen(Screen):
             return
         
         # Показываем диалог подтверждения
+        from kivy.uix.popup import Popup
         content = BoxLayout(orientation='vertical', spacing=10)
         content.add_widget(Label(
             text=f'Удалить {len(self.selected_notes)} заметок?',
@@ -572,8 +868,16 @@ class MainScreen(Screen):
         # Автоматически убираем через 2 секунды
         Clock.schedule_once(lambda dt: self.remove_widget(toast) if toast in self.children else None, 2)
     
+    def apply_capabilities(self, capabilities):
+        """Отображает доступность фонарика и яркости по кэшу возможностей устройства."""
+        # Пока проверка не выполнялась ни разу, кнопки остаются активными
+        self.flashlight_btn.disabled = capabilities.get('torch') is False
+        self.brightness_btn.disabled = capabilities.get('brightness') is False
+
     def on_enter(self):
         """Вызывается при переходе на этот экран."""
+        if hasattr(self, 'app') and self.app:
+            self.apply_capabilities(self.app.capability_prober.capabilities)
         self.refresh_notes()
         self.exit_selection_mode()  # Сбрасываем режим выбора
         # Back в режиме выбора = Отмена, иначе стандартное поведение
@@ -667,9 +971,9 @@ class MainScreen(Screen):
                 self.update_pin_button_text()
             return True
 
-        # Не режим выбора, короткий тап без сдвига — открыть редактор
+        # Не режим выбора, короткий тап без сдвига — открыть просмотр
         if not moved_far:
-            self.edit_note_by_widget(widget)
+            self.view_note_by_widget(widget)
             return True
 
         return False
@@ -711,12 +1015,20 @@ class MainScreen(Screen):
                 # Обновляем текст кнопки закрепления
                 self.update_pin_button_text()
     
+    def view_note_by_widget(self, widget):
+        """Открывает заметку в режиме просмотра"""
+        if hasattr(widget, 'note_id') and hasattr(self, 'app') and self.app:
+            note = self.app.data_manager.open_note(widget.note_id)
+            if note:
+                self.app.view_screen.set_note(note)
+                self.manager.current = 'view'
+    
     def edit_note_by_widget(self, widget):
         """Редактирует заметку по виджету"""
         if hasattr(widget, 'note_id'):
             note_id = widget.note_id
             if hasattr(self, 'app') and self.app:
-                note = self.app.data_manager.get_note(note_id)
+                note = self.app.data_manager.open_note(note_id)
                 if note:
                     # Сначала передаем заметку в экран редактирования, затем переключаемся
                     self.app.edit_screen.set_note(note)
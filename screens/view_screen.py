@@ -0,0 +1,152 @@
+from kivy.uix.screenmanager import Screen
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.gridlayout import GridLayout
+from kivy.uix.label import Label
+from kivy.uix.button import Button
+from kivy.uix.checkbox import CheckBox
+from kivy.uix.scrollview import ScrollView
+from kivy.uix.widget import Widget
+from kivy.metrics import dp, sp
+
+HEADING_SIZES = {1: '24sp', 2: '20sp', 3: '18sp'}
+
+
+class ViewScreen(Screen):
+    """Просмотр заметки с разметкой Markdown (только чтение, кроме чек-листов).
+
+    Виджеты строятся по блокам из MarkdownCache и запоминаются по объекту
+    блока: после правки заметки заново создаются только виджеты измененных
+    блоков. Переключение пункта чек-листа сохраняет заметку, не
+    перестраивая документ.
+    """
+    name = 'view'
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.note = None
+        self._widgets = {}
+        self._widgets_note_id = None
+        layout = BoxLayout(orientation='vertical', padding=12, spacing=8)
+        self.title_label = Label(font_size='22sp', bold=True, size_hint_y=None, height=dp(48),
+                                 halign='left', valign='middle')
+        self.title_label.bind(size=self.title_label.setter('text_size'))
+        layout.add_widget(self.title_label)
+        scroll = ScrollView()
+        self.blocks_layout = GridLayout(cols=1, size_hint_y=None, spacing=dp(6))
+        self.blocks_layout.bind(minimum_height=self.blocks_layout.setter('height'))
+        scroll.add_widget(self.blocks_layout)
+        layout.add_widget(scroll)
+        row = BoxLayout(size_hint_y=None, height=dp(56), spacing=12, padding=[0, 4])
+        back_btn = Button(text='Назад', size_hint_x=None, width=dp(120))
+        edit_btn = Button(text='Изменить', size_hint_x=None, width=dp(120))
+        back_btn.bind(on_release=self.on_back)
+        edit_btn.bind(on_release=self.on_edit)
+        row.add_widget(back_btn)
+        row.add_widget(Widget(size_hint_x=1))
+        row.add_widget(edit_btn)
+        layout.add_widget(row)
+        self.add_widget(layout)
+
+    # API для MainScreen
+    def set_note(self, note):
+        self.note = note
+
+    def on_pre_enter(self, *args):
+        try:
+            from kivy.base import EventLoop
+            win = EventLoop.window
+            if win:
+                win.bind(on_keyboard=self._on_back_key)
+        except Exception:
+            pass
+        self.render()
+
+    def on_leave(self, *args):
+        try:
+            from kivy.base import EventLoop
+            win = EventLoop.window
+            if win:
+                win.unbind(on_keyboard=self._on_back_key)
+        except Exception:
+            pass
+
+    def render(self):
+        """Показывает блоки заметки, переиспользуя виджеты неизмененных блоков."""
+        note = self.note
+        if not note or not hasattr(self, 'app') or not self.app:
+            return
+        if self._widgets_note_id != note.get('id'):
+            self._widgets = {}
+            self._widgets_note_id = note.get('id')
+        self.title_label.text = note.get('title', '')
+        blocks = self.app.markdown_cache.blocks(note)
+        widgets = {}
+        for block in blocks:
+            widget = self._widgets.get(block)
+            if widget is None:
+                widget = self._make_widget(block)
+            widgets[block] = widget
+        self._widgets = widgets
+        self.blocks_layout.clear_widgets()
+        for block in blocks:
+            self.blocks_layout.add_widget(widgets[block])
+
+    def on_back(self, *_):
+        if hasattr(self, 'app') and self.app:
+            self.app.sm.current = 'main'
+
+    def on_edit(self, *_):
+        if hasattr(self, 'app') and self.app and self.note:
+            self.app.edit_screen.set_note(self.note)
+            self.app.sm.current = 'edit'
+
+    def _on_back_key(self, window, key, *args):
+        if key == 27:  # Android back
+            self.on_back()
+            return True
+        return False
+
+    def _make_label(self, markup, font_size='15sp', bold=False, indent=0):
+        label = Label(text=markup, markup=True, font_size=font_size, bold=bold,
+                      size_hint_y=None, halign='left', valign='top', color=(1, 1, 1, 1),
+                      padding=[dp(16) * indent, 0])
+        # Высота по тексту: ширина задает перенос строк
+        label.bind(width=lambda w, width: setattr(w, 'text_size', (width, None)),
+                   texture_size=lambda w, size: setattr(w, 'height', max(size[1], sp(20))))
+        return label
+
+    def _make_widget(self, block):
+        if block.kind == 'heading':
+            return self._make_label(block.markup, HEADING_SIZES.get(block.level, '16sp'), bold=True)
+        if block.kind == 'bullet':
+            return self._make_label('• ' + block.markup, indent=block.level)
+        if block.kind == 'ordered':
+            return self._make_label(f'{block.number}. ' + block.markup, indent=block.level)
+        if block.kind == 'check':
+            row = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(36),
+                            padding=[dp(16) * block.level, 0, 0, 0])
+            checkbox = CheckBox(active=block.checked, size_hint_x=None, width=dp(36))
+            label = self._make_label(block.markup)
+            label.bind(height=lambda w, height: setattr(row, 'height', max(height, dp(36))))
+            row.add_widget(checkbox)
+            row.add_widget(label)
+            row.block = block
+            checkbox.bind(active=lambda cb, active: self._on_check(row, active))
+            return row
+        return self._make_label(block.markup)
+
+    def _on_check(self, row, active):
+        block = row.block
+        if block.checked == active or not self.note:
+            return
+        note = self.app.data_manager.toggle_checklist_item(self.note['id'], block.line)
+        if note is None:
+            return
+        # Перестраивать документ не нужно: заново разбирается одна строка,
+        # а виджет переходит к новому блоку
+        for new_block in self.app.markdown_cache.blocks(note):
+            if new_block.line == block.line:
+                self._widgets.pop(block, None)
+                self._widgets[new_block] = row
+                row.block = new_block
+                break
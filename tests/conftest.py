@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Kivy не должен разбирать аргументы pytest и писать журнал в консоль
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+os.environ.setdefault("KIVY_NO_FILELOG", "1")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
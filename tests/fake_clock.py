@@ -0,0 +1,56 @@
+"""
+Подделка kivy.clock.Clock с ручным временем для планировщиков с внедряемыми часами.
+"""
+
+
+class FakeEvent:
+    def __init__(self, callback, at, interval=None):
+        self.callback = callback
+        self.at = at
+        self.interval = interval
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeClock:
+    """Часы Kivy с ручным временем: advance() выполняет события по порядку."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.events = []
+
+    def time(self):
+        return self.now
+
+    def schedule_once(self, callback, timeout=0):
+        event = FakeEvent(callback, self.now + timeout)
+        self.events.append(event)
+        return event
+
+    def schedule_interval(self, callback, interval):
+        event = FakeEvent(callback, self.now + interval, interval)
+        self.events.append(event)
+        return event
+
+    def pending(self):
+        """Сроки запланированных и не отмененных событий."""
+        return sorted(e.at for e in self.events if not e.cancelled)
+
+    def advance(self, seconds):
+        end = self.now + seconds
+        while True:
+            pending = [e for e in self.events if not e.cancelled and e.at <= end]
+            if not pending:
+                break
+            event = min(pending, key=lambda e: e.at)
+            self.now = max(self.now, event.at)
+            if event.interval is None:
+                self.events.remove(event)
+                event.callback(0)
+            elif event.callback(event.interval) is False:
+                self.events.remove(event)
+            else:
+                event.at += event.interval
+        self.now = end
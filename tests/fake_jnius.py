@@ -0,0 +1,126 @@
+"""
+Подделка модуля jnius для проверки AndroidBridge на десктопе.
+
+Считает рефлексивные обращения (autoclass, cast, PythonActivity.mActivity,
+getWindow, getSystemService, getCameraIdList) в словаре counts; Activity,
+окно и CameraManager запоминают сделанные через них изменения.
+"""
+
+import time
+from collections import Counter
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class LayoutParams:
+    def __init__(self, brightness: float = -1.0):
+        self.screenBrightness = brightness
+
+
+class FakeWindow:
+    def __init__(self, jnius: "FakeJnius"):
+        self._jnius = jnius
+        self.brightness = -1.0
+
+    def getAttributes(self) -> LayoutParams:
+        return LayoutParams(self.brightness)
+
+    def setAttributes(self, params: LayoutParams) -> None:
+        self.brightness = params.screenBrightness
+
+
+class FakeCameraManager:
+    def __init__(self, jnius: "FakeJnius", camera_ids: List[str]):
+        self._jnius = jnius
+        self._camera_ids = camera_ids
+        self.torch: List[Tuple[str, bool]] = []
+
+    def getCameraIdList(self) -> List[str]:
+        self._jnius.counts["getCameraIdList"] += 1
+        return list(self._camera_ids)
+
+    def setTorchMode(self, camera_id: str, on: bool) -> None:
+        self.torch.append((camera_id, on))
+
+
+class FakeActivity:
+    def __init__(self, jnius: "FakeJnius"):
+        self._jnius = jnius
+        self.window = FakeWindow(jnius)
+        self.camera_manager = FakeCameraManager(jnius, jnius.camera_ids)
+        # Исключение, которое бросит следующий runOnUiThread (None — выполнить сразу)
+        self.run_error: Optional[BaseException] = None
+
+    def getWindow(self) -> FakeWindow:
+        self._jnius.counts["getWindow"] += 1
+        return self.window
+
+    def getSystemService(self, name: str) -> Any:
+        self._jnius.counts["getSystemService"] += 1
+        # Медленный JNI-вызов расширяет окно гонки между потоками
+        time.sleep(self._jnius.delay)
+        return self.camera_manager if name == FakeContext.CAMERA_SERVICE else None
+
+    def runOnUiThread(self, runnable: Any) -> None:
+        if self.run_error is not None:
+            raise self.run_error
+        runnable.run()
+
+
+class FakeContext:
+    CAMERA_SERVICE = "camera"
+
+
+class _ActivityClass:
+    def __init__(self, jnius: "FakeJnius"):
+        self._jnius = jnius
+
+    @property
+    def mActivity(self) -> FakeActivity:
+        self._jnius.counts["mActivity"] += 1
+        return self._jnius.activity
+
+
+class PythonJavaClass:
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+def java_method(signature: str) -> Callable[[Callable], Callable]:
+    def decorator(func: Callable) -> Callable:
+        return func
+    return decorator
+
+
+class FakeJnius:
+    """Модуль jnius: передается в AndroidBridge(jnius_module=...)."""
+
+    PythonJavaClass = PythonJavaClass
+    java_method = staticmethod(java_method)
+
+    def __init__(self, camera_ids: Optional[List[str]] = None):
+        self.counts: Counter = Counter()
+        self.camera_ids = ["0"] if camera_ids is None else camera_ids
+        self.activity = FakeActivity(self)
+        self.detached = 0
+        # Задержка getSystemService в секундах
+        self.delay = 0.0
+
+    def recreate_activity(self) -> FakeActivity:
+        """Новая Activity, как после поворота экрана: старые ссылки устаревают."""
+        self.activity = FakeActivity(self)
+        return self.activity
+
+    def autoclass(self, name: str) -> Any:
+        self.counts["autoclass"] += 1
+        if name == "org.kivy.android.PythonActivity":
+            return _ActivityClass(self)
+        if name == "android.content.Context":
+            return FakeContext
+        return type(name.rsplit(".", 1)[-1], (), {})
+
+    def cast(self, name: str, obj: Any) -> Any:
+        self.counts["cast"] += 1
+        return obj
+
+    def detach(self) -> None:
+        self.detached += 1
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+from utils import android_utils
+from utils.android_bridge import AndroidBridge
+from utils.android_utils import AndroidUtils
+
+from .fake_jnius import FakeJnius
+
+# Обращения, которые AndroidBridge должен делать один раз, а не на каждый вызов
+LOOKUPS = ("autoclass", "cast", "mActivity", "getWindow", "getSystemService", "getCameraIdList")
+
+
+@pytest.fixture
+def jnius(monkeypatch):
+    monkeypatch.setattr(android_utils, "kivy_platform", "android")
+    # Без plyer: фонарик и яркость идут только через мост
+    monkeypatch.setattr(android_utils, "_plyer_facades", {"flashlight": None, "brightness": None})
+    return FakeJnius()
+
+
+@pytest.fixture
+def utils(jnius):
+    return AndroidUtils(AndroidBridge(jnius_module=jnius))
+
+
+def lookups(jnius):
+    return {name: jnius.counts[name] for name in LOOKUPS}
+
+
+def exercise(utils):
+    utils.set_brightness(0.5)
+    utils.toggle_flashlight()
+    utils.toggle_flashlight()
+    utils._apply_brightness(0.8)
+
+
+def test_lookups_stay_flat_across_repeated_calls(jnius, utils):
+    exercise(utils)
+    first = lookups(jnius)
+    assert first["autoclass"] == 2  # PythonActivity и Context
+    assert first["getSystemService"] == 1
+    assert first["getWindow"] == 1
+    for _ in range(20):
+        exercise(utils)
+    assert lookups(jnius) == first
+    assert jnius.activity.window.brightness == 0.8
+    assert jnius.activity.camera_manager.torch[-2:] == [("0", True), ("0", False)]
+
+
+def test_invalidate_resolves_activity_objects_again_but_keeps_classes(jnius, utils):
+    exercise(utils)
+    before = lookups(jnius)
+    activity = jnius.recreate_activity()
+    utils.on_activity_recreated()
+    exercise(utils)
+    after = lookups(jnius)
+    assert after["autoclass"] == before["autoclass"]
+    for name in ("mActivity", "getWindow", "getSystemService", "getCameraIdList"):
+        assert after[name] == before[name] + 1, name
+    # Новые вызовы идут в новую Activity
+    assert activity.window.brightness == 0.8
+    for _ in range(5):
+        exercise(utils)
+    assert lookups(jnius) == after
+
+
+def test_preferred_camera_id_skips_camera_id_list(jnius, utils):
+    utils.apply_capabilities({"camera_id": "1"})
+    utils.toggle_flashlight()
+    utils.on_activity_recreated()
+    utils.toggle_flashlight()
+    assert jnius.counts["getCameraIdList"] == 0
+    assert [camera for camera, _ in jnius.activity.camera_manager.torch] == ["1", "1"]
+
+
+def test_run_on_ui_thread_releases_runnable(jnius):
+    bridge = AndroidBridge(jnius_module=jnius)
+    calls = []
+    bridge.run_on_ui_thread(lambda: calls.append(1))
+    assert calls == [1]
+    assert not bridge._pending_runnables
+
+    jnius.activity.run_error = RuntimeError("activity destroyed")
+    with pytest.raises(RuntimeError):
+        bridge.run_on_ui_thread(lambda: calls.append(2))
+    assert calls == [1]
+    assert not bridge._pending_runnables
+
+
+def test_concurrent_threads_resolve_camera_manager_once(jnius):
+    bridge = AndroidBridge(jnius_module=jnius)
+    jnius.delay = 0.05
+    managers = []
+    threads = [threading.Thread(target=lambda: managers.append(bridge.camera_manager)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert jnius.counts["getSystemService"] == 1
+    assert len({id(manager) for manager in managers}) == 1
@@ -0,0 +1,82 @@
+import pytest
+
+from utils import android_utils
+from utils.android_bridge import AndroidBridge
+from utils.android_utils import AndroidUtils
+from utils.brightness_controller import BrightnessController
+
+from .fake_clock import FakeClock
+from .fake_jnius import FakeJnius
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def applied():
+    return []
+
+
+@pytest.fixture
+def controller(clock, applied):
+    return BrightnessController(applied.append, max_rate=30.0, clock=clock, time_func=clock.time)
+
+
+def test_requests_coalesce_to_last_value(controller, clock, applied):
+    for value in (0.2, 0.4, 0.6):
+        controller.set_target(value)
+    clock.advance(0.1)
+    assert applied == [0.6]
+
+
+def test_apply_rate_is_capped(controller, clock, applied):
+    for i in range(1000):
+        controller.set_target(i / 1000)
+        clock.advance(0.001)
+    clock.advance(0.1)
+    # 1 секунда запросов — не больше max_rate применений (плюс последнее)
+    assert len(applied) <= 31
+    assert applied[-1] == 0.999
+
+
+def test_ramp_reaches_target_and_completes(controller, clock, applied):
+    done = []
+    controller.ramp_to(1.0, duration=0.3, start=0.2, on_complete=lambda: done.append(1))
+    clock.advance(0.5)
+    assert applied[-1] == 1.0
+    assert applied == sorted(applied)
+    assert 5 <= len(applied) <= 11
+    assert done == [1]
+
+
+def test_apply_now_updates_level(controller, clock, applied):
+    controller.set_target(1.0)
+    clock.advance(0.1)
+    controller.apply_now(0.4)
+    assert controller.level == 0.4
+    controller.ramp_to(0.8, duration=0.2)
+    clock.advance(0.3)
+    assert applied[1] == 0.4
+    assert applied[2] >= 0.4
+    assert applied[-1] == 0.8
+
+
+def test_set_brightness_keeps_controller_in_sync(monkeypatch, clock):
+    monkeypatch.setattr(android_utils, "kivy_platform", "android")
+    monkeypatch.setattr(android_utils, "_plyer_facades", {"flashlight": None, "brightness": None})
+    jnius = FakeJnius()
+    utils = AndroidUtils(AndroidBridge(jnius_module=jnius))
+    utils.brightness_controller = BrightnessController(utils._apply_brightness, clock=clock,
+                                                       time_func=clock.time)
+    window = jnius.activity.window
+
+    utils.brightness_controller.set_target(1.0)
+    clock.advance(0.1)
+    utils.set_brightness(0.4)
+    assert window.brightness == 0.4
+    # Возврат к прежнему значению не должен отбрасываться как "уже примененный"
+    utils.brightness_controller.set_target(1.0)
+    clock.advance(0.1)
+    assert window.brightness == 1.0
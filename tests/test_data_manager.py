@@ -0,0 +1,199 @@
+import json
+import os
+import threading
+
+import pytest
+
+from utils import data_manager as data_manager_module
+from utils.data_manager import DataManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = DataManager()
+    manager.add_note("first", "one")
+    manager.add_note("second", "two")
+    return manager
+
+
+def write_externally(manager, text):
+    with open(manager.notes_file, 'w', encoding='utf-8') as f:
+        f.write(text)
+    # Подпись должна отличаться от записанной нами даже при той же mtime
+    os.utime(manager.notes_file, (1, 1))
+
+
+def settle(manager, ticks=200):
+    """Дожидается фоновой перечитки и выполняет запланированное на UI-потоке."""
+    from kivy.clock import Clock
+    for _ in range(ticks):
+        thread = manager._reload_thread
+        if thread is not None:
+            thread.join(5.0)
+        Clock.tick()
+        if not manager.save_pending and manager._reload_thread is None:
+            return
+
+
+def read_titles(manager):
+    with open(manager.notes_file, encoding='utf-8') as f:
+        return [note["title"] for note in json.load(f)]
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(data_manager_module, "SAVE_RETRY_DELAY", 0)
+    monkeypatch.setattr(data_manager_module, "SAVE_RETRIES", 2)
+
+
+def test_external_change_is_merged_off_the_caller_thread(manager, monkeypatch):
+    readers = []
+    read = manager._read_notes_file
+
+    def tracked():
+        readers.append(threading.current_thread().name)
+        return read()
+
+    monkeypatch.setattr(manager, "_read_notes_file", tracked)
+    states = []
+    manager.save_listeners.append(states.append)
+    with open(manager.notes_file, encoding='utf-8') as f:
+        notes = json.load(f)
+    notes.append(dict(notes[0], id=10, title="script"))
+    write_externally(manager, json.dumps(notes))
+
+    manager.notes[0]["title"] = "edited"
+    manager.mark_changed(manager.notes[0])
+    assert manager.save_notes() is False
+    assert manager.save_pending
+    assert read_titles(manager) == ["first", "second", "script"]
+    settle(manager)
+    assert readers == ["NotesReload"]
+    assert read_titles(manager) == ["edited", "second", "script"]
+    assert states == [False, True]
+
+
+def test_partial_file_is_not_overwritten(manager, fast_retries, monkeypatch):
+    monkeypatch.setattr(data_manager_module, "SAVE_RETRIES", 1000)
+    write_externally(manager, '[{"id": 1, "title": "fir')
+    manager.add_note("third", "three")
+    settle(manager, ticks=5)
+    assert manager.save_pending
+    with open(manager.notes_file, encoding='utf-8') as f:
+        assert f.read() == '[{"id": 1, "title": "fir'
+    # Другая программа дописала файл — отложенная запись переносит ее правки
+    write_externally(manager, json.dumps([{"id": 1, "title": "first", "content": "one"}]))
+    settle(manager)
+    assert not manager.save_pending
+    assert read_titles(manager) == ["first", "third"]
+
+
+def test_unreadable_file_is_overwritten_after_retries(manager, fast_retries):
+    write_externally(manager, 'garbage')
+    assert manager.save_notes() is False
+    settle(manager)
+    assert not manager.save_pending
+    assert read_titles(manager) == ["first", "second"]
+    assert not os.path.exists(manager.notes_file + ".tmp")
+
+
+def test_forced_save_writes_on_the_caller(manager):
+    write_externally(manager, 'garbage')
+    assert manager.save_notes() is False
+    assert manager.save_notes(force=True) is True
+    assert not manager.save_pending
+    assert read_titles(manager) == ["first", "second"]
+
+
+def test_external_removal_reaches_deletion_listeners(manager):
+    deleted = []
+    manager.deletion_listeners.append(deleted.extend)
+    with open(manager.notes_file, encoding='utf-8') as f:
+        notes = json.load(f)
+    write_externally(manager, json.dumps([note for note in notes if note["title"] != "second"]))
+    manager.add_note("third", "three")
+    settle(manager)
+    assert [note["title"] for note in deleted] == ["second"]
+    assert [note["title"] for note in manager.notes] == ["first", "third"]
+    assert read_titles(manager) == ["first", "third"]
+
+
+def test_find_duplicates_does_not_build_index_on_caller(manager, monkeypatch):
+    started = []
+    monkeypatch.setattr(manager, "prepare_duplicates", lambda: started.append(1))
+    assert manager.find_duplicates("first", "one") == []
+    assert started
+    assert manager._duplicates is None
+    manager.duplicate_clusters()  # явный запрос строит индекс
+    assert [note["title"] for note, _ in manager.find_duplicates("first", "one")] == ["first"]
+
+
+def add_image(manager, tmp_path, note_id):
+    source = tmp_path / "photo.png"
+    source.write_bytes(b"png")
+    return manager.add_attachment(note_id, str(source))
+
+
+def orphan_attachment(manager, name="orphan.png"):
+    os.makedirs(manager.attachments.base_dir, exist_ok=True)
+    path = manager.attachments.path(name)
+    with open(path, 'wb') as f:
+        f.write(b"png")
+    # Файл старше запуска очистки — иначе его сочтут только что добавленным
+    os.utime(path, (1, 1))
+    return path
+
+
+def join_gc(thread):
+    if thread is not None:
+        thread.join(5.0)
+
+
+def test_locked_store_keeps_attachments_until_unlock(manager, tmp_path, monkeypatch):
+    name = add_image(manager, tmp_path, manager.notes[0]["id"])
+    manager.enable_encryption("secret")
+    orphan = orphan_attachment(manager)
+
+    locked = DataManager()
+    assert locked.is_locked
+    assert locked.collect_attachment_garbage() is None
+    assert os.path.exists(locked.attachments.path(name))
+
+    threads = []
+    collect = locked.attachments.collect_garbage
+
+    def tracked(referenced):
+        threads.append(collect(referenced))
+        return threads[-1]
+
+    monkeypatch.setattr(locked.attachments, "collect_garbage", tracked)
+    assert locked.unlock("secret")
+    assert len(threads) == 1
+    join_gc(threads[0])
+    assert os.path.exists(locked.attachments.path(name))
+    assert not os.path.exists(orphan)
+
+
+def test_unreadable_notes_file_keeps_attachments(manager, tmp_path):
+    name = add_image(manager, tmp_path, manager.notes[0]["id"])
+    write_externally(manager, '[{"id": 1, "title": "fir')
+
+    broken = DataManager()
+    assert broken.load_failed
+    assert broken.collect_attachment_garbage() is None
+    assert os.path.exists(broken.attachments.path(name))
+
+
+def test_gc_removes_only_unreferenced_files(manager, tmp_path):
+    name = add_image(manager, tmp_path, manager.notes[0]["id"])
+    orphan = orphan_attachment(manager)
+    join_gc(DataManager().collect_attachment_garbage())
+    assert os.path.exists(manager.attachments.path(name))
+    assert not os.path.exists(orphan)
+
+
+def test_gc_refuses_empty_reference_set(manager):
+    orphan = orphan_attachment(manager)
+    assert manager.collect_attachment_garbage() is None
+    assert os.path.exists(orphan)
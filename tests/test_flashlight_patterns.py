@@ -0,0 +1,68 @@
+import threading
+import time
+
+from utils.flashlight_patterns import FlashlightPatternPlayer, strobe_pattern
+
+
+class FakeTorch:
+    """Фонарик, запоминающий моменты переключений."""
+
+    def __init__(self, fail_on_call=None):
+        self.events = []
+        self.fail_on_call = fail_on_call
+
+    def __call__(self, on):
+        self.events.append((time.perf_counter(), on))
+        if self.fail_on_call is not None and len(self.events) == self.fail_on_call:
+            raise RuntimeError("camera in use")
+
+
+def make_player(torch):
+    done = threading.Event()
+    player = FlashlightPatternPlayer(torch, on_thread_exit=done.set)
+    return player, done
+
+
+def test_strobe_30hz_steps_and_timestamps():
+    torch = FakeTorch()
+    player, done = make_player(torch)
+    periods = 15
+    start = time.perf_counter()
+    player.play(strobe_pattern(30.0) * periods, name="strobe")
+    assert done.wait(5.0)
+
+    steps = 2 * periods
+    assert player.stats()["count"] == steps
+    assert [on for _, on in torch.events] == [True, False] * periods
+    assert torch.events[-1][1] is False
+    # Переключения идут по расписанию от старта (шаг — 1/60 с), без накопления дрейфа
+    step = 1.0 / 60
+    for i, (at, _) in enumerate(torch.events):
+        assert at - start >= i * step - 0.002
+    assert torch.events[-1][0] - start < (steps - 1) * step + 0.1
+
+
+def test_loop_keeps_jitter_window_bounded():
+    torch = FakeTorch()
+    player, done = make_player(torch)
+    player.JITTER_WINDOW = 8
+    player.play(strobe_pattern(30.0), loop=True, name="strobe")
+    time.sleep(0.5)
+    player.stop()
+    assert done.wait(5.0)
+
+    stats = player.stats()
+    assert stats["count"] > 8
+    assert len(player.jitter) == 8
+    assert torch.events[-1][1] is False
+
+
+def test_set_torch_error_stops_and_turns_torch_off():
+    torch = FakeTorch(fail_on_call=3)
+    player, done = make_player(torch)
+    player.play(strobe_pattern(30.0), loop=True, name="strobe")
+    assert done.wait(5.0)
+
+    assert not player.is_playing()
+    # Третье включение упало — проигрыватель сам выключил фонарик
+    assert [on for _, on in torch.events] == [True, False, True, False]
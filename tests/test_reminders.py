@@ -0,0 +1,82 @@
+import pytest
+
+from utils.reminders import Fired, ReminderScheduler
+
+from .fake_clock import FakeClock
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def fired():
+    return []
+
+
+@pytest.fixture
+def scheduler(clock, fired):
+    return ReminderScheduler(on_due=fired.extend, clock=clock, time_func=clock.time)
+
+
+def test_one_shot_fires_once(scheduler, clock, fired):
+    scheduler.add("note", 10.0)
+    scheduler.start()
+    assert clock.pending() == [10.0]
+    clock.advance(9.0)
+    assert fired == []
+    clock.advance(1.0)
+    assert fired == [Fired("note", 10.0, None, 0)]
+    assert "note" not in scheduler
+    assert clock.pending() == []
+    clock.advance(100.0)
+    assert len(fired) == 1
+
+
+def test_recurring_reports_missed_after_pause(scheduler, clock, fired):
+    scheduler.add("daily", 10.0, interval=5.0)
+    scheduler.start()
+    clock.advance(10.0)
+    assert fired == [Fired("daily", 10.0, 5.0, 0)]
+    scheduler.pause()
+    assert clock.pending() == []
+    clock.advance(30.0)  # t=40: пропущены сроки 15, 20, 25, 30, 35, 40
+    assert len(fired) == 1
+    scheduler.resume()
+    assert fired[1] == Fired("daily", 15.0, 5.0, 5)
+    assert scheduler.get("daily") == (45.0, 5.0)
+    assert clock.pending() == [45.0]
+
+
+def test_removing_head_rearms_timer(scheduler, clock, fired):
+    scheduler.add("first", 10.0)
+    scheduler.add("second", 20.0)
+    scheduler.start()
+    assert clock.pending() == [10.0]
+    assert scheduler.remove("first")
+    assert clock.pending() == [20.0]
+    clock.advance(20.0)
+    assert [f.key for f in fired] == ["second"]
+    assert not scheduler.remove("first")
+
+
+def test_earlier_add_rearms_timer(scheduler, clock):
+    scheduler.add("late", 50.0)
+    scheduler.start()
+    scheduler.add("early", 5.0)
+    assert clock.pending() == [5.0]
+
+
+def test_heap_is_compacted_after_many_removals(scheduler):
+    for i in range(100):
+        scheduler.add(i, float(i + 1))
+    for i in range(0, 100, 2):
+        scheduler.remove(i)
+    scheduler.remove(1)
+    # Больше половины записей помечены снятыми — куча пересобрана без них
+    assert len(scheduler) == 49
+    assert len(scheduler._heap) == 49
+    assert scheduler._removed == 0
+    due = scheduler.pop_due(now=1000.0)
+    assert [f.key for f in due] == list(range(3, 100, 2))
@@ -0,0 +1,96 @@
+import os
+import time
+
+import pytest
+
+from benchmarks.sync_server import StandInServer
+from utils.data_manager import DataManager
+from utils.sync import SyncEngine, sync_record
+
+
+class Device:
+    """DataManager и SyncEngine в своем каталоге."""
+
+    def __init__(self, path, url):
+        os.makedirs(path)
+        cwd = os.getcwd()
+        # DataManager работает с файлами относительно текущего каталога
+        os.chdir(path)
+        try:
+            self.manager = DataManager()
+        finally:
+            os.chdir(cwd)
+        self.manager.notes_file = os.path.join(path, "notes.json")
+        self.manager.settings_file = os.path.join(path, "settings.json")
+        self.manager.attachments.base_dir = os.path.join(path, "attachments")
+        self.engine = SyncEngine(self.manager, url, state_file=os.path.join(path, "sync.json"))
+
+    def sync(self):
+        return self.engine.sync()
+
+    def snapshot(self):
+        return {note["uid"]: sync_record(note) for note in self.manager.notes}
+
+
+@pytest.fixture
+def server():
+    with StandInServer() as server:
+        yield server
+
+
+@pytest.fixture
+def devices(tmp_path, server):
+    a = Device(str(tmp_path / "a"), server.url)
+    b = Device(str(tmp_path / "b"), server.url)
+    for i in range(20):
+        a.manager.add_note(f"Заметка {i}", f"Текст {i}")
+    return a, b
+
+
+def converge(a, b):
+    a.sync()
+    b.sync()
+    a.sync()
+    assert a.snapshot() == b.snapshot()
+
+
+def test_initial_sync_transfers_all_notes(devices):
+    a, b = devices
+    pushed = a.sync()
+    pulled = b.sync()
+    assert pushed["pushed"] == 20
+    assert pulled["pulled"] == 20
+    assert a.snapshot() == b.snapshot()
+
+
+def test_concurrent_edit_keeps_conflict_copy(devices):
+    a, b = devices
+    converge(a, b)
+    uid = a.manager.notes[0]["uid"]
+    a.manager.update_note(a.manager.note_by_uid(uid)["id"], "Версия A", "Текст с устройства A")
+    time.sleep(0.01)
+    # Позже правленная версия побеждает, проигравшая остается копией конфликта
+    b.manager.update_note(b.manager.note_by_uid(uid)["id"], "Версия B", "Текст с устройства B")
+    converge(a, b)
+    titles = sorted(note["title"] for note in a.manager.notes if note["title"].startswith("Версия"))
+    assert titles == ["Версия A (конфликт)", "Версия B"]
+    assert a.manager.note_by_uid(uid)["title"] == "Версия B"
+
+
+def test_delete_propagates(devices):
+    a, b = devices
+    converge(a, b)
+    victim = b.manager.notes[5]["uid"]
+    b.manager.delete_note(b.manager.note_by_uid(victim)["id"])
+    converge(a, b)
+    assert a.manager.note_by_uid(victim) is None
+    assert len(a.manager.notes) == 19
+
+
+def test_idle_sync_sends_one_request(devices, server):
+    a, b = devices
+    converge(a, b)
+    before = server.stats["requests"]
+    result = b.sync()
+    assert (result["pushed"], result["pulled"]) == (0, 0)
+    assert server.stats["requests"] - before == 1
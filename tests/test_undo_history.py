@@ -0,0 +1,101 @@
+from utils.undo_history import EditOperation, UndoHistory
+
+
+def typed(pos, text, at):
+    op = EditOperation(pos, '', text)
+    op.timestamp = at
+    return op
+
+
+def erased(pos, text, at):
+    op = EditOperation(pos, text, '')
+    op.timestamp = at
+    return op
+
+
+def test_typing_merges_until_word_boundary():
+    history = UndoHistory(merge_window=1.0)
+    for i, char in enumerate("ab c"):
+        history.record(typed(i, char, at=i * 0.1))
+    first = history.undo()
+    second = history.undo()
+    assert (first.pos, first.inserted) == (3, "c")
+    assert (second.pos, second.inserted) == (0, "ab ")
+    assert not history.can_undo
+
+
+def test_pause_and_newline_start_new_operation():
+    history = UndoHistory(merge_window=1.0)
+    history.record(typed(0, "a", at=0.0))
+    history.record(typed(1, "b", at=5.0))
+    history.record(typed(2, "\n", at=5.1))
+    assert [history.undo().inserted for _ in range(3)] == ["\n", "b", "a"]
+
+
+def test_backspace_and_delete_merge():
+    history = UndoHistory()
+    history.record(erased(4, "d", at=0.0))
+    history.record(erased(3, "c", at=0.1))
+    op = history.undo()
+    assert (op.pos, op.removed) == (3, "cd")
+
+    history.record(erased(1, "x", at=1.0))
+    history.record(erased(1, "y", at=1.1))
+    op = history.undo()
+    assert (op.pos, op.removed) == (1, "xy")
+
+
+def test_eviction_by_operation_count_and_chars():
+    history = UndoHistory(max_operations=3, max_chars=1000, merge_window=0.0)
+    for i in range(5):
+        history.record(typed(i, "\n", at=float(i)))
+    assert [history.undo().pos for _ in range(3)] == [4, 3, 2]
+    assert not history.can_undo
+
+    history = UndoHistory(max_operations=100, max_chars=10, merge_window=0.0)
+    for i in range(4):
+        history.record(typed(0, "\n" * 4, at=float(i)))
+    assert history._chars <= 10
+    history.undo()
+    history.undo()
+    assert not history.can_undo
+
+
+def test_clean_after_undo_back_to_initial_text():
+    history = UndoHistory(merge_window=0.0)
+    history.mark_clean()
+    history.record(typed(0, "a", at=0.0))
+    history.record(typed(1, "\n", at=1.0))
+    assert not history.is_clean()
+    history.undo()
+    assert not history.is_clean()
+    history.undo()
+    assert history.is_clean()
+    history.redo()
+    assert not history.is_clean()
+
+
+def test_clean_state_lost_once_evicted():
+    history = UndoHistory(max_operations=1, merge_window=0.0)
+    history.mark_clean()
+    history.record(typed(0, "a", at=0.0))
+    history.record(typed(1, "\n", at=1.0))
+    history.undo()
+    assert not history.is_clean()
+
+
+def test_new_edit_drops_redo():
+    history = UndoHistory(merge_window=0.0)
+    history.record(typed(0, "a", at=0.0))
+    history.undo()
+    assert history.can_redo
+    history.record(typed(0, "b", at=1.0))
+    assert not history.can_redo
+
+
+def test_operation_from_texts():
+    op = EditOperation.from_texts("hello world", "hello brave world")
+    assert (op.pos, op.removed, op.inserted) == (6, "", "brave ")
+    op = EditOperation.from_texts("abc", "axc")
+    assert (op.pos, op.removed, op.inserted) == (1, "b", "x")
+    assert EditOperation.from_texts("same", "same") is None
@@ -0,0 +1,148 @@
+import threading
+from typing import Optional, Callable, Any, Dict
+
+from .tracing import span
+
+# Маркер "еще не определяли" (None — валидный результат: камеры нет)
+_UNSET = object()
+
+
+class AndroidBridge:
+    """Кэш JNI-объектов для AndroidUtils.
+
+    autoclass() — дорогой рефлексивный вызов, поэтому классы разрешаются один
+    раз. Activity, Window, CameraManager и id камеры тоже кэшируются и
+    сбрасываются через invalidate() при пересоздании Activity (on_resume).
+
+    Модуль jnius можно передать явно (например, подделку на десктопе),
+    иначе он импортируется при первом обращении.
+
+    Кэш заполняется и из фоновых потоков (проверка возможностей, шаблоны
+    фонарика), поэтому чтение и сброс кэшированных объектов идут под замком.
+    """
+
+    ACTIVITY_CLASS = 'org.kivy.android.PythonActivity'
+
+    def __init__(self, jnius_module: Any = None):
+        self._jnius = jnius_module
+        # Реентерабельный: camera_manager разрешает activity и autoclass под тем же замком
+        self._lock = threading.RLock()
+        self._classes: Dict[str, Any] = {}
+        self._runnable_class = None
+        # Runnable нужно удерживать, пока Java не вызовет run()
+        self._pending_runnables = set()
+        # Камера со вспышкой, найденная проверкой возможностей (переживает invalidate)
+        self._preferred_camera_id = _UNSET
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Сбрасывает объекты, привязанные к Activity (классы остаются в кэше)."""
+        with self._lock:
+            self._activity = None
+            self._window = None
+            self._camera_manager = None
+            self._camera_id = self._preferred_camera_id
+
+    # Классы
+    @property
+    def jnius(self) -> Any:
+        if self._jnius is None:
+            with self._lock:
+                if self._jnius is None:
+                    import jnius  # type: ignore
+                    self._jnius = jnius
+        return self._jnius
+
+    def autoclass(self, name: str) -> Any:
+        """Возвращает Java-класс, разрешая его через jnius только один раз."""
+        cls = self._classes.get(name)
+        if cls is None:
+            with self._lock:
+                cls = self._classes.get(name)
+                if cls is None:
+                    with span(f'autoclass:{name}', 'jni'):
+                        cls = self.jnius.autoclass(name)
+                    self._classes[name] = cls
+        return cls
+
+    def cast(self, name: str, obj: Any) -> Any:
+        return self.jnius.cast(name, obj)
+
+    # Объекты Activity
+    @property
+    def activity(self) -> Any:
+        with self._lock:
+            if self._activity is None:
+                with span('PythonActivity.mActivity', 'jni'):
+                    self._activity = self.autoclass(self.ACTIVITY_CLASS).mActivity
+            return self._activity
+
+    @property
+    def window(self) -> Any:
+        with self._lock:
+            if self._window is None:
+                with span('Activity.getWindow', 'jni'):
+                    self._window = self.activity.getWindow()
+            return self._window
+
+    @property
+    def camera_manager(self) -> Any:
+        with self._lock:
+            if self._camera_manager is None:
+                Context = self.autoclass('android.content.Context')
+                with span('Activity.getSystemService', 'jni'):
+                    service = self.activity.getSystemService(Context.CAMERA_SERVICE)
+                    self._camera_manager = self.cast('android.hardware.camera2.CameraManager', service)
+            return self._camera_manager
+
+    @property
+    def camera_id(self) -> Optional[str]:
+        """Id первой камеры (для фонарика) или None, если камер нет."""
+        with self._lock:
+            if self._camera_id is _UNSET:
+                manager = self.camera_manager
+                with span('CameraManager.getCameraIdList', 'jni'):
+                    ids = manager.getCameraIdList()
+                self._camera_id = ids[0] if ids and len(ids) > 0 else None
+            return self._camera_id
+
+    def set_camera_id(self, camera_id: Optional[str]) -> None:
+        """Задает id камеры заранее (из кэша возможностей), без getCameraIdList."""
+        with self._lock:
+            self._preferred_camera_id = camera_id
+            self._camera_id = camera_id
+
+    # UI-поток Android
+    def run_on_ui_thread(self, func: Callable[[], None]) -> None:
+        """Выполняет func на UI-потоке Android через Activity.runOnUiThread."""
+        runnable = self._get_runnable_class()(func, self._pending_runnables)
+        self._pending_runnables.add(runnable)
+        try:
+            self.activity.runOnUiThread(runnable)
+        except Exception:
+            # Java не вызовет run() — иначе Runnable остался бы в наборе навсегда
+            self._pending_runnables.discard(runnable)
+            raise
+
+    def _get_runnable_class(self):
+        if self._runnable_class is None:
+            PythonJavaClass = self.jnius.PythonJavaClass
+            java_method = self.jnius.java_method
+
+            class _Runnable(PythonJavaClass):
+                __javainterfaces__ = ['java/lang/Runnable']
+
+                def __init__(self, func: Callable[[], None], pending: set):
+                    super().__init__()
+                    self._func = func
+                    self._pending = pending
+
+                @java_method('()V')
+                def run(self) -> None:
+                    try:
+                        self._func()
+                    finally:
+                        self._pending.discard(self)
+
+            self._runnable_class = _Runnable
+        return self._runnable_class
@@ -1,15 +1,25 @@
-from typing import Optional, Callable
+from typing import Optional, Any
 from kivy.utils import platform as kivy_platform
 
-try:
-    from plyer import flashlight as plyer_flashlight  # type: ignore
-except Exception:
-    plyer_flashlight = None  # type: ignore
+from .android_bridge import AndroidBridge
+from .brightness_controller import BrightnessController
+from .flashlight_patterns import FlashlightPatternPlayer, Pattern
+from .tracing import traced, span
 
-try:
-    from plyer import brightness as plyer_brightness  # type: ignore
-except Exception:
-    plyer_brightness = None  # type: ignore
+# Фасады plyer импортируются при первом обращении: на десктопе они часто недоступны,
+# а импорт при загрузке модуля замедляет старт приложения
+_plyer_facades = {}
+
+
+def _get_plyer(name: str) -> Any:
+    """Возвращает фасад plyer (flashlight/brightness/notification) или None, если он недоступен."""
+    if name not in _plyer_facades:
+        try:
+            import plyer  # type: ignore
+            _plyer_facades[name] = getattr(plyer, name)
+        except Exception:
+            _plyer_facades[name] = None
+    return _plyer_facades[name]
 
 
 class AndroidUtils:
@@ -21,14 +31,32 @@ class AndroidUtils:
     Все изменения яркости выполняются на UI-потоке Android для предотвращения crashes.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, bridge: Optional[AndroidBridge] = None) -> None:
+        # Кэш JNI-классов, Activity и окна (см. AndroidBridge)
+        self.bridge = bridge or AndroidBridge()
+        # Все изменения яркости из UI идут через очередь с ограничением частоты JNI-вызовов
+        self.brightness_controller = BrightnessController(self._apply_brightness)
         self._flashlight_on: bool = False
+        # Возможности устройства из кэша CapabilityProber (пусто, пока неизвестны)
+        self.capabilities: dict = {}
+        self.capability_listener = None
+        # Шаблоны мигания (SOS, стробоскоп, Морзе) играются в отдельном потоке
+        self.pattern_player = FlashlightPatternPlayer(
+            self.set_torch,
+            on_thread_exit=self._detach_jni_thread if kivy_platform == 'android' else None,
+        )
         # Сохраняем исходное значение яркости окна: >0.0 явное значение, -1.0 означает "по умолчанию"
         self._original_brightness: Optional[float] = None
 
     # Flashlight
+    @traced(cat='jni')
     def toggle_flashlight(self) -> bool:
         """Переключает фонарик. Сначала пробует Plyer, затем CameraManager."""
+        if self.pattern_player.is_playing():
+            # Нажатие во время мигания — просто останавливаем шаблон
+            self.stop_flashlight_pattern()
+            return False
+        plyer_flashlight = _get_plyer('flashlight')
         # Try plyer first
         if plyer_flashlight is not None:
             try:
@@ -40,33 +68,26 @@ class AndroidUtils:
                     self._flashlight_on = True
                 return self._flashlight_on
             except Exception as e:
-                import traceback
-                error_details = f"Plyer flashlight error:\n{type(e).__name__}: {e}\n{traceback.format_exc()}"
-                self._show_error(error_details)
+                self._show_error("Plyer flashlight error", e)
         # Fallback to CameraManager on Android
         if kivy_platform == 'android':
             try:
-                from jnius import autoclass, cast
-                PythonActivity = autoclass('org.kivy.android.PythonActivity')
-                Context = autoclass('android.content.Context')
-                CameraManager = autoclass('android.hardware.camera2.CameraManager')
-                activity = PythonActivity.mActivity
-                cam_service = activity.getSystemService(Context.CAMERA_SERVICE)
-                cam_manager = cast('android.hardware.camera2.CameraManager', cam_service)
-                ids = cam_manager.getCameraIdList()
-                if ids and len(ids) > 0:
-                    cam_id = ids[0]
+                cam_id = self.bridge.camera_id
+                if cam_id is not None:
+                    cam_manager = self.bridge.camera_manager
                     self._flashlight_on = not self._flashlight_on
                     cam_manager.setTorchMode(cam_id, bool(self._flashlight_on))
                     return self._flashlight_on
             except Exception as e:
-                import traceback
-                error_details = f"Android flashlight error:\n{type(e).__name__}: {e}\n{traceback.format_exc()}"
-                self._show_error(error_details)
+                # Кэш мог устареть (например, после пересоздания Activity)
+                self.bridge.invalidate()
+                self._show_error("Android flashlight error", e)
         return self._flashlight_on
 
     def turn_off_flashlight(self) -> None:
         """Выключает фонарик принудительно."""
+        self.pattern_player.stop()
+        plyer_flashlight = _get_plyer('flashlight')
         if plyer_flashlight is None:
             return
         try:
@@ -79,40 +100,79 @@ class AndroidUtils:
         """Проверяет, включен ли фонарик."""
         return self._flashlight_on
 
-    # Brightness
-    def set_brightness(self, value: float) -> None:
-        """Устанавливает яркость экрана (app-level на Android)."""
-        value = max(0.05, min(1.0, value))
-        # Prefer app-level brightness on Android via pyjnius
+    @traced(cat='jni')
+    def set_torch(self, on: bool) -> None:
+        """Явно включает/выключает фонарик (используется проигрывателем шаблонов)."""
+        plyer_flashlight = _get_plyer('flashlight')
         if kivy_platform == 'android':
-            try:
-                from jnius import autoclass, cast
-                PythonActivity = autoclass('org.kivy.android.PythonActivity')
-                WindowManager_LayoutParams = autoclass('android.view.WindowManager$LayoutParams')
-                activity = PythonActivity.mActivity
-                window = activity.getWindow()
-                lp = window.getAttributes()
-                lp.screenBrightness = float(value)
-                window.setAttributes(lp)
+            cam_id = self.bridge.camera_id
+            if cam_id is not None:
+                self.bridge.camera_manager.setTorchMode(cam_id, bool(on))
+                self._flashlight_on = bool(on)
                 return
-            except Exception:
-                pass
-        # Fallback to plyer brightness
-        if plyer_brightness is not None:
+        if plyer_flashlight is not None:
+            if on:
+                plyer_flashlight.on()
+            else:
+                plyer_flashlight.off()
+            self._flashlight_on = bool(on)
+
+    def play_flashlight_pattern(self, pattern: Pattern, loop: bool = False, name: str = "pattern") -> None:
+        """Запускает шаблон мигания фонарика."""
+        if kivy_platform == 'android':
+            # Разрешаем CameraManager на UI-потоке, чтобы поток шаблона не делал рефлексию
             try:
-                plyer_brightness.set_level(value)
-            except Exception:
-                pass
+                self.bridge.camera_id
+            except Exception as e:
+                self.bridge.invalidate()
+                self._show_error("Android flashlight error", e)
+                return
+        self.pattern_player.play(pattern, loop=loop, name=name)
+
+    def stop_flashlight_pattern(self) -> None:
+        """Останавливает шаблон; фонарик после этого выключен."""
+        self.pattern_player.stop()
+        self._flashlight_on = False
 
+    def is_pattern_playing(self) -> bool:
+        return self.pattern_player.is_playing()
+
+    # Notifications
+    @traced(cat='jni')
+    def notify(self, title: str, message: str) -> bool:
+        """Системное уведомление; False, если показать его нечем."""
+        plyer_notification = _get_plyer('notification')
+        if plyer_notification is None:
+            return False
+        try:
+            plyer_notification.notify(title=title, message=message, app_name='Заметки')
+            return True
+        except Exception as e:
+            from kivy.logger import Logger
+            Logger.warning(f"AndroidUtils: Notification failed: {e}")
+            return False
+
+    def _detach_jni_thread(self) -> None:
+        # Поток, обращавшийся к Java, должен отсоединиться от JVM перед завершением
+        try:
+            self.bridge.jnius.detach()
+        except Exception:
+            pass
+
+    # Brightness
+    def set_brightness(self, value: float) -> None:
+        """Устанавливает яркость экрана сразу (app-level на Android)."""
+        # Через контроллер: он отменяет плавный переход и запоминает примененный
+        # уровень, иначе следующий set_target/ramp_to исходил бы из устаревшего значения
+        self.brightness_controller.apply_now(max(0.05, min(1.0, value)))
+
+    @traced(cat='jni')
     def get_brightness(self) -> Optional[float]:
         """Получает текущую яркость экрана."""
+        plyer_brightness = _get_plyer('brightness')
         if kivy_platform == 'android':
             try:
-                from jnius import autoclass
-                PythonActivity = autoclass('org.kivy.android.PythonActivity')
-                activity = PythonActivity.mActivity
-                window = activity.getWindow()
-                lp = window.getAttributes()
+                lp = self.bridge.window.getAttributes()
                 if lp.screenBrightness > 0:
                     return float(lp.screenBrightness)
             except Exception:
@@ -133,14 +193,15 @@ class AndroidUtils:
             if self._original_brightness is None:
                 # Запоминаем текущее состояние окна: если не задано (<=0), помечаем как -1.0 (дефолт)
                 self._original_brightness = self._get_current_window_brightness_marker()
-                self._set_brightness_android_or_plyer(1.0, allow_default=False)
+                start = self._original_brightness if self._original_brightness > 0 else self.get_brightness()
                 # Если не получилось и устройство требует системное разрешение — предложим его выдать
-                if kivy_platform == 'android' and not self._is_app_brightness_effective():
-                    self._request_write_settings_permission()
+                on_complete = self._check_brightness_effective if kivy_platform == 'android' else None
+                self._set_brightness_android_or_plyer(1.0, allow_default=False, ramp=True,
+                                                      start=start, on_complete=on_complete)
                 return True
             else:
                 # Восстанавливаем: поддерживаем -1.0 как "снять оверрайд"
-                self._set_brightness_android_or_plyer(self._original_brightness, allow_default=True)
+                self._set_brightness_android_or_plyer(self._original_brightness, allow_default=True, ramp=True)
                 self._original_brightness = None
                 return False
         except Exception:
@@ -151,64 +212,57 @@ class AndroidUtils:
         return self.toggle_brightness_max()
 
     # Internal
-    def _set_brightness_android_or_plyer(self, value: float, allow_default: bool = False) -> None:
+    def _set_brightness_android_or_plyer(self, value: float, allow_default: bool = False, ramp: bool = False,
+                                         start: Optional[float] = None, on_complete=None) -> None:
         # Если разрешаем default и передано < 0 — снимаем оверрайд (устанавливаем -1)
         if allow_default and value < 0:
-            pass  # передадим как -1.0 ниже
+            value = -1.0
         else:
             value = max(0.05, min(1.0, value))
+        # Команда ставится в очередь: применится только последнее значение, не чаще max_rate в секунду
+        if ramp:
+            self.brightness_controller.ramp_to(value, start=start, on_complete=on_complete)
+        else:
+            self.brightness_controller.set_target(value)
+
+    @traced(cat='jni')
+    def _apply_brightness(self, value: float) -> None:
+        """Фактически применяет яркость (вызывается BrightnessController)."""
+        plyer_brightness = _get_plyer('brightness')
         if kivy_platform == 'android':
             # Используем только app-level яркость (не требует разрешений)
             try:
-                from jnius import autoclass, PythonJavaClass, java_method
-
-                PythonActivity = autoclass('org.kivy.android.PythonActivity')
-                activity = PythonActivity.mActivity
+                window = self.bridge.window
 
                 # Выполним изменение яркости на UI-потоке Android
                 def _apply():
-                    window = activity.getWindow()
-                    lp = window.getAttributes()
-                    lp.screenBrightness = float(-1.0 if (allow_default and value < 0) else value)
-                    window.setAttributes(lp)
-
-                class _Runnable(PythonJavaClass):
-                    __javainterfaces__ = ['java/lang/Runnable']
-                    def __init__(self, func: Callable[[], None]):
-                        super().__init__()
-                        self._func = func
-                    @java_method('()V')
-                    def run(self) -> None:
-                        self._func()
-
-                activity.runOnUiThread(_Runnable(_apply))
+                    with span('Window.setAttributes', 'jni'):
+                        lp = window.getAttributes()
+                        lp.screenBrightness = float(value)
+                        window.setAttributes(lp)
+
+                self.bridge.run_on_ui_thread(_apply)
                 return
             except Exception as e:
-                import traceback
-                error_details = f"Android app-level brightness error:\n{type(e).__name__}: {e}\n{traceback.format_exc()}"
-                self._show_error(error_details)
+                self.bridge.invalidate()
+                self._show_error("Android app-level brightness error", e)
 
             # На Android не падаем к plyer, чтобы не ловить WRITE_SETTINGS ошибки
             return
 
         # На не-Android платформах можно попробовать plyer
-        if plyer_brightness is not None and kivy_platform != 'android':
+        if plyer_brightness is not None and value > 0:
             try:
                 plyer_brightness.set_level(value)
             except Exception as e:
-                import traceback
-                error_details = f"Plyer brightness error:\n{type(e).__name__}: {e}\n{traceback.format_exc()}"
-                self._show_error(error_details)
+                self._show_error("Plyer brightness error", e)
 
+    @traced(cat='jni')
     def _get_current_window_brightness_marker(self) -> float:
         """Возвращает текущее значение яркости окна: >0.0 или -1.0 если используется системное по умолчанию."""
         if kivy_platform == 'android':
             try:
-                from jnius import autoclass
-                PythonActivity = autoclass('org.kivy.android.PythonActivity')
-                activity = PythonActivity.mActivity
-                window = activity.getWindow()
-                lp = window.getAttributes()
+                lp = self.bridge.window.getAttributes()
                 if lp.screenBrightness and lp.screenBrightness > 0:
                     return float(lp.screenBrightness)
                 return -1.0
@@ -221,56 +275,86 @@ class AndroidUtils:
         """Восстанавливает исходную яркость, если до этого было включено максимальное значение."""
         try:
             if self._original_brightness is not None:
-                self._set_brightness_android_or_plyer(self._original_brightness, allow_default=True)
+                # Вызывается при выходе — применяем сразу, без очереди
+                value = self._original_brightness
+                self.brightness_controller.apply_now(value if value < 0 else max(0.05, min(1.0, value)))
                 self._original_brightness = None
         except Exception:
             self._original_brightness = None
 
     def has_brightness(self) -> bool:
         """Проверяет, доступна ли функция яркости."""
-        return plyer_brightness is not None
+        if self.capabilities.get('brightness') is not None:
+            return bool(self.capabilities['brightness'])
+        return _get_plyer('brightness') is not None
 
     def has_flashlight(self) -> bool:
         """Проверяет, доступен ли фонарик."""
-        return plyer_flashlight is not None
+        if self.capabilities.get('torch') is not None:
+            return bool(self.capabilities['torch'])
+        return _get_plyer('flashlight') is not None
 
-    def _show_error(self, message: str) -> None:
-        """Показывает ошибку в GUI вместо print."""
-        try:
-            from .debug_utils import show_error_popup
-            show_error_popup("Ошибка Android", message)
-        except Exception:
-            # Если не можем показать GUI, хотя бы в лог
-            from kivy.logger import Logger
-            Logger.error(f"AndroidUtils: {message}")
+    def apply_capabilities(self, capabilities: dict) -> None:
+        """Принимает результаты проверки возможностей (из кэша или свежие)."""
+        self.capabilities = capabilities
+        if kivy_platform == 'android' and capabilities.get('camera_id') is not None:
+            self.bridge.set_camera_id(capabilities['camera_id'])
+
+    def on_activity_recreated(self) -> None:
+        """Сбрасывает кэш Activity/Window (вызывается при возобновлении приложения)."""
+        self.bridge.invalidate()
+
+    @traced(cat='jni')
+    def finish_activity(self) -> None:
+        """Закрывает Activity на Android."""
+        if kivy_platform == 'android':
+            self.bridge.activity.finish()
+
+    def _show_error(self, title: str, exc: Optional[BaseException] = None) -> None:
+        """Сообщает об ошибке: повторы группируются, сводка показывается не чаще раза в интервал."""
+        from .error_collector import report_error
+        report_error(title, exc)
 
     # ---- Helpers for WRITE_SETTINGS special permission ----
-    def _is_app_brightness_effective(self) -> bool:
-        """Проверяет, влияет ли изменение app-level яркости (грубая эвристика)."""
+    def _is_app_brightness_effective(self, expected: float = 1.0) -> bool:
+        """Проверяет, применилась ли app-level яркость (одно чтение, без пробных установок)."""
         try:
             if kivy_platform != 'android':
                 return True
-            before = self.get_brightness() or 0.5
-            target = 1.0 if before < 0.9 else 0.2
-            self.set_brightness(target)
-            after = self.get_brightness() or target
-            # Вернем обратно
-            self.set_brightness(before)
-            return abs(after - target) < 0.05
+            level = self.get_brightness()
+            return level is not None and abs(level - expected) < 0.05
         except Exception:
             return False
 
+    def _check_brightness_effective(self) -> None:
+        # setAttributes выполняется на UI-потоке Android асинхронно — проверяем чуть позже
+        from kivy.clock import Clock
+
+        if self.capabilities.get('app_brightness') is True:
+            # Уже известно, что app-level яркость работает на этом устройстве
+            return
+
+        def _check(dt):
+            if self._original_brightness is None:
+                return
+            effective = self._is_app_brightness_effective(1.0)
+            if self.capability_listener is not None:
+                self.capability_listener('app_brightness', effective)
+            if not effective:
+                self._request_write_settings_permission()
+
+        Clock.schedule_once(_check, 0.2)
+
+    @traced(cat='jni')
     def _request_write_settings_permission(self) -> None:
         """Открывает системный экран для выдачи WRITE_SETTINGS (если требуется)."""
         try:
             if kivy_platform != 'android':
                 return
-            from jnius import autoclass, cast
-            PythonActivity = autoclass('org.kivy.android.PythonActivity')
-            Settings = autoclass('android.provider.Settings')
-            Intent = autoclass('android.content.Intent')
-            Uri = autoclass('android.net.Uri')
-            activity = PythonActivity.mActivity
+            Settings = self.bridge.autoclass('android.provider.Settings')
+            Intent = self.bridge.autoclass('android.content.Intent')
+            Uri = self.bridge.autoclass('android.net.Uri')
+            activity = self.bridge.activity
             pkg = activity.getPackageName()
             if not Settings.System.canWrite(activity):
                 uri = Uri.parse(f"package:{pkg}")
@@ -284,8 +368,6 @@ class AndroidUtils:
                 except Exception:
                     pass
         except Exception as e:
-            import traceback
-            error_details = f"WRITE_SETTINGS intent error:\n{type(e).__name__}: {e}\n{traceback.format_exc()}"
-            self._show_error(error_details)
+            self._show_error("WRITE_SETTINGS intent error", e)
 
 
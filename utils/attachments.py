@@ -0,0 +1,77 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Iterable, List, Optional
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+class AttachmentStore:
+    """Файлы вложений заметок в отдельном каталоге.
+
+    В записи заметки хранится только имя файла ("attachments": [...]), сами
+    изображения в notes.json не попадают. Имя уникально и не меняется, поэтому
+    по нему можно кэшировать миниатюры.
+    """
+
+    def __init__(self, base_dir: str = "attachments"):
+        self.base_dir = base_dir
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.base_dir, name)
+
+    def add(self, note_id: int, source_path: str) -> str:
+        """Копирует файл в хранилище и возвращает имя вложения."""
+        ext = os.path.splitext(source_path)[1].lower()
+        if ext not in IMAGE_EXTENSIONS:
+            raise ValueError(f"Unsupported attachment type: {ext or source_path}")
+        os.makedirs(self.base_dir, exist_ok=True)
+        name = f"{note_id}_{uuid.uuid4().hex[:12]}{ext}"
+        tmp_path = self.path(name) + ".tmp"
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, self.path(name))
+        return name
+
+    def remove(self, names: Iterable[str]) -> None:
+        for name in names:
+            try:
+                os.remove(self.path(name))
+            except OSError:
+                pass
+
+    def collect_garbage(self, referenced: Iterable[str], in_background: bool = True) -> Optional[threading.Thread]:
+        """Удаляет файлы, на которые не ссылается ни одна заметка.
+
+        Набор ссылок снимается в момент вызова; файлы, появившиеся позже
+        (вложение добавили, пока шла очистка), не трогаются.
+        """
+        referenced = set(referenced)
+        started = time.time()
+        if not in_background:
+            self._collect(referenced, started)
+            return None
+        thread = threading.Thread(target=self._collect, args=(referenced, started),
+                                  name="AttachmentGC", daemon=True)
+        thread.start()
+        return thread
+
+    # Internal
+    def _collect(self, referenced, started: float) -> List[str]:
+        removed = []
+        try:
+            names = os.listdir(self.base_dir)
+        except OSError:
+            return removed
+        for name in names:
+            if name in referenced:
+                continue
+            path = self.path(name)
+            try:
+                if os.path.getmtime(path) < started:
+                    os.remove(path)
+                    removed.append(name)
+            except OSError:
+                pass
+        return removed
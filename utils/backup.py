@@ -0,0 +1,225 @@
+"""
+Резервные копии заметок: цепочка zip-архивов с манифестом хэшей.
+
+В каждом архиве две записи: notes.jsonl — заметки по одной на строку — и
+manifest.json — хэш и updated_at каждой заметки на момент копии. Следующая
+копия сравнивает хэши с манифестом предыдущей и пишет только изменившиеся
+заметки (инкрементальная копия ссылается на предыдущую через "base"); каждая
+full_every-я копия — полная, чтобы цепочка для восстановления не росла.
+Восстановление идет от выбранной копии к полной и берет каждую заметку из
+самого нового архива, где она есть; хэш каждой строки сверяется с манифестом.
+
+Заметки пишутся в архив потоково, строка за строкой; архив целиком в памяти
+не собирается. Запись и чтение выполняются в фоновом потоке.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import zipfile
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+MANIFEST = "manifest.json"
+NOTES = "notes.jsonl"
+PREFIX = "backup-"
+SUFFIX = ".zip"
+FORMAT_VERSION = 1
+
+# Один кодировщик на все записи: json.dumps с параметрами создает новый на каждый вызов
+_ENCODER = json.JSONEncoder(ensure_ascii=False, sort_keys=True)
+
+
+class BackupError(Exception):
+    pass
+
+
+def record_line(record: Dict[str, Any]) -> bytes:
+    """Каноничная строка заметки (ключи по алфавиту) — по ней считается хэш."""
+    return _ENCODER.encode(record).encode('utf-8')
+
+
+def line_hash(line: bytes) -> str:
+    return hashlib.blake2b(line, digest_size=16).hexdigest()
+
+
+class BackupManager:
+    """Создание, список и восстановление резервных копий в каталоге backup_dir."""
+
+    def __init__(self, backup_dir: str = "backups", full_every: int = 10):
+        self.backup_dir = backup_dir
+        self.full_every = full_every
+        # Манифест последней копии: следующей не нужно читать его с диска
+        self._last_manifest: Optional[Tuple[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.backup_dir, name)
+
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """Сводки копий, новые первыми: name, created_at, kind, notes, written, base."""
+        try:
+            names = [n for n in os.listdir(self.backup_dir) if n.startswith(PREFIX) and n.endswith(SUFFIX)]
+        except OSError:
+            return []
+        result = []
+        for name in sorted(names, reverse=True):
+            try:
+                with zipfile.ZipFile(self.path(name)) as zf:
+                    summary = json.loads(zf.comment.decode('utf-8'))
+            except (OSError, zipfile.BadZipFile, ValueError):
+                continue
+            summary["name"] = name
+            result.append(summary)
+        return result
+
+    def latest(self) -> Optional[str]:
+        try:
+            names = [n for n in os.listdir(self.backup_dir) if n.startswith(PREFIX) and n.endswith(SUFFIX)]
+        except OSError:
+            return None
+        return max(names) if names else None
+
+    def create(self, records: Iterable[Dict[str, Any]], encryption: Optional[Dict[str, Any]] = None,
+               full: bool = False) -> Dict[str, Any]:
+        """Пишет копию и возвращает ее сводку.
+
+        records — записи заметок (с ключом "id"); encryption — заголовок
+        зашифрованного хранилища или None. Копия полная, если предыдущей нет,
+        цепочка достигла full_every или сменился ключ шифрования.
+        """
+        with self._lock:
+            return self._create(records, encryption, full)
+
+    def restore(self, name: str) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Заметки на момент копии name (в исходном порядке) и заголовок шифрования."""
+        manifest = self._read_manifest(name)
+        target = manifest["notes"]
+        # Нужна ровно та версия заметки, хэш которой записан в манифесте:
+        # устаревшие версии из старых архивов отсеиваются по хэшу, без разбора JSON
+        wanted = {entry[0]: key for key, entry in target.items()}
+        found: Dict[str, Dict[str, Any]] = {}
+        archive: Optional[str] = name
+        while archive is not None and wanted:
+            with zipfile.ZipFile(self.path(archive)) as zf:
+                base = json.loads(zf.read(MANIFEST)).get("base")
+                with zf.open(NOTES) as stream:
+                    for raw in stream:
+                        key = wanted.pop(line_hash(raw.rstrip(b'\n')), None)
+                        if key is not None:
+                            found[key] = json.loads(raw)
+            archive = base
+        missing = [key for key in target if key not in found]
+        if missing:
+            raise BackupError(f"Backup chain of {name} is missing {len(missing)} notes")
+        return [found[key] for key in target], manifest.get("encryption")
+
+    def create_async(self, records, encryption=None,
+                     on_done: Optional[Callable[[Optional[Dict[str, Any]], Optional[Exception]], None]] = None,
+                     full: bool = False) -> threading.Thread:
+        """create() в фоновом потоке; on_done(сводка, ошибка) вызывается на UI-потоке."""
+        return self._run_async("BackupWriter", lambda: self.create(records, encryption, full), on_done)
+
+    def restore_async(self, name: str, on_done: Callable[[Optional[Tuple], Optional[Exception]], None]) -> threading.Thread:
+        """restore() в фоновом потоке; on_done((записи, шифрование), ошибка) — на UI-потоке."""
+        return self._run_async("BackupReader", lambda: self.restore(name), on_done)
+
+    # Internal
+    def _run_async(self, thread_name, func, on_done):
+        def run():
+            try:
+                result, error = func(), None
+            except Exception as e:
+                result, error = None, e
+            if on_done is not None:
+                from kivy.clock import Clock
+                Clock.schedule_once(lambda dt: on_done(result, error), 0)
+        thread = threading.Thread(target=run, name=thread_name, daemon=True)
+        thread.start()
+        return thread
+
+    def _read_manifest(self, name: str) -> Dict[str, Any]:
+        if self._last_manifest is not None and self._last_manifest[0] == name:
+            return self._last_manifest[1]
+        try:
+            with zipfile.ZipFile(self.path(name)) as zf:
+                manifest = json.loads(zf.read(MANIFEST))
+        except (OSError, KeyError, zipfile.BadZipFile, ValueError) as e:
+            raise BackupError(f"Cannot read backup {name}: {e}")
+        if manifest.get("version") != FORMAT_VERSION:
+            raise BackupError(f"Unsupported backup version in {name}: {manifest.get('version')}")
+        return manifest
+
+    def _new_name(self, now: datetime) -> str:
+        stamp = now.strftime('%Y%m%d-%H%M%S')
+        counter = 0
+        # Имена сортируются по времени; копии в одну секунду различаются номером
+        while True:
+            name = f"{PREFIX}{stamp}-{counter:02d}{SUFFIX}"
+            if not os.path.exists(self.path(name)):
+                return name
+            counter += 1
+
+    def _create(self, records, encryption, full) -> Dict[str, Any]:
+        previous_name = self.latest()
+        previous = None
+        if previous_name is not None and not full:
+            try:
+                previous = self._read_manifest(previous_name)
+            except BackupError:
+                previous = None  # испорченную копию не продолжаем — пишем полную
+        if previous is not None:
+            key_changed = (previous.get("encryption") or {}).get("kdf") != (encryption or {}).get("kdf")
+            if key_changed or previous.get("depth", 0) + 1 >= self.full_every:
+                previous = None
+        old_notes = previous["notes"] if previous else {}
+
+        os.makedirs(self.backup_dir, exist_ok=True)
+        now = datetime.now()
+        name = self._new_name(now)
+        notes: Dict[str, List[Any]] = {}
+        written = 0
+        tmp_path = self.path(name) + ".tmp"
+        try:
+            # Уровень 1 сжимает текст заметок почти так же, но в разы быстрее уровня 6
+            with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+                with zf.open(NOTES, 'w', force_zip64=True) as stream:
+                    for record in records:
+                        line = record_line(record)
+                        digest = line_hash(line)
+                        key = str(record["id"])
+                        notes[key] = [digest, record.get("updated_at")]
+                        old = old_notes.get(key)
+                        if old is not None and old[0] == digest:
+                            continue
+                        stream.write(line + b'\n')
+                        written += 1
+                manifest = {
+                    "version": FORMAT_VERSION,
+                    "created_at": now.isoformat(),
+                    "base": previous_name if previous else None,
+                    "depth": previous.get("depth", 0) + 1 if previous else 0,
+                    "encryption": encryption,
+                    "notes": notes,
+                }
+                zf.writestr(MANIFEST, json.dumps(manifest, ensure_ascii=False))
+                summary = {
+                    "created_at": manifest["created_at"],
+                    "kind": "incremental" if previous else "full",
+                    "base": manifest["base"],
+                    "notes": len(notes),
+                    "written": written,
+                    "encrypted": encryption is not None,
+                }
+                zf.comment = json.dumps(summary).encode('utf-8')
+            os.replace(tmp_path, self.path(name))
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._last_manifest = (name, manifest)
+        summary["name"] = name
+        return summary
@@ -0,0 +1,118 @@
+import time
+from typing import Callable, Optional
+
+
+class BrightnessController:
+    """Очередь команд яркости, хранящая только последнее целевое значение.
+
+    Частые запросы (переключения, будущий слайдер) схлопываются: до применения
+    доживает только последнее значение, а apply_func (JNI-вызов) выполняется
+    не чаще max_rate раз в секунду. Плавный переход ramp_to() обновляет
+    яркость с той же фиксированной частотой.
+    """
+
+    def __init__(self, apply_func: Callable[[float], None], max_rate: float = 30.0,
+                 clock=None, time_func: Callable[[], float] = time.monotonic):
+        self.apply_func = apply_func
+        self.max_rate = max_rate
+        self._clock = clock
+        self._time = time_func
+        self._target: Optional[float] = None
+        self._applied: Optional[float] = None
+        self._last_apply = float('-inf')
+        self._flush_event = None
+        self._ramp_event = None
+        self._ramp = None
+        self.apply_count = 0
+
+    @property
+    def clock(self):
+        if self._clock is None:
+            from kivy.clock import Clock
+            self._clock = Clock
+        return self._clock
+
+    @property
+    def level(self) -> Optional[float]:
+        """Последнее запрошенное (или примененное) значение яркости."""
+        return self._target if self._target is not None else self._applied
+
+    def set_target(self, value: float) -> None:
+        """Запрашивает яркость value; прерывает текущий плавный переход."""
+        self._cancel_ramp()
+        self._request(value)
+
+    def ramp_to(self, target: float, duration: float = 0.3, start: Optional[float] = None,
+                on_complete: Optional[Callable[[], None]] = None) -> None:
+        """Плавно меняет яркость от текущего уровня (или start) до target."""
+        self._cancel_ramp()
+        if start is None:
+            start = self.level
+        if start is None or start < 0 or target < 0 or duration <= 0:
+            # Неизвестный исходный уровень или "системная яркость" — без анимации
+            self._request(target)
+            self._ramp = (target, target, self._time(), 0.0, on_complete)
+            return
+        self._ramp = (start, target, self._time(), duration, on_complete)
+        self._ramp_event = self.clock.schedule_interval(self._ramp_tick, 1.0 / self.max_rate)
+        self._ramp_tick(0)
+
+    def apply_now(self, value: float) -> None:
+        """Применяет значение немедленно (при паузе/выходе, когда кадров больше не будет)."""
+        self.cancel()
+        self._apply(value)
+
+    def cancel(self) -> None:
+        """Отменяет переход и ожидающее применение."""
+        self._cancel_ramp()
+        if self._flush_event is not None:
+            self._flush_event.cancel()
+            self._flush_event = None
+        self._target = None
+
+    # Internal
+    def _request(self, value: float) -> None:
+        self._target = value
+        if self._flush_event is not None:
+            return
+        # Не чаще max_rate применений в секунду, но не раньше следующего кадра
+        delay = max(0.0, self._last_apply + 1.0 / self.max_rate - self._time())
+        self._flush_event = self.clock.schedule_once(self._flush, delay)
+
+    def _flush(self, dt) -> None:
+        self._flush_event = None
+        value = self._target
+        self._target = None
+        if value is not None and value != self._applied:
+            self._apply(value)
+        if self._ramp is not None and self._ramp_event is None:
+            # Переход закончен и его последнее значение применено
+            on_complete = self._ramp[4]
+            self._ramp = None
+            if on_complete is not None:
+                on_complete()
+
+    def _apply(self, value: float) -> None:
+        self._applied = value
+        self._last_apply = self._time()
+        self.apply_count += 1
+        self.apply_func(value)
+
+    def _ramp_tick(self, dt) -> bool:
+        if self._ramp is None:
+            return False
+        start, target, started_at, duration, _ = self._ramp
+        progress = min(1.0, (self._time() - started_at) / duration)
+        self._request(start + (target - start) * progress)
+        if progress >= 1.0:
+            if self._ramp_event is not None:
+                self._ramp_event.cancel()
+                self._ramp_event = None
+            return False
+        return True
+
+    def _cancel_ramp(self) -> None:
+        if self._ramp_event is not None:
+            self._ramp_event.cancel()
+            self._ramp_event = None
+        self._ramp = None
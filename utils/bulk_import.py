@@ -0,0 +1,196 @@
+"""
+Импорт каталога текстовых файлов (.txt, .md) как заметок.
+
+Файлы читаются и разбираются пулом потоков (чтение файла отпускает GIL),
+пачками по chunk_size; одновременно в работе не больше window пачек, так что
+в памяти держатся только готовые записи заметок, а не содержимое всех
+файлов сразу. Готовые записи передаются в DataManager.import_notes() одним
+списком — notes.json записывается один раз на весь импорт.
+
+Заголовок заметки — первая строка Markdown вида "# Заголовок" или имя файла;
+папка — путь подкаталога относительно корня импорта; теги берутся из строки
+"tags:" в заголовочном блоке "---" (front matter), если он есть. Скрытые
+файлы и каталоги (имя начинается с точки) пропускаются.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .tag_index import parse_tags
+
+EXTENSIONS = (".txt", ".md", ".markdown")
+# Файлы больше этого пропускаются: в заметку такой текст все равно не поместится удобно
+MAX_FILE_BYTES = 1024 * 1024
+CHUNK_SIZE = 64
+# Прогресс сообщается не чаще, чем раз в столько секунд
+PROGRESS_INTERVAL = 0.1
+
+
+def find_files(root: str) -> List[str]:
+    """Пути файлов с расширениями EXTENSIONS в дереве root, по алфавиту внутри каталога."""
+    result = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.lower().endswith(EXTENSIONS) and entry.is_file():
+                result.append(entry.path)
+        stack.extend(reversed(subdirs))
+    return result
+
+
+def _front_matter(text: str) -> Tuple[Dict[str, str], str]:
+    """Поля заголовочного блока "---" (только "ключ: значение") и текст после него."""
+    if not text.startswith("---\n"):
+        return {}, text
+    end = text.find("\n---", 4)
+    if end < 0:
+        return {}, text
+    fields = {}
+    for line in text[4:end].splitlines():
+        key, sep, value = line.partition(":")
+        if sep:
+            fields[key.strip().lower()] = value.strip()
+    rest = text[end + 4:]
+    return fields, rest[rest.find("\n") + 1:] if "\n" in rest else ""
+
+
+def parse_file(path: str, root: str) -> Optional[Dict[str, Any]]:
+    """Запись заметки из файла или None, если файл не читается или слишком большой."""
+    try:
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if st.st_size > MAX_FILE_BYTES:
+                return None
+            data = f.read()
+    except OSError:
+        return None
+    text = data.decode('utf-8-sig', errors='replace').replace('\r\n', '\n')
+    name, ext = os.path.splitext(os.path.basename(path))
+    title = name
+    tags: List[str] = []
+    if ext.lower() != ".txt":
+        fields, text = _front_matter(text)
+        if fields.get("tags"):
+            tags = parse_tags(fields["tags"].strip("[]"))
+        if fields.get("title"):
+            title = fields["title"].strip('"\'')
+        else:
+            stripped = text.lstrip('\n')
+            first, _, rest = stripped.partition('\n')
+            if first.startswith('# '):
+                title, text = first[2:].strip(), rest
+    modified = datetime.fromtimestamp(st.st_mtime).isoformat()
+    record = {"title": title, "content": text.strip(), "created_at": modified, "updated_at": modified}
+    folder = os.path.relpath(os.path.dirname(path), root)
+    if folder != os.curdir:
+        record["folder"] = folder.replace(os.sep, "/")
+    if tags:
+        record["tags"] = tags
+    return record
+
+
+def _parse_chunk(paths: List[str], root: str) -> List[Optional[Dict[str, Any]]]:
+    return [parse_file(path, root) for path in paths]
+
+
+class BulkImporter:
+    """Чтение дерева файлов root в записи заметок пулом из workers потоков.
+
+    on_progress(progress) получает словарь total, done, imported, skipped;
+    вызывается в потоке run() не чаще PROGRESS_INTERVAL (и в конце).
+    """
+
+    def __init__(self, root: str, workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE,
+                 on_progress: Optional[Callable[[Dict[str, int]], None]] = None):
+        self.root = os.path.abspath(root)
+        self.workers = workers or min(8, (os.cpu_count() or 1) + 2)
+        self.chunk_size = chunk_size
+        # Пачек в работе одновременно: пул не простаивает, а память не растет с числом файлов
+        self.window = self.workers * 2
+        self.on_progress = on_progress
+        self.progress = {"total": 0, "done": 0, "imported": 0, "skipped": 0}
+        self._cancelled = threading.Event()
+        self._last_report = 0.0
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def run(self) -> List[Dict[str, Any]]:
+        """Записи заметок в порядке файлов; после cancel() — то, что успели прочитать."""
+        paths = find_files(self.root)
+        progress = self.progress
+        progress["total"] = len(paths)
+        self._report(force=True)
+        records: List[Dict[str, Any]] = []
+        chunks = (paths[i:i + self.chunk_size] for i in range(0, len(paths), self.chunk_size))
+        pending: deque = deque()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="NotesImport") as executor:
+            for chunk in chunks:
+                if self.cancelled:
+                    break
+                pending.append((len(chunk), executor.submit(_parse_chunk, chunk, self.root)))
+                if len(pending) >= self.window:
+                    self._collect(pending.popleft(), records)
+            while pending:
+                count, future = pending.popleft()
+                if self.cancelled:
+                    future.cancel()
+                    continue
+                self._collect((count, future), records)
+        self._report(force=True)
+        return records
+
+    def run_async(self, on_done: Callable[[Optional[List[Dict[str, Any]]], Optional[Exception]], None],
+                  on_progress: Optional[Callable[[Dict[str, int]], None]] = None) -> threading.Thread:
+        """run() в фоновом потоке; on_progress и on_done(записи, ошибка) вызываются на UI-потоке."""
+        from kivy.clock import Clock
+        if on_progress is not None:
+            self.on_progress = lambda progress: Clock.schedule_once(lambda dt: on_progress(progress), 0)
+
+        def run():
+            try:
+                result, error = self.run(), None
+            except Exception as e:
+                result, error = None, e
+            Clock.schedule_once(lambda dt: on_done(result, error), 0)
+        thread = threading.Thread(target=run, name="NotesImporter", daemon=True)
+        thread.start()
+        return thread
+
+    # Internal
+    def _collect(self, item, records: List[Dict[str, Any]]) -> None:
+        count, future = item
+        parsed = future.result()
+        imported = [record for record in parsed if record is not None]
+        records.extend(imported)
+        self.progress["done"] += count
+        self.progress["imported"] += len(imported)
+        self.progress["skipped"] += count - len(imported)
+        self._report()
+
+    def _report(self, force: bool = False) -> None:
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_report >= PROGRESS_INTERVAL:
+            self._last_report = now
+            self.on_progress(dict(self.progress))
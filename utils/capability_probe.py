@@ -0,0 +1,148 @@
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from kivy.utils import platform as kivy_platform
+
+# Увеличивать при изменении набора/смысла проверок — кэш тогда пересчитается
+CAPABILITIES_VERSION = 1
+APP_VERSION = "0.1"
+
+# Наблюдаемые значения (выясняются при работе, а не фоновой проверкой)
+_OBSERVED_KEYS = ("app_brightness",)
+
+
+class CapabilityProber:
+    """Фоновая проверка возможностей устройства с кэшем в settings.json.
+
+    Результаты прошлого запуска доступны сразу (capabilities), поэтому кнопки
+    панели рисуются без обращений к Java на UI-потоке. Свежая проверка
+    выполняется один раз в фоновом потоке после старта; кэш привязан к
+    версии приложения и модели устройства.
+
+    Проба обращается к кэшу AndroidBridge из своего потока; мост защищает
+    кэш замком, так что UI-поток и проба не разрешают объекты наперегонки.
+    """
+
+    def __init__(self, data_manager, android_utils):
+        self.data_manager = data_manager
+        self.android_utils = android_utils
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        cached = data_manager.settings.get("capabilities") if data_manager else None
+        self.capabilities: Dict[str, Any] = dict(cached) if isinstance(cached, dict) else {}
+
+    def start(self) -> None:
+        """Запускает фоновую проверку (однократно)."""
+        if self._thread is not None or self.android_utils is None:
+            return
+        self._thread = threading.Thread(target=self._run, name="CapabilityProbe", daemon=True)
+        self._thread.start()
+
+    def record(self, name: str, value: Any) -> None:
+        """Сохраняет наблюдаемую возможность (например, сработала ли app-level яркость)."""
+        if self.capabilities.get(name) == value:
+            return
+        self.capabilities[name] = value
+        self._save()
+        self._notify()
+
+    # Internal
+    def _run(self) -> None:
+        try:
+            fresh = self._probe()
+        except Exception as e:
+            from kivy.logger import Logger
+            Logger.error(f"CapabilityProbe: Probe failed: {e}")
+            return
+        finally:
+            if kivy_platform == 'android':
+                self.android_utils._detach_jni_thread()
+        # Настройки меняем и сохраняем только на UI-потоке
+        from kivy.clock import Clock
+        Clock.schedule_once(lambda dt: self._store(fresh), 0)
+
+    def _probe(self) -> Dict[str, Any]:
+        utils = self.android_utils
+        result: Dict[str, Any] = {"key": self._device_key()}
+        if kivy_platform == 'android':
+            result["camera_id"] = self._find_torch_camera()
+            result["torch"] = result["camera_id"] is not None
+            result["brightness"] = True
+            result["write_settings"] = self._can_write_settings()
+        elif kivy_platform == 'ios':
+            from .android_utils import _get_plyer
+            result["camera_id"] = None
+            result["torch"] = _get_plyer('flashlight') is not None
+            result["brightness"] = _get_plyer('brightness') is not None
+            result["write_settings"] = None
+        else:
+            # На десктопе проверять нечего: None — "неизвестно", поэтому кнопки
+            # фонарика и яркости остаются активными, как до появления проверки
+            result["camera_id"] = None
+            result["torch"] = None
+            result["brightness"] = None
+            result["write_settings"] = None
+        return result
+
+    def _store(self, fresh: Dict[str, Any]) -> None:
+        merged = dict(self.capabilities)
+        if merged.get("key") != fresh["key"]:
+            # Другое устройство или версия — наблюдения прошлых запусков недействительны
+            for name in _OBSERVED_KEYS:
+                merged.pop(name, None)
+        merged.update(fresh)
+        changed = {k: v for k, v in merged.items() if k != "probed_at"} != \
+            {k: v for k, v in self.capabilities.items() if k != "probed_at"}
+        if changed:
+            merged["probed_at"] = datetime.now().isoformat()
+            self.capabilities = merged
+            self._save()
+        self._notify()
+
+    def _save(self) -> None:
+        if self.data_manager is None:
+            return
+        self.data_manager.settings["capabilities"] = self.capabilities
+        try:
+            self.data_manager.save_settings()
+        except OSError as e:
+            from kivy.logger import Logger
+            Logger.error(f"CapabilityProbe: Cannot save settings: {e}")
+
+    def _notify(self) -> None:
+        for listener in list(self.listeners):
+            try:
+                listener(self.capabilities)
+            except Exception as e:
+                from kivy.logger import Logger
+                Logger.error(f"CapabilityProbe: Listener error: {e}")
+
+    def _device_key(self) -> str:
+        device = kivy_platform
+        if kivy_platform == 'android':
+            bridge = self.android_utils.bridge
+            Build = bridge.autoclass('android.os.Build')
+            Version = bridge.autoclass('android.os.Build$VERSION')
+            device = f"{Build.MANUFACTURER}/{Build.MODEL}/sdk{Version.SDK_INT}"
+        return f"v{CAPABILITIES_VERSION}:{APP_VERSION}:{device}"
+
+    def _find_torch_camera(self) -> Optional[str]:
+        # Ищем камеру со вспышкой, а не просто первую в списке
+        bridge = self.android_utils.bridge
+        manager = bridge.camera_manager
+        CameraCharacteristics = bridge.autoclass('android.hardware.camera2.CameraCharacteristics')
+        for cam_id in manager.getCameraIdList() or []:
+            characteristics = manager.getCameraCharacteristics(cam_id)
+            available = characteristics.get(CameraCharacteristics.FLASH_INFO_AVAILABLE)
+            if available is not None and bool(available.booleanValue()):
+                return cam_id
+        return None
+
+    def _can_write_settings(self) -> Optional[bool]:
+        bridge = self.android_utils.bridge
+        try:
+            Settings = bridge.autoclass('android.provider.Settings')
+            return bool(Settings.System.canWrite(bridge.activity))
+        except Exception:
+            return None
@@ -1,7 +1,49 @@
 import json
 import os
+import threading
+import uuid
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+from .attachments import AttachmentStore
+from .backup import BackupManager
+from .duplicates import DuplicateIndex, band_keys, note_text, shingles
+from .file_watcher import file_signature
+from .markdown_blocks import toggle_checkbox_line
+from .reminders import Fired, ReminderScheduler
+from .tag_index import TagFilter, TagIndex, normalize_tags
+from .perf_metrics import measure
+from .tracing import traced
+
+# Сколько начальных символов текста хранится в индексе зашифрованного хранилища для списка
+PREVIEW_CHARS = 200
+# Поля заметки, которые остаются на устройстве и не уходят на сервер синхронизации
+LOCAL_KEYS = frozenset(("id", "sync_seq", "sync_rev", "preview", "attachments"))
+# Если notes.json не разбирается (другая программа еще пишет его), отложенная запись
+# повторяется через SAVE_RETRY_DELAY секунд; после SAVE_RETRIES попыток файл считается испорченным
+SAVE_RETRIES = 5
+SAVE_RETRY_DELAY = 0.5
+
+
+_MISSING = object()
+
+
+def _same_note(note: Dict[str, Any], disk: Dict[str, Any]) -> bool:
+    """Заметка в памяти совпадает с записью из файла.
+
+    sync_seq и uid DataManager дописывает сам: номер правки не сравнивается,
+    а uid, которого нет в файле, правкой не считается.
+    """
+    if note == disk:
+        return True
+    for key in note.keys() | disk.keys():
+        if key == "sync_seq" or (key == "uid" and key not in disk):
+            continue
+        if note.get(key, _MISSING) != disk.get(key, _MISSING):
+            return False
+    return True
+
 
 class DataManager:
     def __init__(self):
@@ -9,19 +51,80 @@ class DataManager:
         self.settings_file = "settings.json"
         self.notes = []
         self.settings = {"show_welcome": True}
+        self.attachments = AttachmentStore()
+        self.backups = BackupManager()
+        self.tag_index = TagIndex()
+        # Напоминания заметок; таймер заводится после reminders.start() (NotesApp.on_start)
+        self.reminders = ReminderScheduler(on_due=self._on_reminders_due)
+        # Вызываются со списком (заметка, Fired) после сохранения сработавших напоминаний
+        self.reminder_listeners: List[Callable[[List[Any]], None]] = []
+        # Зашифрованное хранилище: параметры ключа, проверка пароля и шифротексты тел.
+        # utils/note_crypto.py (и пакет cryptography) импортируется только при работе с ним
+        self.encrypted_store: Optional[Dict[str, Any]] = None
+        self.cipher: Optional[Any] = None  # note_crypto.NoteCipher, когда хранилище открыто
+        # id -> (текст, шифротекст): неизмененные тела при сохранении не шифруются заново
+        self._body_cache: Dict[Any, tuple] = {}
+        # Изменения для синхронизации: у каждой правки заметки свой номер sync_seq;
+        # _changed хранит заметки в порядке последней правки, поэтому выбрать
+        # измененные после номера N — это пройти его хвост, а не все заметки
+        self._seq = 0
+        self._changed: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._by_uid: Dict[str, Dict[str, Any]] = {}
+        self._last_id = 0
+        # Вызываются со списком удаленных заметок после сохранения
+        self.deletion_listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+        # Правки notes.json другими программами: подпись файла (mtime, размер, inode)
+        # после нашей последней записи или чтения и заметки, измененные с тех пор в памяти
+        self._file_sig = None
+        self._unsaved: set = set()
+        self._removed_unsaved: set = set()
+        self._reload_thread: Optional[threading.Thread] = None
+        # Запись, отложенная до переноса правок файла извне (см. save_notes)
+        self.save_pending = False
+        self._save_retry_event = None
+        self._save_retries = 0
+        # Вызываются с False, когда запись отложена, и с True, когда отложенная запись выполнена
+        self.save_listeners: List[Callable[[bool], None]] = []
+        # Вызываются с множеством id заметок, измененных, добавленных или удаленных извне
+        self.external_change_listeners: List[Callable[[set], None]] = []
+        # Индекс почти одинаковых заметок (utils/duplicates.py): строится в фоне
+        # prepare_duplicates() или при первом обращении, затем обновляется при правках
+        self._duplicates: Optional[DuplicateIndex] = None
+        self._duplicates_thread: Optional[threading.Thread] = None
+        # notes.json есть, но не прочитан: заметки в памяти не отражают файл
+        self.load_failed = False
         self.load_data()
     
+    @traced(cat='data')
     def load_data(self):
         """Загружает заметки и настройки из файлов"""
         # Загружаем заметки
+        self._file_sig = file_signature(self.notes_file)
+        self._unsaved = set()
+        self._removed_unsaved = set()
+        self.load_failed = False
         if os.path.exists(self.notes_file):
             try:
                 with open(self.notes_file, 'r', encoding='utf-8') as f:
                     self.notes = json.load(f)
             except (json.JSONDecodeError, FileNotFoundError):
                 self.notes = []
+                self.load_failed = True
         else:
             self.notes = []
+        self.encrypted_store = None
+        if isinstance(self.notes, dict) and self._is_encrypted_store(self.notes):
+            # Зашифрованное хранилище: заметки появятся после unlock()
+            self.encrypted_store = self.notes
+            self.notes = []
+            self._body_cache = {}
+            if self.cipher is not None:
+                # Повторная загрузка в том же сеансе: ключ уже есть, если пароль не меняли
+                try:
+                    self._decrypt_index()
+                except Exception:
+                    self.cipher = None
+        self._rebuild_indexes()
         
         # Загружаем настройки
         if os.path.exists(self.settings_file):
@@ -33,63 +136,889 @@ class DataManager:
         else:
             self.settings = {"show_welcome": True}
     
-    def save_notes(self):
-        """Сохраняет заметки в файл"""
-        with open(self.notes_file, 'w', encoding='utf-8') as f:
-            json.dump(self.notes, f, ensure_ascii=False, indent=2)
+    @traced(cat='data')
+    def save_notes(self, force: bool = False) -> bool:
+        """Сохраняет заметки в файл; False, если запись отложена.
+
+        Если notes.json изменили извне после нашей записи, файл сначала
+        перечитывается в фоне (как в reload_if_changed), его правки переносятся
+        в память, и только потом заметки записываются — до этого save_pending
+        равен True. force=True (при паузе и остановке приложения) переносит
+        правки и пишет файл сразу, на вызывающем потоке.
+        """
+        with measure('save_notes'):
+            affected, removed = set(), []
+            if self.encrypted_store is not None:
+                self._save_encrypted()
+            else:
+                signature = file_signature(self.notes_file)
+                if signature is not None and signature != self._file_sig:
+                    if not force:
+                        # Файл изменили извне — сначала забираем эти правки, не блокируя UI
+                        self._defer_save()
+                        return False
+                    disk_notes = self._read_notes_file()
+                    if disk_notes is not None:
+                        affected, removed = self._apply_external(
+                            self._diff_external(disk_notes, self.notes), signature)
+                    else:
+                        from kivy.logger import Logger
+                        Logger.error(f"DataManager: {self.notes_file} is unreadable, overwriting it")
+                # Прерванная запись не должна оставить обрезанный notes.json
+                tmp_file = self.notes_file + ".tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.notes, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_file, self.notes_file)
+            self._file_sig = file_signature(self.notes_file)
+            self._unsaved.clear()
+            self._removed_unsaved.clear()
+            was_pending = self.save_pending
+            self._clear_pending_save()
+        self._notify_external(affected)
+        if removed:
+            self._notify_deleted(removed)
+        if was_pending:
+            self._notify_save(True)
+        return True
+    
+    def _defer_save(self):
+        if not self.save_pending:
+            self.save_pending = True
+            self._notify_save(False)
+        self._start_reload()
+    
+    def _retry_pending_save(self):
+        # Файл не разобрался — другая программа еще пишет его; перечитаем позже
+        self._save_retries += 1
+        if self._save_retries > SAVE_RETRIES:
+            self.save_notes(force=True)
+        elif self._save_retry_event is None:
+            from kivy.clock import Clock
+            self._save_retry_event = Clock.schedule_once(self._retry_reload, SAVE_RETRY_DELAY)
+    
+    def _retry_reload(self, *_):
+        self._save_retry_event = None
+        if self.save_pending:
+            self._start_reload()
+    
+    def _clear_pending_save(self):
+        self.save_pending = False
+        self._save_retries = 0
+        if self._save_retry_event is not None:
+            self._save_retry_event.cancel()
+            self._save_retry_event = None
+    
+    def _notify_save(self, saved: bool):
+        for listener in list(self.save_listeners):
+            try:
+                listener(saved)
+            except Exception as e:
+                from kivy.logger import Logger
+                Logger.error(f"DataManager: save listener failed: {e}")
+    
+    # Правки notes.json извне
+    def reload_if_changed(self) -> bool:
+        """Проверяет notes.json одним stat; если его изменили извне, перечитывает в фоне.
+
+        Файл разбирается и сравнивается с заметками в памяти в фоновом потоке;
+        на UI-потоке применяются только отличия, после чего слушатели
+        external_change_listeners получают id затронутых заметок.
+        """
+        if self.encrypted_store is not None:
+            return False
+        signature = file_signature(self.notes_file)
+        if signature is None or signature == self._file_sig:
+            return False
+        self._start_reload()
+        return True
+    
+    def _start_reload(self):
+        if self._reload_thread is not None and self._reload_thread.is_alive():
+            # Идущая перечитка завершится на UI-потоке и выполнит отложенную запись;
+            # более новую версию файла увидит следующая проверка
+            return
+        base_sig = self._file_sig
+        snapshot = list(self.notes)
+
+        def run():
+            # Подпись берется до чтения: запись, пришедшая во время чтения, вызовет новую проверку
+            signature = file_signature(self.notes_file)
+            disk_notes = self._read_notes_file()
+            diff = self._diff_external(disk_notes, snapshot) if disk_notes is not None else None
+            from kivy.clock import Clock
+            Clock.schedule_once(lambda dt: finish(diff, signature), 0)
+
+        def finish(diff, signature):
+            # Поток уже завершил работу: новая перечитка (например, из save_notes ниже) не должна ждать его
+            self._reload_thread = None
+            # Пока шло чтение, заметки сохранили принудительно — save_notes перенес правки сам
+            if self._file_sig != base_sig or self.encrypted_store is not None:
+                return
+            if diff is None:
+                if self.save_pending:
+                    self._retry_pending_save()
+                return
+            affected, removed = self._apply_external(diff, signature)
+            self._notify_external(affected)
+            if removed:
+                self._notify_deleted(removed)
+            if self.save_pending:
+                self.save_notes()
+
+        self._reload_thread = threading.Thread(target=run, name="NotesReload", daemon=True)
+        self._reload_thread.start()
+    
+    def _read_notes_file(self) -> Optional[List[Dict[str, Any]]]:
+        """Заметки из notes.json или None, если файл не разбирается (например, еще пишется)"""
+        try:
+            with open(self.notes_file, 'r', encoding='utf-8') as f:
+                notes = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(notes, list) or not all(isinstance(n, dict) and isinstance(n.get("id"), int)
+                                                  for n in notes):
+            return None
+        return notes
+    
+    @staticmethod
+    def _diff_external(disk_notes: List[Dict[str, Any]], notes: List[Dict[str, Any]]):
+        """(измененные и новые записи с диска, id заметок, которых в файле больше нет)"""
+        memory = {note["id"]: note for note in notes}
+        changed = []
+        for disk in disk_notes:
+            note = memory.pop(disk["id"], None)
+            # Номер правки для синхронизации — наш, отличие только в нем правкой не считается
+            if note is None or not _same_note(note, disk):
+                changed.append(disk)
+        return changed, set(memory)
+    
+    def _apply_external(self, diff, signature) -> Tuple[set, List[Dict[str, Any]]]:
+        """Переносит правки файла в память: (id затронутых заметок, удаленные заметки)"""
+        changed, removed = diff
+        affected = set()
+        memory = {note["id"]: note for note in self.notes}
+        for disk in changed:
+            note_id = disk["id"]
+            # Несохраненная правка в памяти новее файла; удаленную здесь заметку не возвращаем
+            if note_id in self._unsaved or note_id in self._removed_unsaved:
+                continue
+            note = memory.get(note_id)
+            if note is None:
+                note = dict(disk)
+                self.notes.append(note)
+                self.tag_index.add(note)
+                self._last_id = max(self._last_id, note_id)
+            else:
+                own = {key: note[key] for key in ("sync_seq", "uid") if key in note and key not in disk}
+                if note.get("uid"):
+                    self._by_uid.pop(note["uid"], None)
+                note.clear()
+                note.update(disk)
+                note.update(own)
+                self._body_cache.pop(note_id, None)
+                self.tag_index.update(note)
+            if note.get("uid"):
+                self._by_uid[note["uid"]] = note
+            self._index_duplicate(note)
+            self.reminders.remove(note_id)
+            for key, due, interval in self._reminder_items([note]):
+                self.reminders.add(key, due, interval)
+            self._bump_seq(note)
+            affected.add(note_id)
+        removed = {note_id for note_id in removed if note_id not in self._unsaved and note_id in memory}
+        removed_notes = [memory[note_id] for note_id in removed]
+        if removed:
+            self.notes = [note for note in self.notes if note["id"] not in removed]
+            for note in removed_notes:
+                self._forget(note)
+                self._removed_unsaved.discard(note["id"])
+            affected |= removed
+        self._file_sig = signature
+        if affected:
+            from kivy.logger import Logger
+            Logger.info(f"DataManager: {len(affected)} notes changed in {self.notes_file} externally")
+        return affected, removed_notes
+    
+    def _notify_external(self, affected: set):
+        if not affected:
+            return
+        for listener in list(self.external_change_listeners):
+            try:
+                listener(affected)
+            except Exception as e:
+                from kivy.logger import Logger
+                Logger.error(f"DataManager: external change listener failed: {e}")
+    
+    # Шифрование
+    @property
+    def is_encrypted(self) -> bool:
+        return self.encrypted_store is not None
+    
+    @property
+    def is_locked(self) -> bool:
+        """Хранилище зашифровано, а пароль в этом сеансе еще не введен"""
+        return self.encrypted_store is not None and self.cipher is None
+    
+    @traced(cat='data')
+    def unlock(self, passphrase: str) -> bool:
+        """Открывает зашифрованное хранилище; False при неверном пароле"""
+        if not self.is_locked:
+            return True
+        from . import note_crypto
+        store = self.encrypted_store
+        try:
+            cipher = note_crypto.NoteCipher.unlock(passphrase, store["kdf"], store["check"])
+        except note_crypto.WrongPassphrase:
+            return False
+        self.cipher = cipher
+        self._decrypt_index()
+        self._rebuild_indexes()
+        # При запуске очистка вложений ждала расшифровки индекса — ссылки известны только теперь
+        self.collect_attachment_garbage()
+        return True
+    
+    @traced(cat='data')
+    def enable_encryption(self, passphrase: str):
+        """Переводит notes.json в зашифрованный вид"""
+        if self.is_encrypted:
+            raise ValueError("Notes are already encrypted")
+        from . import note_crypto
+        kdf = note_crypto.new_kdf_params()
+        self.cipher = note_crypto.NoteCipher(note_crypto.derive_key(passphrase, kdf))
+        self.encrypted_store = {"format": note_crypto.FORMAT, "version": note_crypto.VERSION,
+                                "kdf": kdf, "check": self.cipher.make_check(), "bodies": {}}
+        self._body_cache = {}
+        self.save_notes()
+    
+    @traced(cat='data')
+    def disable_encryption(self, passphrase: str) -> bool:
+        """Расшифровывает все заметки и сохраняет notes.json открытым текстом"""
+        store = self.encrypted_store
+        if store is None:
+            return True
+        from . import note_crypto
+        try:
+            note_crypto.NoteCipher.unlock(passphrase, store["kdf"], store["check"])
+        except note_crypto.WrongPassphrase:
+            return False
+        if self.cipher is None:
+            self.unlock(passphrase)
+        for note in self.notes:
+            self.open_note(note["id"])
+            note.pop("preview", None)
+        self.encrypted_store = None
+        self.cipher = None
+        self._body_cache = {}
+        self.save_notes()
+        return True
+    
+    def open_note(self, note_id: int) -> Optional[Dict[str, Any]]:
+        """Заметка с текстом: в зашифрованном хранилище тело расшифровывается здесь, по требованию"""
+        note = self.get_note(note_id)
+        if note is None or "content" in note or self.cipher is None:
+            return note
+        from .note_crypto import body_aad
+        token = self.encrypted_store["bodies"].get(str(note_id))
+        content = self.cipher.decrypt_text(token, body_aad(note_id)) if token else ""
+        note["content"] = content
+        self._body_cache[note_id] = (content, token)
+        # В индексе дубликатов было только начало текста из preview
+        self._index_duplicate(note)
+        return note
+    
+    @staticmethod
+    def _is_encrypted_store(data: Dict[str, Any]) -> bool:
+        # Открытые заметки — список, поэтому note_crypto загружается только для словаря
+        from . import note_crypto
+        return data.get("format") == note_crypto.FORMAT
+
+    def _decrypt_index(self):
+        store = self.encrypted_store
+        index = store.get("index")
+        self.notes = json.loads(self.cipher.decrypt_text(index, b"index")) if index else []
+        self._body_cache = {}
+    
+    def _save_encrypted(self):
+        store = self.encrypted_store
+        cipher = self.cipher
+        if cipher is None:
+            # Заметки еще не расшифрованы — запись стерла бы хранилище
+            raise RuntimeError("Encrypted notes are locked")
+        from .note_crypto import body_aad
+        old_bodies = store.get("bodies", {})
+        bodies = {}
+        index = []
+        for note in self.notes:
+            note_id = note["id"]
+            meta = {key: value for key, value in note.items() if key != "content"}
+            if "content" in note:
+                content = note["content"]
+                cached = self._body_cache.get(note_id)
+                if cached is not None and cached[0] == content and cached[1]:
+                    token = cached[1]
+                else:
+                    token = cipher.encrypt_text(content, body_aad(note_id))
+                    self._body_cache[note_id] = (content, token)
+                meta["preview"] = content[:PREVIEW_CHARS]
+            else:
+                # Заметку не открывали — переносим шифротекст как есть
+                token = old_bodies.get(str(note_id))
+            if token:
+                bodies[str(note_id)] = token
+            index.append(meta)
+        store["bodies"] = bodies
+        store["index"] = cipher.encrypt_text(json.dumps(index, ensure_ascii=False), b"index")
+        # Частично записанный файл не расшифровать — пишем во временный и подменяем
+        tmp_file = self.notes_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(store, f)
+        os.replace(tmp_file, self.notes_file)
+    
+    # Резервные копии
+    def backup_snapshot(self):
+        """Снимок заметок для фоновой записи копии: (записи, заголовок шифрования или None).
+
+        Вызывается на UI-потоке; вложенные списки и словари копируются, чтобы
+        правки во время записи не попали в архив наполовину. У зашифрованного
+        хранилища в копию идут шифротексты тел и индекса — открытого текста в
+        архиве нет.
+        """
+        store = self.encrypted_store
+        if store is None:
+            records = [{key: (value.copy() if isinstance(value, (list, dict)) else value)
+                        for key, value in note.items()} for note in self.notes]
+            return records, None
+        if self.cipher is None:
+            raise RuntimeError("Encrypted notes are locked")
+        bodies = store.get("bodies", {})
+        records = [{"id": note["id"], "body": bodies.get(str(note["id"]), "")} for note in self.notes]
+        encryption = {"kdf": store["kdf"], "check": store["check"], "index": store.get("index")}
+        return records, encryption
+    
+    @traced(cat='data')
+    def restore_snapshot(self, records: List[Dict[str, Any]], encryption: Optional[Dict[str, Any]] = None):
+        """Заменяет все заметки восстановленными из копии.
+
+        Открытые записи сохраняются в текущем режиме хранилища. Зашифрованная
+        копия записывается как зашифрованный notes.json; если она сделана с
+        другим паролем, хранилище остается закрытым до unlock().
+        """
+        if encryption is None:
+            if self.is_locked:
+                raise RuntimeError("Encrypted notes are locked")
+            self.notes = records
+            self._body_cache = {}
+            self._rebuild_indexes()
+            # Копия заменяет заметки целиком — правки файла извне в нее не переносятся
+            self._file_sig = file_signature(self.notes_file)
+            self.save_notes()
+            return
+        from . import note_crypto
+        store = {"format": note_crypto.FORMAT, "version": note_crypto.VERSION,
+                 "kdf": encryption["kdf"], "check": encryption["check"], "index": encryption.get("index"),
+                 "bodies": {str(record["id"]): record["body"] for record in records if record.get("body")}}
+        if self.encrypted_store is None or self.encrypted_store.get("kdf") != store["kdf"]:
+            self.cipher = None
+        tmp_file = self.notes_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(store, f)
+        os.replace(tmp_file, self.notes_file)
+        self.load_data()
+    
+    def _rebuild_indexes(self):
+        self.tag_index = TagIndex(self.notes)
+        self.reminders.reset(self._reminder_items())
+        self._by_uid = {note["uid"]: note for note in self.notes if note.get("uid")}
+        changed = sorted((note for note in self.notes if note.get("sync_seq")), key=lambda n: n["sync_seq"])
+        self._changed = OrderedDict((note["id"], note) for note in changed)
+        if changed:
+            # Номер правки не уменьшается: курсор отправленных правок останется верным
+            self._seq = max(self._seq, changed[-1]["sync_seq"])
+        self._last_id = max((note["id"] for note in self.notes), default=0)
+        # Заметки заменены целиком — индекс дубликатов построится заново при обращении
+        self._duplicates = None
+    
+    # Синхронизация
+    @property
+    def sync_seq(self) -> int:
+        """Номер последней локальной правки"""
+        return self._seq
+    
+    def mark_changed(self, note: Dict[str, Any]):
+        """Отмечает правку заметки: ее отправит следующая синхронизация"""
+        self._unsaved.add(note["id"])
+        self._bump_seq(note)
     
+    def _bump_seq(self, note: Dict[str, Any]):
+        self._seq += 1
+        note["sync_seq"] = self._seq
+        if not note.get("uid"):
+            note["uid"] = uuid.uuid4().hex
+            self._by_uid[note["uid"]] = note
+        self._changed[note["id"]] = note
+        self._changed.move_to_end(note["id"])
+    
+    def changed_notes(self, since_seq: int) -> List[Dict[str, Any]]:
+        """Заметки, измененные после правки since_seq (since_seq < 0 — все заметки)"""
+        if since_seq < 0:
+            for note in self.notes:
+                if not note.get("uid"):
+                    note["uid"] = uuid.uuid4().hex
+                    self._by_uid[note["uid"]] = note
+            return list(self.notes)
+        result = []
+        for note in reversed(self._changed.values()):
+            if note["sync_seq"] <= since_seq:
+                break
+            result.append(note)
+        result.reverse()
+        return result
+    
+    def note_by_uid(self, uid: str) -> Optional[Dict[str, Any]]:
+        return self._by_uid.get(uid)
+    
+    def store_remote_note(self, record: Dict[str, Any], rev: int,
+                          note: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Записывает версию заметки с сервера синхронизации поверх note (или новой заметкой).
+
+        Локальные поля (id, вложения) сохраняются; правка не отмечается как
+        локальная, файл не сохраняется — это делает вызывающий, один раз.
+        """
+        fresh = note is None
+        if fresh:
+            note = {"id": self._new_id()}
+            self.notes.append(note)
+        else:
+            for key in [key for key in note if key not in LOCAL_KEYS]:
+                del note[key]
+            self._body_cache.pop(note["id"], None)
+        note.update({key: value for key, value in record.items() if key not in LOCAL_KEYS})
+        note.setdefault("title", "Без заголовка")
+        note.setdefault("content", "")
+        now = datetime.now().isoformat()
+        note.setdefault("created_at", now)
+        note.setdefault("updated_at", now)
+        note["sync_rev"] = rev
+        self._by_uid[note["uid"]] = note
+        self._unsaved.add(note["id"])
+        if fresh:
+            self.tag_index.add(note)
+        else:
+            self.tag_index.update(note)
+        self._index_duplicate(note)
+        self.reminders.remove(note["id"])
+        for key, due, interval in self._reminder_items([note]):
+            self.reminders.add(key, due, interval)
+        return note
+    
+    def drop_remote_note(self, note: Dict[str, Any]):
+        """Удаляет заметку, удаленную на другом устройстве (без сохранения файла)"""
+        self.notes.remove(note)
+        self._forget(note)
+        self.attachments.remove(note.get("attachments", []))
+    
+    def _forget(self, note: Dict[str, Any]):
+        note_id = note["id"]
+        self._removed_unsaved.add(note_id)
+        self._unsaved.discard(note_id)
+        self.tag_index.remove(note_id)
+        if self._duplicates is not None:
+            self._duplicates.remove(note_id)
+        self.reminders.remove(note_id)
+        self._changed.pop(note_id, None)
+        self._body_cache.pop(note_id, None)
+        if note.get("uid"):
+            self._by_uid.pop(note["uid"], None)
+    
+    def _new_id(self) -> int:
+        # После удалений len(notes) + 1 может совпасть с существующим id
+        self._last_id += 1
+        return self._last_id
+    
+    @traced(cat='data')
     def save_settings(self):
         """Сохраняет настройки в файл"""
         with open(self.settings_file, 'w', encoding='utf-8') as f:
             json.dump(self.settings, f, ensure_ascii=False, indent=2)
     
-    def add_note(self, title: str, content: str) -> Dict[str, Any]:
+    @traced(cat='data')
+    def add_note(self, title: str, content: str, tags: Optional[List[str]] = None,
+                 folder: Optional[str] = None) -> Dict[str, Any]:
         """Добавляет новую заметку"""
         note = {
-            "id": len(self.notes) + 1,
+            "id": self._new_id(),
             "title": title.strip() or "Без заголовка",
             "content": content.strip(),
             "created_at": datetime.now().isoformat(),
             "updated_at": datetime.now().isoformat(),
             "pinned": False
         }
+        if tags:
+            note["tags"] = normalize_tags(tags)
+        if folder and folder.strip():
+            note["folder"] = folder.strip()
         self.notes.append(note)
+        self.tag_index.add(note)
+        self._index_duplicate(note)
+        self.mark_changed(note)
         self.save_notes()
         return note
     
-    def update_note(self, note_id: int, title: str, content: str) -> bool:
-        """Обновляет существующую заметку"""
+    @traced(cat='data')
+    def import_notes(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Добавляет заметки из записей импорта (title, content, created_at, updated_at,
+        folder, tags) и сохраняет файл один раз на все"""
+        notes = []
+        for record in records:
+            now = datetime.now().isoformat()
+            note = {
+                "id": self._new_id(),
+                "title": (record.get("title") or "").strip() or "Без заголовка",
+                "content": (record.get("content") or "").strip(),
+                "created_at": record.get("created_at") or now,
+                "updated_at": record.get("updated_at") or now,
+                "pinned": False
+            }
+            if record.get("tags"):
+                note["tags"] = normalize_tags(record["tags"])
+            if record.get("folder"):
+                note["folder"] = record["folder"].strip()
+            self.notes.append(note)
+            self.tag_index.add(note)
+            self._index_duplicate(note)
+            self.mark_changed(note)
+            notes.append(note)
+        if notes:
+            self.save_notes()
+        return notes
+    
+    @traced(cat='data')
+    def update_note(self, note_id: int, title: str, content: str, tags: Optional[List[str]] = None,
+                    folder: Optional[str] = None) -> bool:
+        """Обновляет существующую заметку (теги и папку — если переданы)"""
         for note in self.notes:
             if note["id"] == note_id:
                 note["title"] = title.strip() or "Без заголовка"
                 note["content"] = content.strip()
                 note["updated_at"] = datetime.now().isoformat()
+                if tags is not None or folder is not None:
+                    self._apply_tags(note, tags, folder)
+                self._index_duplicate(note)
+                self.mark_changed(note)
                 self.save_notes()
                 return True
         return False
     
+    @traced(cat='data')
+    def set_note_tags(self, note_id: int, tags: Optional[List[str]] = None,
+                      folder: Optional[str] = None) -> bool:
+        """Меняет теги и/или папку заметки (пустая строка в folder убирает папку)"""
+        note = self.get_note(note_id)
+        if note is None:
+            return False
+        self._apply_tags(note, tags, folder)
+        note["updated_at"] = datetime.now().isoformat()
+        self.mark_changed(note)
+        self.save_notes()
+        return True
+    
+    def _apply_tags(self, note: Dict[str, Any], tags: Optional[List[str]], folder: Optional[str]):
+        if tags is not None:
+            tags = normalize_tags(tags)
+            if tags:
+                note["tags"] = tags
+            else:
+                note.pop("tags", None)
+        if folder is not None:
+            if folder.strip():
+                note["folder"] = folder.strip()
+            else:
+                note.pop("folder", None)
+        self.tag_index.update(note)
+    
+    @traced(cat='data')
+    def toggle_checklist_item(self, note_id: int, line: int) -> Optional[Dict[str, Any]]:
+        """Переключает пункт чек-листа (строку line в тексте заметки)"""
+        note = self.open_note(note_id)
+        if note is None:
+            return None
+        content = toggle_checkbox_line(note["content"], line)
+        if content is None:
+            return None
+        note["content"] = content
+        note["updated_at"] = datetime.now().isoformat()
+        self._index_duplicate(note)
+        self.mark_changed(note)
+        self.save_notes()
+        return note
+    
+    @traced(cat='data')
     def delete_note(self, note_id: int) -> bool:
         """Удаляет заметку по ID"""
         for i, note in enumerate(self.notes):
             if note["id"] == note_id:
                 del self.notes[i]
+                self._forget(note)
                 self.save_notes()
+                self.attachments.remove(note.get("attachments", []))
+                self._notify_deleted([note])
                 return True
         return False
     
+    @traced(cat='data')
     def delete_notes(self, note_ids: List[int]) -> int:
         """Удаляет несколько заметок по списку ID"""
-        deleted_count = 0
-        self.notes = [note for note in self.notes if note["id"] not in note_ids]
-        if deleted_count > 0:
-            self.save_notes()
-        return deleted_count
+        ids = set(note_ids)
+        deleted = [note for note in self.notes if note["id"] in ids]
+        if not deleted:
+            return 0
+        self.notes = [note for note in self.notes if note["id"] not in ids]
+        for note in deleted:
+            self._forget(note)
+        self.save_notes()
+        self.attachments.remove([name for note in deleted for name in note.get("attachments", [])])
+        self._notify_deleted(deleted)
+        return len(deleted)
+    
+    def _notify_deleted(self, notes: List[Dict[str, Any]]):
+        for listener in list(self.deletion_listeners):
+            try:
+                listener(notes)
+            except Exception as e:
+                from kivy.logger import Logger
+                Logger.error(f"DataManager: deletion listener failed: {e}")
+    
+    @traced(cat='data')
+    def set_reminder(self, note_id: int, due: Optional[datetime], repeat: Optional[int] = None) -> bool:
+        """Ставит напоминание на время due (повтор каждые repeat секунд); due=None снимает его"""
+        note = self.get_note(note_id)
+        if note is None:
+            return False
+        if due is None:
+            note.pop("reminder", None)
+            self.reminders.remove(note_id)
+        else:
+            note["reminder"] = {"due": due.isoformat()}
+            if repeat:
+                note["reminder"]["repeat"] = int(repeat)
+            self.reminders.add(note_id, due.timestamp(), repeat or None)
+        self.mark_changed(note)
+        self.save_notes()
+        return True
+    
+    def get_reminder(self, note_id: int) -> Optional[Dict[str, Any]]:
+        """Напоминание заметки: {"due": datetime, "repeat": секунды или None} или None"""
+        entry = self.reminders.get(note_id)
+        if entry is None:
+            return None
+        due, interval = entry
+        return {"due": datetime.fromtimestamp(due), "repeat": int(interval) if interval else None}
+    
+    def _reminder_items(self, notes=None):
+        for note in self.notes if notes is None else notes:
+            reminder = note.get("reminder")
+            if not reminder:
+                continue
+            try:
+                due = datetime.fromisoformat(reminder["due"]).timestamp()
+            except (KeyError, TypeError, ValueError):
+                continue
+            yield note["id"], due, reminder.get("repeat") or None
+    
+    def _on_reminders_due(self, fired: List[Fired]):
+        # Одноразовые напоминания снимаются с заметки, у повторяющихся
+        # сохраняется следующий срок; запись — одна на все сработавшие
+        notes = []
+        for item in fired:
+            note = self.get_note(item.key)
+            if note is None:
+                continue
+            entry = self.reminders.get(item.key)
+            if entry is None:
+                note.pop("reminder", None)
+            else:
+                note["reminder"]["due"] = datetime.fromtimestamp(entry[0]).isoformat()
+            self._unsaved.add(note["id"])
+            notes.append((note, item))
+        if not notes:
+            return
+        self.save_notes()
+        for listener in list(self.reminder_listeners):
+            listener(notes)
+    
+    @traced(cat='data')
+    def add_attachment(self, note_id: int, source_path: str) -> Optional[str]:
+        """Копирует изображение в каталог вложений и добавляет его к заметке"""
+        note = self.get_note(note_id)
+        if note is None:
+            return None
+        name = self.attachments.add(note_id, source_path)
+        note.setdefault("attachments", []).append(name)
+        note["updated_at"] = datetime.now().isoformat()
+        self.mark_changed(note)
+        self.save_notes()
+        return name
+    
+    @traced(cat='data')
+    def remove_attachment(self, note_id: int, name: str) -> bool:
+        """Убирает вложение из заметки и удаляет его файл"""
+        note = self.get_note(note_id)
+        if note is None or name not in note.get("attachments", []):
+            return False
+        note["attachments"].remove(name)
+        note["updated_at"] = datetime.now().isoformat()
+        self.mark_changed(note)
+        self.save_notes()
+        self.attachments.remove([name])
+        return True
+    
+    def get_attachment_paths(self, note: Dict[str, Any]) -> List[str]:
+        """Пути к файлам вложений заметки"""
+        return [self.attachments.path(name) for name in note.get("attachments", [])]
+    
+    def collect_attachment_garbage(self):
+        """Удаляет в фоне файлы вложений, на которые не ссылается ни одна сохраненная заметка.
+
+        Пока зашифрованное хранилище закрыто, заметок в памяти нет и ссылки
+        неизвестны — очистка пропускается (unlock() запустит ее сам). Так же
+        пропускается, если notes.json не разобрался или ссылок нет совсем:
+        пустой набор ссылок означал бы удаление всех файлов.
+        """
+        if self.is_locked:
+            return None
+        referenced = [name for note in self.notes for name in note.get("attachments", [])]
+        if self.load_failed or not referenced:
+            from kivy.logger import Logger
+            reason = f"{self.notes_file} was not loaded" if self.load_failed else "no attachments referenced"
+            Logger.info(f"DataManager: attachment GC skipped, {reason}")
+            return None
+        return self.attachments.collect_garbage(referenced)
+
+    # Почти одинаковые заметки
+    @property
+    def duplicates(self) -> DuplicateIndex:
+        """Индекс дубликатов; если он еще не построен — строится здесь, на вызывающем потоке"""
+        if self._duplicates is None:
+            with measure('duplicates_build'):
+                self._duplicates = DuplicateIndex(self.notes)
+        return self._duplicates
+
+    def prepare_duplicates(self) -> bool:
+        """Строит индекс дубликатов в фоне; False, если он уже есть или строится.
+
+        Шинглы и сигнатуры считаются в фоновом потоке по снимку текстов; на
+        UI-потоке готовые ключи раскладываются по ведрам, а заметки, измененные
+        или добавленные за время расчета, индексируются заново.
+        """
+        if self._duplicates is not None:
+            return False
+        if self._duplicates_thread is not None and self._duplicates_thread.is_alive():
+            return False
+        snapshot = [(note, note_text(note)) for note in self.notes]
+
+        def run():
+            prepared = [(note, text, band_keys(shingles(text))) for note, text in snapshot]
+            from kivy.clock import Clock
+            Clock.schedule_once(lambda dt: finish(prepared), 0)
+
+        def finish(prepared):
+            # Индекс уже построили по требованию (duplicates) — расчет не нужен
+            if self._duplicates is not None:
+                return
+            index = DuplicateIndex()
+            memory = {note["id"]: note for note in self.notes}
+            for note, text, keys in prepared:
+                if memory.get(note["id"]) is note and note_text(note) == text:
+                    index.add_prepared(note, keys)
+            for note in self.notes:
+                if note["id"] not in index:
+                    index.add(note)
+            self._duplicates = index
+
+        self._duplicates_thread = threading.Thread(target=run, name="DuplicateIndex", daemon=True)
+        self._duplicates_thread.start()
+        return True
+
+    def find_duplicates(self, title: str, content: str, exclude_id: Optional[int] = None,
+                        limit: int = 5) -> List[Tuple[Dict[str, Any], float]]:
+        """Заметки, почти совпадающие с текстом title/content: [(заметка, мера сходства 0..1)]
+
+        Вызывается с UI-потока при сохранении, поэтому индекс здесь не строится:
+        пока он не готов, возвращается пустой список, а построение запускается в фоне.
+        """
+        if self._duplicates is None:
+            self.prepare_duplicates()
+            return []
+        text = note_text({"title": title.strip() or "Без заголовка", "content": content.strip()})
+        return self._duplicates.find(text, exclude=exclude_id, limit=limit)
+
+    def duplicate_clusters(self) -> List[List[Dict[str, Any]]]:
+        """Группы почти одинаковых заметок; в группе заметки от последней измененной"""
+        with measure('duplicate_clusters'):
+            return self.duplicates.clusters()
+
+    def _index_duplicate(self, note: Dict[str, Any]):
+        if self._duplicates is not None:
+            self._duplicates.update(note)
+
+    @traced(cat='data')
+    def merge_notes(self, note_ids: List[int]) -> Optional[Dict[str, Any]]:
+        """Объединяет заметки в первую из note_ids; остальные удаляются.
+
+        Строки текста остальных, которых в первой нет, дописываются в конец;
+        теги, вложения и закрепление переносятся, напоминание — если у первой
+        его нет. Файл сохраняется один раз.
+        """
+        notes = [self.open_note(note_id) for note_id in dict.fromkeys(note_ids)]
+        notes = [note for note in notes if note is not None]
+        if len(notes) < 2:
+            return None
+        keep, others = notes[0], notes[1:]
+        lines = keep["content"].split("\n")
+        seen = {line.strip() for line in lines}
+        tags = list(keep.get("tags", []))
+        for other in others:
+            for line in other["content"].split("\n"):
+                if line.strip() and line.strip() not in seen:
+                    seen.add(line.strip())
+                    lines.append(line)
+            tags.extend(other.get("tags", []))
+            if keep["title"] == "Без заголовка" and other["title"] != "Без заголовка":
+                keep["title"] = other["title"]
+            if other.get("attachments"):
+                # Файлы вложений остаются на месте — на них теперь ссылается оставленная заметка
+                keep.setdefault("attachments", []).extend(other["attachments"])
+            if other.get("pinned"):
+                keep["pinned"] = True
+            if not keep.get("reminder") and other.get("reminder"):
+                keep["reminder"] = dict(other["reminder"])
+        keep["content"] = "\n".join(lines).strip()
+        if tags:
+            keep["tags"] = normalize_tags(tags)
+        keep["updated_at"] = datetime.now().isoformat()
+        self.tag_index.update(keep)
+        self._index_duplicate(keep)
+        self.reminders.remove(keep["id"])
+        for key, due, interval in self._reminder_items([keep]):
+            self.reminders.add(key, due, interval)
+        self.mark_changed(keep)
+        ids = {note["id"] for note in others}
+        self.notes = [note for note in self.notes if note["id"] not in ids]
+        for note in others:
+            self._forget(note)
+        self.save_notes()
+        self._notify_deleted(others)
+        return keep
     
-    def get_notes(self) -> List[Dict[str, Any]]:
+    def get_notes(self, tag_filter: Optional[TagFilter] = None) -> List[Dict[str, Any]]:
         """Возвращает все заметки, отсортированные по дате обновления (закрепленные сверху)"""
+        notes = self.notes
+        if tag_filter is not None and not tag_filter.is_empty():
+            # Отбор по битовым картам индекса, а не по тегам каждой заметки
+            notes = list(self.tag_index.notes(self.tag_index.bitmap(tag_filter)))
         # Сначала закрепленные, потом обычные, внутри каждой группы по дате обновления
-        pinned_notes = [note for note in self.notes if note.get("pinned", False)]
-        unpinned_notes = [note for note in self.notes if not note.get("pinned", False)]
+        pinned_notes = [note for note in notes if note.get("pinned", False)]
+        unpinned_notes = [note for note in notes if not note.get("pinned", False)]
         
         pinned_sorted = sorted(pinned_notes, key=lambda x: x["updated_at"], reverse=True)
         unpinned_sorted = sorted(unpinned_notes, key=lambda x: x["updated_at"], reverse=True)
@@ -112,16 +1041,19 @@ class DataManager:
         """Проверяет, нужно ли показывать стартовое окно"""
         return self.settings.get("show_welcome", True)
     
+    @traced(cat='data')
     def toggle_pin_note(self, note_id: int) -> bool:
         """Переключает состояние закрепления заметки"""
         for note in self.notes:
             if note["id"] == note_id:
                 note["pinned"] = not note.get("pinned", False)
                 note["updated_at"] = datetime.now().isoformat()
+                self.mark_changed(note)
                 self.save_notes()
                 return True
         return False
     
+    @traced(cat='data')
     def toggle_pin_notes(self, note_ids: List[int]) -> int:
         """Переключает состояние закрепления нескольких заметок"""
         pinned_count = 0
@@ -129,6 +1061,7 @@ class DataManager:
             if note["id"] in note_ids:
                 note["pinned"] = not note.get("pinned", False)
                 note["updated_at"] = datetime.now().isoformat()
+                self.mark_changed(note)
                 pinned_count += 1
         if pinned_count > 0:
             self.save_notes()
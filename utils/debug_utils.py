@@ -1,22 +1,40 @@
 """
 Утилиты для отладки и показа ошибок в GUI.
+
+Виджеты попапов импортируются внутри функций: модуль подключается при каждом
+касании заметки (is_popup_open), а сами попапы нужны редко.
+
+Ошибки из обработчиков лучше отправлять в utils.error_collector.report_error:
+он группирует повторы и не открывает больше одного попапа за интервал.
 """
 
-from kivy.uix.popup import Popup
-from kivy.uix.label import Label
-from kivy.uix.button import Button
-from kivy.uix.boxlayout import BoxLayout
-from kivy.metrics import dp
+# Число открытых попапов (их может быть несколько одновременно)
+_open_popups = 0
+
 
-# Глобальная переменная для отслеживания открытых попапов
-_popup_open = False
+def _track_popup(popup):
+    """Учитывает попап в is_popup_open() до его закрытия."""
+    global _open_popups
+    _open_popups += 1
+
+    def on_dismiss(instance):
+        global _open_popups
+        _open_popups = max(0, _open_popups - 1)
+
+    popup.bind(on_dismiss=on_dismiss)
 
 
 def show_error_popup(title: str, message: str, parent=None):
-    """Показывает всплывающее окно с ошибкой и полным текстом ошибки."""
-    global _popup_open
+    """Показывает всплывающее окно с ошибкой и полным текстом ошибки.
+
+    Возвращает открытый Popup или None, если показать его не удалось.
+    """
+    from kivy.uix.popup import Popup
+    from kivy.uix.label import Label
+    from kivy.uix.button import Button
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy.metrics import dp
     try:
-        _popup_open = True
         content = BoxLayout(orientation='vertical', spacing=dp(15), padding=dp(20))
         
         # Текст ошибки
@@ -52,26 +70,29 @@ def show_error_popup(title: str, message: str, parent=None):
         )
         
         def close_popup(instance):
-            global _popup_open
-            _popup_open = False
             popup.dismiss()
             return True  # Останавливаем всплытие события
         
         btn.bind(on_press=close_popup)
+        _track_popup(popup)
         popup.open()
+        return popup
         
     except Exception as e:
-        _popup_open = False
         # Если не можем показать GUI, хотя бы в лог
         from kivy.logger import Logger
         Logger.error(f"DebugUtils: Cannot show error popup: {e}")
+        return None
 
 
 def show_debug_info(title: str, message: str, parent=None):
     """Показывает отладочную информацию в GUI попапе."""
-    global _popup_open
+    from kivy.uix.popup import Popup
+    from kivy.uix.label import Label
+    from kivy.uix.button import Button
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy.metrics import dp
     try:
-        _popup_open = True
         content = BoxLayout(orientation='vertical', spacing=dp(15), padding=dp(20))
         
         # Текст отладки
@@ -107,25 +128,26 @@ def show_debug_info(title: str, message: str, parent=None):
         )
         
         def close_popup(instance):
-            global _popup_open
-            _popup_open = False
             popup.dismiss()
             return True  # Останавливаем всплытие события
         
         btn.bind(on_press=close_popup)
+        _track_popup(popup)
         popup.open()
         
     except Exception as e:
-        _popup_open = False
         from kivy.logger import Logger
         Logger.error(f"DebugUtils: Cannot show debug info: {e}")
 
 
 def show_success_message(message: str, parent=None):
     """Показывает сообщение об успехе в GUI попапе."""
-    global _popup_open
+    from kivy.uix.popup import Popup
+    from kivy.uix.label import Label
+    from kivy.uix.button import Button
+    from kivy.uix.boxlayout import BoxLayout
+    from kivy.metrics import dp
     try:
-        _popup_open = True
         content = BoxLayout(orientation='vertical', spacing=dp(10), padding=dp(10))
         
         success_label = Label(
@@ -154,21 +176,18 @@ def show_success_message(message: str, parent=None):
         )
         
         def close_popup(instance):
-            global _popup_open
-            _popup_open = False
             popup.dismiss()
             return True  # Останавливаем всплытие события
         
         btn.bind(on_press=close_popup)
+        _track_popup(popup)
         popup.open()
         
     except Exception as e:
-        _popup_open = False
         from kivy.logger import Logger
         Logger.error(f"DebugUtils: Cannot show success message: {e}")
 
 
 def is_popup_open():
     """Возвращает True, если открыт какой-либо попап (для предотвращения обработки touch событий)."""
-    global _popup_open
-    return _popup_open
+    return _open_popups > 0
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+
+class DraftManager:
+    """Автосохранение черновика редактируемой заметки в отдельный файл.
+
+    Запись выполняется в фоновом потоке с задержкой (debounce): пока пользователь
+    печатает, на диск ничего не пишется; после паузы сохраняется только последний
+    вариант черновика. Файл notes.json при этом не трогается.
+
+    В черновик попадают заголовок, текст, теги, папка и измененное напоминание.
+    Новые вложения не сохраняются: до сохранения заметки это лишь пути к
+    выбранным файлам, и после сбоя их нужно добавить заново.
+    """
+
+    def __init__(self, drafts_file: str = "drafts.json", delay: float = 1.0):
+        self.drafts_file = drafts_file
+        self.delay = delay
+        self._lock = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._pending: Optional[Dict[str, Any]] = None
+        self._pending_clear = False
+        self._last_update = 0.0
+        # Последний записанный на диск черновик — повторно одно и то же не пишем
+        self._written: Optional[Dict[str, Any]] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="DraftWriter", daemon=True)
+        self._thread.start()
+
+    def load_draft(self) -> Optional[Dict[str, Any]]:
+        """Возвращает сохраненный черновик (если есть)."""
+        if not os.path.exists(self.drafts_file):
+            return None
+        try:
+            with open(self.drafts_file, 'r', encoding='utf-8') as f:
+                draft = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return None
+        if not isinstance(draft, dict) or 'content' not in draft:
+            return None
+        self._written = draft
+        return draft
+
+    def update(self, note_id: Optional[int], title: str, content: str, tags: str = "",
+               folder: str = "", reminder: Optional[Dict[str, Any]] = None) -> None:
+        """Запоминает текущее состояние редактора; запись произойдет после паузы.
+
+        reminder — {"due": ISO-время или None, "repeat": секунды или None}, если
+        напоминание меняли в редакторе, иначе None.
+        """
+        with self._lock:
+            self._pending = {
+                "note_id": note_id,
+                "title": title,
+                "content": content,
+                "tags": tags,
+                "folder": folder,
+                "reminder": reminder,
+            }
+            self._pending_clear = False
+            self._last_update = time.monotonic()
+            self._lock.notify()
+
+    def clear(self) -> None:
+        """Удаляет черновик (после сохранения заметки или отказа от изменений)."""
+        with self._lock:
+            self._pending = None
+            self._pending_clear = True
+            self._last_update = 0.0
+            self._lock.notify()
+
+    def flush(self) -> None:
+        """Немедленно записывает ожидающий черновик (при паузе/остановке приложения)."""
+        with self._write_lock:
+            with self._lock:
+                action = self._take_pending_locked()
+            self._apply(action)
+
+    def close(self) -> None:
+        """Сбрасывает ожидающие изменения и останавливает фоновый поток."""
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._lock.notify()
+
+    # Internal
+    def _worker(self) -> None:
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                if self._pending is None and not self._pending_clear:
+                    self._lock.wait()
+                    continue
+                remaining = self._last_update + self.delay - time.monotonic()
+                if remaining > 0:
+                    self._lock.wait(remaining)
+                    continue
+            # Сама запись выполняется без удержания блокировки, чтобы не задерживать UI-поток
+            self.flush()
+
+    def _take_pending_locked(self):
+        # Вызывается под self._lock; запись выполняет _apply под self._write_lock
+        if self._pending_clear:
+            self._pending_clear = False
+            return ('clear', None)
+        draft = self._pending
+        self._pending = None
+        if draft is None:
+            return None
+        return ('write', draft)
+
+    def _apply(self, action) -> None:
+        if action is None:
+            return
+        kind, draft = action
+        if kind == 'clear':
+            try:
+                os.remove(self.drafts_file)
+            except OSError:
+                pass
+            self._written = None
+            return
+        if self._written is not None and all(self._written.get(k) == v for k, v in draft.items()):
+            return
+        record = dict(draft, saved_at=datetime.now().isoformat())
+        tmp_file = self.drafts_file + ".tmp"
+        try:
+            # Пишем во временный файл и атомарно подменяем, чтобы сбой не оставил битый черновик
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.drafts_file)
+            self._written = record
+        except OSError as e:
+            from kivy.logger import Logger
+            Logger.error(f"DraftManager: Cannot write draft: {e}")
@@ -0,0 +1,223 @@
+"""
+Поиск почти одинаковых заметок: MinHash и LSH (locality-sensitive hashing).
+
+Текст заметки (заголовок, если он не "Без заголовка", и содержимое) в нижнем
+регистре и с одиночными пробелами режется на шинглы — подстроки по SHINGLE
+символов (шингл захватывает стык слов, поэтому заметки из одних и тех же
+частых слов не выглядят похожими). MinHash считается одной перестановкой (one permutation hashing):
+хеш каждого шингла попадает в одну из BINS корзин, в корзине остается
+минимальный; пустые корзины берут значение ближайшей следующей непустой
+(densification), так что и у коротких заметок сигнатура полная. Две
+заметки совпадают в корзине с вероятностью, равной мере Жаккара их
+множеств шинглов.
+
+Сигнатура режется на BANDS полос по ROWS значений; заметки с одинаковой
+полосой попадают в одно ведро. Кандидаты на дубликат — соседи по ведрам
+(BANDS обращений к словарям, а не проход по всем заметкам); каждый кандидат
+проверяется точной мерой Жаккара по шинглам текстов. При BANDS=8, ROWS=4
+пара с мерой 0.8 становится кандидатом с вероятностью 0.98, с мерой 0.7 —
+0.89, с мерой 0.3 — 0.06.
+
+Хеши шинглов — встроенный hash() строк: он меняется от запуска к запуску,
+поэтому сигнатуры не сохраняются, а индекс строится заново при загрузке.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+SHINGLE = 6
+BINS = 32
+ROWS = 4
+BANDS = BINS // ROWS
+# Минимальная мера Жаккара шинглов, при которой заметки считаются дубликатами
+THRESHOLD = 0.7
+# Для сигнатуры и проверки берется начало текста: длинные заметки не замедляют сохранение
+MAX_CHARS = 5000
+DEFAULT_TITLE = "Без заголовка"
+
+
+def note_text(note: Dict[str, Any]) -> str:
+    """Текст заметки для сравнения; у закрытых зашифрованных заметок — начало из preview."""
+    title = note.get("title") or ""
+    content = note.get("content")
+    if content is None:
+        content = note.get("preview") or ""
+    if title == DEFAULT_TITLE:
+        return content
+    return f"{title}\n{content}" if content else title
+
+
+def shingles(text: str) -> Set[str]:
+    """Шинглы нормализованного текста; текст короче SHINGLE — один шингл, пустой — ни одного."""
+    text = " ".join(text[:MAX_CHARS].lower().split())
+    if len(text) <= SHINGLE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+
+
+def signature(items: Set[str]) -> List[int]:
+    """MinHash-сигнатура из BINS значений для непустого множества шинглов."""
+    # Хеши по убыванию: в словаре по корзине остается последний записанный — минимальный
+    mins = {h % BINS: h for h in sorted(map(hash, items), reverse=True)}
+    values = [mins.get(b) for b in range(BINS)]
+    if len(mins) < BINS:
+        for b in range(BINS):
+            if values[b] is None:
+                step = 1
+                while (b + step) % BINS not in mins:
+                    step += 1
+                # Сдвиг входит в значение: иначе пустые корзины копировали бы соседнюю и у разных текстов
+                values[b] = hash((mins[(b + step) % BINS], step))
+    return values
+
+
+def band_keys(items: Set[str]) -> Optional[Tuple[int, ...]]:
+    """Ключи ведер LSH по полосам сигнатуры; None для пустого текста."""
+    if not items:
+        return None
+    values = signature(items)
+    return tuple(hash(tuple(values[i:i + ROWS])) for i in range(0, BINS, ROWS))
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+class DuplicateIndex:
+    """Ведра LSH по полосам MinHash-сигнатур заметок.
+
+    Хранит ссылки на записи заметок и ключи их ведер; тексты при проверке
+    кандидатов берутся из самих заметок. В ведре с одной заметкой лежит ее
+    id, с несколькими — список id: ведер столько же, сколько заметок на
+    полосу, и почти все они одиночные.
+    """
+
+    def __init__(self, notes: Iterable[Dict[str, Any]] = (), threshold: float = THRESHOLD):
+        self.threshold = threshold
+        self._notes: Dict[Any, Dict[str, Any]] = {}
+        self._keys: Dict[Any, Tuple[int, ...]] = {}
+        self._buckets: List[Dict[int, Any]] = [{} for _ in range(BANDS)]
+        for note in notes:
+            self.add(note)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, note_id: Any) -> bool:
+        return note_id in self._notes
+
+    def add(self, note: Dict[str, Any]) -> None:
+        self.add_prepared(note, band_keys(shingles(note_text(note))))
+
+    def add_prepared(self, note: Dict[str, Any], keys: Optional[Tuple[int, ...]]) -> None:
+        """Индексирует заметку с заранее посчитанными band_keys ее текста (None — пустой текст)."""
+        note_id = note["id"]
+        if note_id in self._notes:
+            self.remove(note_id)
+        self._notes[note_id] = note
+        if keys is None:
+            return
+        self._keys[note_id] = keys
+        for buckets, key in zip(self._buckets, keys):
+            current = buckets.get(key)
+            if current is None:
+                buckets[key] = note_id
+            elif isinstance(current, list):
+                current.append(note_id)
+            else:
+                buckets[key] = [current, note_id]
+
+    def update(self, note: Dict[str, Any]) -> None:
+        self.add(note)
+
+    def remove(self, note_id: Any) -> None:
+        self._notes.pop(note_id, None)
+        keys = self._keys.pop(note_id, None)
+        if keys is None:
+            return
+        for buckets, key in zip(self._buckets, keys):
+            current = buckets.get(key)
+            if isinstance(current, list):
+                current.remove(note_id)
+                if len(current) == 1:
+                    buckets[key] = current[0]
+            elif current == note_id:
+                del buckets[key]
+
+    def find(self, text: str, exclude: Any = None, limit: int = 5) -> List[Tuple[Dict[str, Any], float]]:
+        """Заметки, похожие на text не меньше threshold: [(заметка, мера)] по убыванию меры."""
+        items = shingles(text)
+        keys = band_keys(items)
+        if keys is None:
+            return []
+        result = []
+        for note_id in self._candidates(keys):
+            if note_id == exclude:
+                continue
+            note = self._notes[note_id]
+            similarity = jaccard(items, shingles(note_text(note)))
+            if similarity >= self.threshold:
+                result.append((note, similarity))
+        result.sort(key=lambda item: item[1], reverse=True)
+        return result[:limit]
+
+    def duplicates_of(self, note: Dict[str, Any], limit: int = 5) -> List[Tuple[Dict[str, Any], float]]:
+        return self.find(note_text(note), exclude=note["id"], limit=limit)
+
+    def clusters(self) -> List[List[Dict[str, Any]]]:
+        """Группы почти одинаковых заметок (от двух), самые большие первыми.
+
+        Проверяются только заметки из общих ведер; в ведре каждая сравнивается
+        с первой, и подтвержденные пары объединяются (union-find), так что
+        группа может собраться цепочкой через несколько ведер.
+        """
+        parent: Dict[Any, Any] = {}
+        cache: Dict[Any, Set[str]] = {}
+
+        def find_root(node):
+            while parent.get(node, node) != node:
+                parent[node] = parent.get(parent[node], parent[node])
+                node = parent[node]
+            return node
+
+        def items_of(note_id):
+            items = cache.get(note_id)
+            if items is None:
+                items = cache[note_id] = shingles(note_text(self._notes[note_id]))
+            return items
+
+        for buckets in self._buckets:
+            for members in buckets.values():
+                if not isinstance(members, list):
+                    continue
+                first = members[0]
+                for other in members[1:]:
+                    a, b = find_root(first), find_root(other)
+                    if a == b:
+                        continue
+                    if jaccard(items_of(first), items_of(other)) >= self.threshold:
+                        parent[b] = a
+        groups: Dict[Any, List[Dict[str, Any]]] = {}
+        for note_id in parent:
+            groups.setdefault(find_root(note_id), []).append(self._notes[note_id])
+        for note_id in list(groups):
+            if note_id not in parent:
+                groups[note_id].append(self._notes[note_id])
+        result = [sorted(group, key=lambda n: n.get("updated_at", ""), reverse=True) for group in groups.values()]
+        result.sort(key=len, reverse=True)
+        return result
+
+    # Internal
+    def _candidates(self, keys: Sequence[int]) -> Set[Any]:
+        result: Set[Any] = set()
+        for buckets, key in zip(self._buckets, keys):
+            members = buckets.get(key)
+            if members is None:
+                continue
+            if isinstance(members, list):
+                result.update(members)
+            else:
+                result.add(members)
+        return result
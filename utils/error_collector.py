@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+class ErrorCollector:
+    """Агрегирует ошибки вместо показа попапа на каждое исключение.
+
+    Ошибки группируются по сигнатуре (заголовок, тип исключения, место
+    возникновения); повторы только увеличивают счетчик, поэтому traceback
+    форматируется один раз на сигнатуру. Последние capacity сигнатур хранятся
+    в кольцевом буфере и с задержкой сохраняются на диск. Пользователь видит
+    не больше одного сводного попапа за popup_interval секунд.
+    """
+
+    def __init__(self, log_file: str = "errors.json", capacity: int = 100,
+                 popup_interval: float = 10.0, save_delay: float = 2.0,
+                 clock=None, time_func: Callable[[], float] = time.monotonic):
+        self.log_file = log_file
+        self.capacity = capacity
+        self.popup_interval = popup_interval
+        self.save_delay = save_delay
+        self._clock = clock
+        self._time = time_func
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Сигнатура -> число повторов с момента последнего попапа
+        self._unseen: Dict[str, int] = {}
+        self._last_popup = float('-inf')
+        self._popup = None
+        self._popup_event = None
+        self._save_event = None
+        self._schedule_pending = False
+        self._dirty = False
+        self._load()
+
+    @property
+    def clock(self):
+        if self._clock is None:
+            from kivy.clock import Clock
+            self._clock = Clock
+        return self._clock
+
+    def report(self, title: str, exc: Optional[BaseException] = None, message: str = "") -> None:
+        """Регистрирует ошибку; можно вызывать из любого потока."""
+        signature = self._signature(title, exc, message)
+        now = datetime.now().isoformat()
+        with self._lock:
+            entry = self._entries.get(signature)
+            if entry is None:
+                entry = {
+                    "signature": signature,
+                    "title": title,
+                    "error": f"{type(exc).__name__}: {exc}" if exc is not None else message,
+                    "traceback": self._format_traceback(exc),
+                    "count": 0,
+                    "first_seen": now,
+                }
+                self._entries[signature] = entry
+                while len(self._entries) > self.capacity:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._unseen.pop(evicted, None)
+                self._log(entry)
+            else:
+                self._entries.move_to_end(signature)
+            entry["count"] += 1
+            entry["last_seen"] = now
+            self._unseen[signature] = self._unseen.get(signature, 0) + 1
+            self._dirty = True
+            if self._schedule_pending:
+                # При серии ошибок планирование на UI-потоке уже запрошено
+                return
+            self._schedule_pending = True
+        # Clock.schedule_once потокобезопасен — планирование уходит на UI-поток
+        self.clock.schedule_once(self._schedule, 0)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Копия буфера ошибок (от старых к новым)."""
+        with self._lock:
+            return [dict(entry) for entry in self._entries.values()]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._unseen.clear()
+            self._dirty = True
+        self.flush()
+
+    def flush(self) -> None:
+        """Немедленно сохраняет буфер на диск (при паузе/остановке приложения)."""
+        if self._save_event is not None:
+            self._save_event.cancel()
+            self._save_event = None
+        with self._lock:
+            if not self._dirty:
+                return
+            data = [dict(entry) for entry in self._entries.values()]
+            self._dirty = False
+        tmp_file = self.log_file + ".tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.log_file)
+        except OSError as e:
+            from kivy.logger import Logger
+            Logger.error(f"ErrorCollector: Cannot save {self.log_file}: {e}")
+
+    # Internal
+    def _schedule(self, dt) -> None:
+        with self._lock:
+            self._schedule_pending = False
+        if self._save_event is None:
+            self._save_event = self.clock.schedule_once(lambda dt: self.flush(), self.save_delay)
+        if self._popup_event is None and self._popup is None:
+            delay = max(0.0, self._last_popup + self.popup_interval - self._time())
+            self._popup_event = self.clock.schedule_once(self._show_summary, delay)
+
+    def _show_summary(self, dt) -> None:
+        self._popup_event = None
+        with self._lock:
+            unseen = [(self._entries[sig], count) for sig, count in self._unseen.items()
+                      if sig in self._entries]
+            self._unseen.clear()
+        if not unseen:
+            return
+        self._last_popup = self._time()
+        total = sum(count for _, count in unseen)
+        lines = [f"Ошибок: {total} (разных: {len(unseen)})", ""]
+        for entry, count in unseen[:5]:
+            lines.append(f"• {entry['title']} ×{count}\n  {entry['error']}")
+        if len(unseen) > 5:
+            lines.append(f"... и еще {len(unseen) - 5}")
+        # Подробности — только для первой ошибки, остальные есть в журнале
+        if unseen[0][0]["traceback"]:
+            lines.extend(["", unseen[0][0]["traceback"]])
+        from .debug_utils import show_error_popup
+        self._popup = show_error_popup("Ошибки", "\n".join(lines))
+        if self._popup is not None:
+            self._popup.bind(on_dismiss=self._on_popup_dismiss)
+
+    def _on_popup_dismiss(self, popup) -> None:
+        self._popup = None
+        # Ошибки, пришедшие пока попап был открыт, покажем следующей сводкой
+        if self._unseen:
+            self._schedule(0)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.log_file):
+            return
+        try:
+            with open(self.log_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return
+        if not isinstance(data, list):
+            return
+        for entry in data[-self.capacity:]:
+            if isinstance(entry, dict) and "signature" in entry:
+                self._entries[entry["signature"]] = entry
+
+    @staticmethod
+    def _signature(title: str, exc: Optional[BaseException], message: str) -> str:
+        if exc is None:
+            return f"{title}|{message.splitlines()[0] if message else ''}"
+        # Место возникновения — самый глубокий кадр traceback
+        tb = exc.__traceback__
+        location = ""
+        while tb is not None:
+            location = f"{tb.tb_frame.f_code.co_filename}:{tb.tb_lineno}"
+            tb = tb.tb_next
+        return f"{title}|{type(exc).__name__}|{location}"
+
+    @staticmethod
+    def _format_traceback(exc: Optional[BaseException]) -> str:
+        if exc is None or exc.__traceback__ is None:
+            return ""
+        return "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+
+    @staticmethod
+    def _log(entry: Dict[str, Any]) -> None:
+        try:
+            from kivy.logger import Logger
+            Logger.error(f"ErrorCollector: {entry['title']}: {entry['error']}")
+        except Exception:
+            pass
+
+
+_collector: Optional[ErrorCollector] = None
+
+
+def get_error_collector() -> ErrorCollector:
+    """Общий сборщик ошибок приложения (создается при первой ошибке)."""
+    global _collector
+    if _collector is None:
+        _collector = ErrorCollector()
+    return _collector
+
+
+def report_error(title: str, exc: Optional[BaseException] = None, message: str = "") -> None:
+    """Сообщает об ошибке в общий сборщик (вместо show_error_popup на каждую ошибку)."""
+    try:
+        get_error_collector().report(title, exc, message)
+    except Exception as e:
+        from kivy.logger import Logger
+        Logger.error(f"ErrorCollector: Cannot report error '{title}': {e}")
+
+
+def flush_errors() -> None:
+    """Сохраняет журнал ошибок на диск, если ошибки уже были."""
+    if _collector is not None:
+        _collector.flush()
@@ -0,0 +1,158 @@
+"""
+Слежение за изменением файла другими программами.
+
+На Linux (и Android) используется inotify: поток ждет событий каталога и
+ничего не делает, пока файл не трогают. Если inotify недоступен, файл
+проверяется по таймеру: один os.stat (время изменения, размер, inode) за
+проверку, содержимое не читается.
+
+on_change() вызывается на UI-потоке (через Clock), один раз на серию
+событий, пришедших подряд в пределах debounce секунд.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from typing import Callable, Optional
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def file_signature(path: str):
+    """(mtime_ns, размер, inode) файла или None, если его нет."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FileWatcher:
+    """Следит за файлом path: inotify, если есть, иначе опрос os.stat каждые poll_interval секунд."""
+
+    def __init__(self, path: str, on_change: Callable[[], None], poll_interval: float = 2.0,
+                 debounce: float = 0.1):
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.backend: Optional[str] = None
+        self._fd: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._poll_event = None
+        self._pending = None
+        self._signature = None
+
+    def start(self) -> str:
+        """Запускает слежение; возвращает способ: "inotify" или "poll"."""
+        if self.backend is not None:
+            return self.backend
+        from kivy.clock import Clock
+        from kivy.logger import Logger
+        self._stop.clear()
+        if self._start_inotify():
+            self.backend = "inotify"
+        else:
+            self._signature = file_signature(self.path)
+            self._poll_event = Clock.schedule_interval(self._poll, self.poll_interval)
+            self.backend = "poll"
+        Logger.info(f"FileWatcher: Watching {self.path} ({self.backend})")
+        return self.backend
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._poll_event is not None:
+            self._poll_event.cancel()
+            self._poll_event = None
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        self.backend = None
+
+    # Internal
+    def _start_inotify(self) -> bool:
+        libc = _load_libc()
+        if libc is None:
+            return False
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return False
+        # Следим за каталогом: файл могут заменить переименованием (так сохраняют многие редакторы)
+        directory = os.path.dirname(self.path).encode()
+        if libc.inotify_add_watch(fd, directory, _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+            os.close(fd)
+            return False
+        self._fd = fd
+        self._thread = threading.Thread(target=self._read_events, name="FileWatcher", daemon=True)
+        self._thread.start()
+        return True
+
+    def _read_events(self) -> None:
+        name = os.path.basename(self.path).encode()
+        fd = self._fd
+        while not self._stop.is_set():
+            # Таймаут нужен только для того, чтобы заметить stop()
+            ready, _, _ = select.select([fd], [], [], 1.0)
+            if not ready:
+                continue
+            try:
+                data = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            except OSError:
+                return
+            offset = 0
+            changed = False
+            while offset + _EVENT_HEADER.size <= len(data):
+                _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                if data[offset:offset + length].rstrip(b"\0") == name:
+                    changed = True
+                offset += length
+            if changed:
+                from kivy.clock import Clock
+                Clock.schedule_once(self._schedule_change, 0)
+
+    def _poll(self, dt) -> None:
+        signature = file_signature(self.path)
+        if signature != self._signature:
+            self._signature = signature
+            self._schedule_change()
+
+    def _schedule_change(self, *args) -> None:
+        from kivy.clock import Clock
+        if self._pending is not None:
+            self._pending.cancel()
+        self._pending = Clock.schedule_once(self._fire, self.debounce)
+
+    def _fire(self, dt) -> None:
+        self._pending = None
+        try:
+            self.on_change()
+        except Exception as e:
+            from kivy.logger import Logger
+            Logger.error(f"FileWatcher: on_change failed: {e}")
@@ -0,0 +1,219 @@
+"""
+Шаблоны мигания фонарика (SOS, стробоскоп, азбука Морзе) и их проигрыватель.
+
+Шаблон — список шагов (включен, длительность в секундах). Проигрыватель
+работает в отдельном потоке и планирует переключения по абсолютным
+дедлайнам от момента старта, поэтому ошибки отдельных шагов не копятся.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+Pattern = List[Tuple[bool, float]]
+
+MORSE_CODE: Dict[str, str] = {
+    'A': '.-', 'B': '-...', 'C': '-.-.', 'D': '-..', 'E': '.', 'F': '..-.', 'G': '--.',
+    'H': '....', 'I': '..', 'J': '.---', 'K': '-.-', 'L': '.-..', 'M': '--', 'N': '-.',
+    'O': '---', 'P': '.--.', 'Q': '--.-', 'R': '.-.', 'S': '...', 'T': '-', 'U': '..-',
+    'V': '...-', 'W': '.--', 'X': '-..-', 'Y': '-.--', 'Z': '--..',
+    '0': '-----', '1': '.----', '2': '..---', '3': '...--', '4': '....-',
+    '5': '.....', '6': '-....', '7': '--...', '8': '---..', '9': '----.',
+    'А': '.-', 'Б': '-...', 'В': '.--', 'Г': '--.', 'Д': '-..', 'Е': '.', 'Ё': '.',
+    'Ж': '...-', 'З': '--..', 'И': '..', 'Й': '.---', 'К': '-.-', 'Л': '.-..', 'М': '--',
+    'Н': '-.', 'О': '---', 'П': '.--.', 'Р': '.-.', 'С': '...', 'Т': '-', 'У': '..-',
+    'Ф': '..-.', 'Х': '....', 'Ц': '-.-.', 'Ч': '---.', 'Ш': '----', 'Щ': '--.-',
+    'Ъ': '--.--', 'Ы': '-.--', 'Ь': '-..-', 'Э': '..-..', 'Ю': '..--', 'Я': '.-.-',
+    '.': '.-.-.-', ',': '--..--', '?': '..--..', '!': '-.-.--', '-': '-....-', '/': '-..-.',
+}
+
+
+def morse_pattern(text: str, unit: float = 0.15) -> Pattern:
+    """Переводит текст в азбуку Морзе (точка = 1 unit, тире = 3, пауза между словами = 7)."""
+    pattern: Pattern = []
+
+    def pause(units: int) -> None:
+        if not pattern:
+            return
+        if not pattern[-1][0]:
+            # Паузы не суммируем, а берем наибольшую
+            pattern[-1] = (False, max(pattern[-1][1], units * unit))
+        else:
+            pattern.append((False, units * unit))
+
+    for word in text.upper().split():
+        pause(7)
+        for char in word:
+            code = MORSE_CODE.get(char)
+            if not code:
+                continue
+            pause(3)
+            for i, symbol in enumerate(code):
+                if i:
+                    pause(1)
+                pattern.append((True, unit if symbol == '.' else 3 * unit))
+    if pattern:
+        pattern.append((False, 7 * unit))
+    return pattern
+
+
+def sos_pattern(unit: float = 0.2) -> Pattern:
+    return morse_pattern('SOS', unit)
+
+
+def strobe_pattern(frequency: float = 5.0, duty: float = 0.5) -> Pattern:
+    """Один период стробоскопа с частотой frequency Гц (проигрывается по кругу)."""
+    frequency = max(0.5, min(30.0, frequency))
+    duty = max(0.05, min(0.95, duty))
+    period = 1.0 / frequency
+    return [(True, period * duty), (False, period * (1.0 - duty))]
+
+
+class FlashlightPatternPlayer:
+    """Проигрывает шаблон в отдельном потоке с коррекцией дрейфа.
+
+    set_torch(on) вызывается из потока проигрывателя. Для каждого
+    переключения запоминается отклонение от запланированного момента
+    (jitter), статистика доступна через stats(). Среднее и максимум
+    считаются по всем шагам, p95 — по последним JITTER_WINDOW шагам, чтобы
+    стробоскоп по кругу не копил отклонения бесконечно.
+
+    Если set_torch бросает исключение, проигрывание прекращается, фонарик
+    выключается, а ошибка пишется в журнал.
+    """
+
+    # Последние миллисекунды перед дедлайном ждем активно — sleep недостаточно точен
+    SPIN_THRESHOLD = 0.001
+    JITTER_WINDOW = 1000
+
+    def __init__(self, set_torch: Callable[[bool], None],
+                 time_func: Callable[[], float] = time.perf_counter,
+                 on_thread_exit: Optional[Callable[[], None]] = None):
+        self.set_torch = set_torch
+        self.time_func = time_func
+        self.on_thread_exit = on_thread_exit
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.jitter: Deque[float] = deque(maxlen=self.JITTER_WINDOW)
+        self._reset_stats()
+        self.name: Optional[str] = None
+
+    def is_playing(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def play(self, pattern: Pattern, loop: bool = False, name: str = "pattern") -> None:
+        """Запускает шаблон (предыдущий останавливается)."""
+        self.stop()
+        if not pattern:
+            return
+        with self._lock:
+            self._stop = threading.Event()
+            self.jitter = deque(maxlen=self.JITTER_WINDOW)
+            self._reset_stats()
+            self.name = name
+            self._thread = threading.Thread(target=self._run, args=(list(pattern), loop, self._stop),
+                                            name="FlashlightPattern", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Останавливает проигрывание и гарантированно выключает фонарик."""
+        with self._lock:
+            thread = self._thread
+            self._stop.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        with self._lock:
+            if self._thread is thread:
+                self._thread = None
+
+    def stats(self) -> Dict[str, float]:
+        """Статистика отклонений переключений от расписания, в миллисекундах."""
+        count = self._jitter_count
+        if not count:
+            return {"count": 0, "mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        window = sorted(abs(j) for j in list(self.jitter))
+        p95 = window[min(len(window) - 1, int(len(window) * 0.95))] if window else 0.0
+        return {
+            "count": count,
+            "mean_ms": round(self._jitter_sum / count * 1000, 3),
+            "p95_ms": round(p95 * 1000, 3),
+            "max_ms": round(self._jitter_max * 1000, 3),
+        }
+
+    # Internal
+    def _reset_stats(self) -> None:
+        self._jitter_count = 0
+        self._jitter_sum = 0.0
+        self._jitter_max = 0.0
+
+    def _record_jitter(self, value: float) -> None:
+        self.jitter.append(value)
+        value = abs(value)
+        self._jitter_count += 1
+        self._jitter_sum += value
+        if value > self._jitter_max:
+            self._jitter_max = value
+
+    def _run(self, pattern: Pattern, loop: bool, stop: threading.Event) -> None:
+        torch_on = False
+        try:
+            deadline = self.time_func()
+            while not stop.is_set():
+                for on, duration in pattern:
+                    if not self._wait_until(deadline, stop):
+                        return
+                    if on != torch_on:
+                        try:
+                            self.set_torch(on)
+                        except Exception as e:
+                            # Состояние фонарика неизвестно — выключаем его в finally
+                            torch_on = True
+                            self._log_error(f"set_torch({on}) failed, stopping {self.name}: {e}")
+                            return
+                        torch_on = on
+                    self._record_jitter(self.time_func() - deadline)
+                    # Следующий дедлайн считаем от расписания, а не от факта
+                    deadline += duration
+                if not loop:
+                    self._wait_until(deadline, stop)
+                    return
+        finally:
+            if torch_on:
+                try:
+                    self.set_torch(False)
+                except Exception as e:
+                    self._log_error(f"could not turn torch off: {e}")
+            self._report()
+            if self.on_thread_exit is not None:
+                self.on_thread_exit()
+
+    def _wait_until(self, deadline: float, stop: threading.Event) -> bool:
+        while True:
+            remaining = deadline - self.time_func()
+            if remaining <= 0:
+                return not stop.is_set()
+            if remaining > self.SPIN_THRESHOLD:
+                if stop.wait(remaining - self.SPIN_THRESHOLD):
+                    return False
+            elif stop.is_set():
+                return False
+
+    def _report(self) -> None:
+        stats = self.stats()
+        if not stats["count"]:
+            return
+        try:
+            from kivy.logger import Logger
+            Logger.info(f"FlashlightPattern: {self.name} steps={stats['count']} "
+                        f"jitter mean={stats['mean_ms']} ms p95={stats['p95_ms']} ms max={stats['max_ms']} ms")
+        except Exception:
+            pass
+
+    def _log_error(self, message: str) -> None:
+        try:
+            from kivy.logger import Logger
+            Logger.error(f"FlashlightPattern: {message}")
+        except Exception:
+            pass
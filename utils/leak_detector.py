@@ -0,0 +1,204 @@
+"""
+Поиск утечек виджетов и памяти при переходах между экранами.
+
+На каждом переходе ScreenManager (после окончания анимации) выполняется
+gc.collect(), подсчитываются живые виджеты Kivy по классам и объем памяти,
+отслеживаемой tracemalloc. Утечкой считается рост, который не прекращается
+несколько циклов подряд (main -> edit -> main): однократный рост при первом
+открытии экрана (ленивая сборка, кэши) не учитывается.
+"""
+
+import gc
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+
+class LeakDetector:
+    """Снимки живых виджетов и памяти на переходах экранов.
+
+    cycle_screen — экран, возвращение на который завершает цикл; warmup —
+    сколько первых циклов пропустить; min_cycles — сколько циклов подряд
+    должен продолжаться рост, чтобы считаться утечкой; min_growth_bytes —
+    рост памяти за цикл, меньше которого считается шумом аллокатора.
+    """
+
+    def __init__(self, screen_manager, cycle_screen: str = 'main', warmup: int = 1,
+                 min_cycles: int = 3, trace_memory: bool = True, min_growth_bytes: int = 4096):
+        self.sm = screen_manager
+        self.cycle_screen = cycle_screen
+        self.warmup = warmup
+        self.min_cycles = min_cycles
+        self.trace_memory = trace_memory
+        self.min_growth_bytes = min_growth_bytes
+        self.samples: List[Dict[str, Any]] = []
+        self._baseline = None
+        self._last_snapshot = None
+        self._attached = False
+        self._started_tracemalloc = False
+
+    def attach(self) -> None:
+        """Начинает снимать состояние на каждом переходе экранов."""
+        if self._attached:
+            return
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracemalloc = True
+        self.sm.bind(current=self._on_current)
+        self._attached = True
+
+    def detach(self) -> None:
+        if not self._attached:
+            return
+        self.sm.unbind(current=self._on_current)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self._attached = False
+
+    def sample(self, screen: str) -> Dict[str, Any]:
+        """Снимает текущее состояние (вызывается автоматически после перехода)."""
+        from kivy.uix.widget import Widget
+        gc.collect()
+        # type() вместо isinstance: isinstance на мертвом weakproxy бросает ReferenceError
+        widgets = Counter(cls.__name__ for cls in map(type, gc.get_objects()) if issubclass(cls, Widget))
+        sample = {"screen": screen, "widgets": dict(widgets), "widget_total": sum(widgets.values()),
+                  "gc_objects": len(gc.get_objects())}
+        if tracemalloc.is_tracing():
+            # Собственные снимки детектора в счет не идут
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            sample["traced_bytes"] = sum(stat.size for stat in snapshot.statistics('filename'))
+            if screen == self.cycle_screen:
+                if self._cycle_count() == self.warmup:
+                    self._baseline = snapshot
+                self._last_snapshot = snapshot
+        self.samples.append(sample)
+        return sample
+
+    def report(self) -> Dict[str, Any]:
+        """Рост, сохраняющийся min_cycles циклов подряд после прогрева."""
+        cycles = [s for s in self.samples if s["screen"] == self.cycle_screen][self.warmup:]
+        result: Dict[str, Any] = {"cycles": len(cycles), "widget_growth": {}, "memory_growth": None}
+        window = cycles[-(self.min_cycles + 1):]
+        if len(window) < self.min_cycles + 1:
+            result["error"] = f"Нужно минимум {self.warmup + self.min_cycles + 1} возвращений на '{self.cycle_screen}'"
+            return result
+        classes = set()
+        for sample in window:
+            classes.update(sample["widgets"])
+        for name in sorted(classes):
+            counts = [sample["widgets"].get(name, 0) for sample in window]
+            if all(b > a for a, b in zip(counts, counts[1:])):
+                result["widget_growth"][name] = {
+                    "counts": counts,
+                    "per_cycle": (counts[-1] - counts[0]) / (len(counts) - 1),
+                }
+        memory = [sample.get("traced_bytes") for sample in window]
+        if None not in memory and all(b - a >= self.min_growth_bytes for a, b in zip(memory, memory[1:])):
+            result["memory_growth"] = {
+                "bytes": memory,
+                "per_cycle": (memory[-1] - memory[0]) // (len(memory) - 1),
+                "top": self._top_allocations(),
+            }
+        return result
+
+    def has_leaks(self) -> bool:
+        report = self.report()
+        return bool(report["widget_growth"] or report["memory_growth"])
+
+    def format_report(self) -> str:
+        report = self.report()
+        if "error" in report:
+            return f"LeakDetector: {report['error']}"
+        lines = [f"LeakDetector: {report['cycles']} циклов после прогрева"]
+        for name, growth in report["widget_growth"].items():
+            lines.append(f"  {name}: {growth['counts']} (+{growth['per_cycle']:.1f} за цикл)")
+        if report["memory_growth"]:
+            memory = report["memory_growth"]
+            lines.append(f"  tracemalloc: +{memory['per_cycle']} байт за цикл")
+            lines.extend(f"    {line}" for line in memory["top"])
+        if len(lines) == 1:
+            lines.append("  устойчивого роста не найдено")
+        return "\n".join(lines)
+
+    def run_cycles(self, cycles: int, open_editor: Callable[[], None], close_editor: Callable[[], None],
+                   on_done: Optional[Callable[["LeakDetector"], None]] = None) -> None:
+        """Автоматически выполняет cycles переходов cycle_screen -> редактор -> cycle_screen.
+
+        Следующий шаг запускается после окончания анимации перехода, чтобы
+        снимки делались в установившемся состоянии.
+        """
+        from kivy.clock import Clock
+        self.attach()
+        steps: List[Callable[[], None]] = [open_editor, close_editor] * cycles
+
+        def next_step(*args):
+            if not steps:
+                if on_done is not None:
+                    on_done(self)
+                return
+            step = steps.pop(0)
+            transition = self.sm.transition
+
+            def on_complete(*args):
+                transition.unbind(on_complete=on_complete)
+                # Снимок делается на следующем кадре — шаг ждет еще один кадр
+                Clock.schedule_once(next_step, 0.05)
+
+            transition.bind(on_complete=on_complete)
+            step()
+
+        Clock.schedule_once(next_step, 0)
+
+    # Internal
+    def _on_current(self, sm, name):
+        from kivy.clock import Clock
+        transition = sm.transition
+
+        def on_complete(*args):
+            transition.unbind(on_complete=on_complete)
+            Clock.schedule_once(lambda dt: self.sample(name), 0)
+
+        transition.bind(on_complete=on_complete)
+
+    def _cycle_count(self) -> int:
+        return sum(1 for s in self.samples if s["screen"] == self.cycle_screen)
+
+    def _top_allocations(self, limit: int = 10) -> List[str]:
+        if self._baseline is None or self._last_snapshot is None:
+            return []
+        stats = self._last_snapshot.compare_to(self._baseline, 'lineno')
+        return [str(stat) for stat in stats[:limit] if stat.size_diff > 0]
+
+
+def run_leak_check(app, cycles: int = 10, min_cycles: int = 3) -> None:
+    """Прогоняет циклы main -> edit -> main в запущенном приложении и останавливает его.
+
+    Результат — в app.leak_detector; main.py --leak-check завершает процесс
+    с кодом 1, если найден устойчивый рост.
+    """
+    from kivy.logger import Logger
+    detector = LeakDetector(app.sm, min_cycles=min_cycles)
+    app.leak_detector = detector
+
+    def open_editor():
+        app.main_screen.add_note(None)
+
+    def close_editor():
+        app.edit_screen.on_cancel()
+
+    def done(detector):
+        Logger.info(detector.format_report())
+        detector.detach()
+        app.stop()
+
+    if app.sm.current != 'main':
+        app.sm.current = 'main'
+    # Стартовый экран уже показан до подключения — снимаем его вручную
+    detector.attach()
+    detector.sample(app.sm.current)
+    detector.run_cycles(cycles, open_editor, close_editor, on_done=done)
@@ -0,0 +1,197 @@
+"""
+Облегченный Markdown для заметок: заголовки, списки, чек-листы, жирный и курсив.
+
+Текст разбивается на блоки (заголовок, пункт списка, пункт чек-листа,
+абзац). Разбор кэшируется по заметке и ее updated_at; при изменении текста
+заново разбираются только блоки, исходный текст которых изменился, —
+остальные объекты Block переиспользуются вместе с построенными по ним
+виджетами.
+"""
+
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+_HEADING = re.compile(r'^(#{1,6})\s+(.*)$')
+_CHECK = re.compile(r'^(\s*)[-*+]\s+\[([ xX])\]\s+(.*)$')
+_BULLET = re.compile(r'^(\s*)[-*+]\s+(.*)$')
+_ORDERED = re.compile(r'^(\s*)(\d+)[.)]\s+(.*)$')
+_CHECK_MARK = re.compile(r'^(\s*[-*+]\s+\[)([ xX])(\])')
+_BOLD = re.compile(r'\*\*(.+?)\*\*|__(.+?)__')
+_ITALIC = re.compile(r'(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])|(?<![\w_])_(?!\s)(.+?)(?<!\s)_(?![\w_])')
+
+
+class Block:
+    """Блок документа. line — номер первой строки блока в тексте заметки."""
+
+    __slots__ = ('kind', 'level', 'text', 'checked', 'number', 'line', 'source', '_markup')
+
+    def __init__(self, kind: str, text: str, source: str, line: int, level: int = 0,
+                 checked: bool = False, number: str = ''):
+        self.kind = kind
+        self.level = level
+        self.text = text
+        self.checked = checked
+        self.number = number
+        self.line = line
+        self.source = source
+        self._markup: Optional[str] = None
+
+    @property
+    def markup(self) -> str:
+        """Текст блока в разметке Kivy (Label.markup=True); строится один раз."""
+        if self._markup is None:
+            self._markup = inline_markup(self.text)
+        return self._markup
+
+    def __repr__(self):
+        return f"Block({self.kind!r}, {self.text!r}, line={self.line})"
+
+
+def escape_markup(text: str) -> str:
+    return text.replace('&', '&amp;').replace('[', '&bl;').replace(']', '&br;')
+
+
+def inline_markup(text: str) -> str:
+    """Жирный и курсив Markdown -> теги разметки Kivy; остальное экранируется."""
+    text = escape_markup(text)
+    text = _BOLD.sub(lambda m: f"[b]{m.group(1) or m.group(2)}[/b]", text)
+    return _ITALIC.sub(lambda m: f"[i]{m.group(1) or m.group(2)}[/i]", text)
+
+
+def split_chunks(content: str) -> List[Tuple[str, int]]:
+    """Делит текст на исходные фрагменты блоков: (текст фрагмента, номер первой строки).
+
+    Заголовки и пункты списков — по одной строке, абзац — подряд идущие
+    обычные строки. Разбор самих блоков здесь не выполняется.
+    """
+    chunks: List[Tuple[str, int]] = []
+    paragraph: List[str] = []
+    start = 0
+    for index, line in enumerate(content.split('\n')):
+        stripped = line.strip()
+        special = stripped[:1] in ('#', '-', '*', '+') or stripped[:1].isdigit()
+        if special and not (_HEADING.match(line) or _BULLET.match(line) or _ORDERED.match(line)):
+            special = False
+        if not stripped or special:
+            if paragraph:
+                chunks.append(('\n'.join(paragraph), start))
+                paragraph = []
+            if special:
+                chunks.append((line, index))
+            continue
+        if not paragraph:
+            start = index
+        paragraph.append(line)
+    if paragraph:
+        chunks.append(('\n'.join(paragraph), start))
+    return chunks
+
+
+def parse_chunk(source: str, line: int) -> Block:
+    match = _HEADING.match(source)
+    if match:
+        return Block('heading', match.group(2).strip(), source, line, level=len(match.group(1)))
+    match = _CHECK.match(source)
+    if match:
+        return Block('check', match.group(3), source, line, level=len(match.group(1)) // 2,
+                     checked=match.group(2) != ' ')
+    match = _ORDERED.match(source)
+    if match:
+        return Block('ordered', match.group(3), source, line, level=len(match.group(1)) // 2,
+                     number=match.group(2))
+    match = _BULLET.match(source)
+    if match:
+        return Block('bullet', match.group(2), source, line, level=len(match.group(1)) // 2)
+    # Переносы внутри абзаца, как в Markdown, превращаются в пробелы
+    return Block('paragraph', ' '.join(part.strip() for part in source.split('\n')), source, line)
+
+
+def parse(content: str, previous: Optional[List[Block]] = None) -> Tuple[List[Block], int]:
+    """Разбирает текст; блоки с неизменным исходным текстом берутся из previous.
+
+    Возвращает (блоки, число заново разобранных блоков).
+    """
+    pool: Dict[str, List[Block]] = {}
+    for block in previous or ():
+        pool.setdefault(block.source, []).append(block)
+    blocks = []
+    parsed = 0
+    for source, line in split_chunks(content):
+        candidates = pool.get(source)
+        if candidates:
+            block = candidates.pop(0)
+            block.line = line
+        else:
+            block = parse_chunk(source, line)
+            parsed += 1
+        blocks.append(block)
+    return blocks, parsed
+
+
+def toggle_checkbox_line(content: str, line: int) -> Optional[str]:
+    """Переключает отметку пункта чек-листа в строке line; None, если там не чек-лист."""
+    lines = content.split('\n')
+    if not 0 <= line < len(lines):
+        return None
+    match = _CHECK_MARK.match(lines[line])
+    if not match:
+        return None
+    mark = ' ' if match.group(2) != ' ' else 'x'
+    lines[line] = match.group(1) + mark + lines[line][match.end(2):]
+    return '\n'.join(lines)
+
+
+def preview_markup(blocks: List[Block], limit: int = 100) -> str:
+    """Однострочное превью для карточки: первые limit символов текста блоков."""
+    parts = []
+    remaining = limit
+    for block in blocks:
+        if remaining <= 0:
+            break
+        text = block.text
+        truncated = len(text) > remaining
+        if truncated:
+            text = text[:remaining]
+        remaining -= len(text)
+        if block.kind == 'heading':
+            part = f"[b]{inline_markup(text)}[/b]"
+        elif block.kind == 'check':
+            part = escape_markup('[x] ' if block.checked else '[ ] ') + inline_markup(text)
+        elif block.kind == 'bullet':
+            part = '• ' + inline_markup(text)
+        elif block.kind == 'ordered':
+            part = f"{block.number}. " + inline_markup(text)
+        else:
+            part = inline_markup(text)
+        parts.append(part + ('...' if truncated else ''))
+    return '  '.join(parts)
+
+
+class MarkdownCache:
+    """Разобранные блоки заметок, ключ — id заметки, актуальность — updated_at."""
+
+    def __init__(self, max_notes: int = 500):
+        self.max_notes = max_notes
+        self._entries: "OrderedDict[Any, Tuple[str, List[Block]]]" = OrderedDict()
+        self.stats = {"hits": 0, "parsed_blocks": 0, "reused_blocks": 0}
+
+    def blocks(self, note: Dict[str, Any]) -> List[Block]:
+        note_id = note.get('id')
+        updated_at = note.get('updated_at', '')
+        entry = self._entries.get(note_id)
+        if entry is not None:
+            self._entries.move_to_end(note_id)
+            if entry[0] == updated_at:
+                self.stats["hits"] += 1
+                return entry[1]
+        blocks, parsed = parse(note.get('content', ''), entry[1] if entry else None)
+        self.stats["parsed_blocks"] += parsed
+        self.stats["reused_blocks"] += len(blocks) - parsed
+        self._entries[note_id] = (updated_at, blocks)
+        while len(self._entries) > self.max_notes:
+            self._entries.popitem(last=False)
+        return blocks
+
+    def invalidate(self, note_id) -> None:
+        self._entries.pop(note_id, None)
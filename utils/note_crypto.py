@@ -0,0 +1,111 @@
+"""
+Шифрование заметок паролем: ключ из scrypt, шифр AES-GCM (пакет cryptography).
+
+Каждое тело заметки шифруется отдельно, со своим случайным nonce; номер
+заметки входит в связанные данные (AAD), поэтому подменить тело одной заметки
+телом другой незаметно нельзя. Ключ выводится из пароля один раз за сеанс:
+повторная разблокировка тем же паролем берет ключ из кэша.
+"""
+
+import base64
+import hashlib
+import os
+from typing import Any, Dict
+
+try:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:  # без cryptography режим шифрования недоступен
+    AESGCM = None
+    InvalidTag = ValueError
+
+FORMAT = "encrypted-notes"
+VERSION = 1
+# n = 2**14 — около 16 МБ памяти и десятков миллисекунд на телефоне
+DEFAULT_KDF = {"name": "scrypt", "n": 2 ** 14, "r": 8, "p": 1}
+_NONCE_SIZE = 12
+_CHECK_PLAINTEXT = b"notes-check-v1"
+_CHECK_AAD = b"check"
+
+# Ключи, выведенные в этом сеансе: (хэш пароля с солью, параметры) -> ключ
+_key_cache: Dict[bytes, bytes] = {}
+
+
+class WrongPassphrase(ValueError):
+    pass
+
+
+def available() -> bool:
+    return AESGCM is not None
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii')
+
+
+def new_kdf_params() -> Dict[str, Any]:
+    params = dict(DEFAULT_KDF)
+    params["salt"] = _b64(os.urandom(16))
+    return params
+
+
+def derive_key(passphrase: str, params: Dict[str, Any]) -> bytes:
+    """Ключ AES-256 из пароля; scrypt выполняется один раз на пароль и соль."""
+    if params.get("name") != "scrypt":
+        raise ValueError(f"Unsupported KDF: {params.get('name')}")
+    salt = base64.b64decode(params["salt"])
+    n, r, p = int(params["n"]), int(params["r"]), int(params["p"])
+    cache_key = hashlib.blake2b(passphrase.encode('utf-8'), key=salt,
+                                person=f"{n}:{r}:{p}".encode('ascii')[:16]).digest()
+    key = _key_cache.get(cache_key)
+    if key is None:
+        key = hashlib.scrypt(passphrase.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                             maxmem=256 * n * r + 1024 * 1024, dklen=32)
+        _key_cache[cache_key] = key
+    return key
+
+
+def body_aad(note_id) -> bytes:
+    return f"body:{note_id}".encode('utf-8')
+
+
+class NoteCipher:
+    """AES-GCM с ключом из пароля; шифротекст — base64(nonce + данные + тег)."""
+
+    def __init__(self, key: bytes):
+        if AESGCM is None:
+            raise RuntimeError("Encryption requires the 'cryptography' package")
+        self._aead = AESGCM(key)
+        self.stats = {"encrypted": 0, "decrypted": 0}
+
+    @classmethod
+    def unlock(cls, passphrase: str, params: Dict[str, Any], check: str) -> "NoteCipher":
+        """Шифр для сохраненного хранилища; WrongPassphrase, если пароль не подходит."""
+        cipher = cls(derive_key(passphrase, params))
+        try:
+            ok = cipher.decrypt(check, _CHECK_AAD) == _CHECK_PLAINTEXT
+        except (InvalidTag, ValueError):
+            ok = False
+        if not ok:
+            raise WrongPassphrase("Wrong passphrase")
+        return cipher
+
+    def make_check(self) -> str:
+        """Проверочный шифротекст: по нему unlock() узнает неверный пароль."""
+        return self.encrypt(_CHECK_PLAINTEXT, _CHECK_AAD)
+
+    def encrypt(self, data: bytes, aad: bytes) -> str:
+        nonce = os.urandom(_NONCE_SIZE)
+        self.stats["encrypted"] += 1
+        return _b64(nonce + self._aead.encrypt(nonce, data, aad))
+
+    def decrypt(self, token: str, aad: bytes) -> bytes:
+        raw = base64.b64decode(token)
+        self.stats["decrypted"] += 1
+        return self._aead.decrypt(raw[:_NONCE_SIZE], raw[_NONCE_SIZE:], aad)
+
+    def encrypt_text(self, text: str, aad: bytes) -> str:
+        return self.encrypt(text.encode('utf-8'), aad)
+
+    def decrypt_text(self, token: str, aad: bytes) -> str:
+        return self.decrypt(token, aad).decode('utf-8')
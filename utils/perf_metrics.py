@@ -0,0 +1,26 @@
+"""
+Последние замеры длительности ключевых операций (для панели производительности).
+
+Модуль не зависит от kivy, чтобы его можно было использовать в DataManager.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+_last: Dict[str, float] = {}
+
+
+def last(name: str) -> Optional[float]:
+    """Длительность последнего выполнения операции в секундах (или None)."""
+    return _last.get(name)
+
+
+@contextmanager
+def measure(name: str):
+    """Замеряет длительность блока и записывает ее под именем name."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _last[name] = time.perf_counter() - start
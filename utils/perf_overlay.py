@@ -0,0 +1,140 @@
+"""
+Панель производительности поверх интерфейса (FPS, худший кадр, длительность
+refresh_notes и save_notes, число виджетов, RSS процесса).
+"""
+
+import os
+import time
+
+from . import perf_metrics
+
+
+def _read_rss_mb():
+    """Текущий RSS процесса в МБ (Linux/Android), None если недоступно."""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def count_widgets(root):
+    """Число виджетов в дереве root (включая сам root)."""
+    # Обход без рекурсии: дерево виджетов может быть глубоким
+    count = 0
+    stack = [root]
+    while stack:
+        widget = stack.pop()
+        count += 1
+        stack.extend(widget.children)
+    return count
+
+
+class PerfOverlay:
+    """Переключаемая панель с метриками производительности.
+
+    Каждый кадр только увеличивается счетчик и обновляется максимум dt,
+    без создания объектов; текст панели пересобирается раз в interval секунд.
+    Подсчет виджетов обходит все дерево, поэтому выполняется лишь раз в
+    widget_interval секунд, а между замерами показывается прошлое значение.
+    """
+
+    def __init__(self, interval: float = 0.5, widget_interval: float = 5.0):
+        self.interval = interval
+        self.widget_interval = widget_interval
+        self.label = None
+        self._frame_event = None
+        self._refresh_event = None
+        self._frames = 0
+        self._worst = 0.0
+        self._elapsed = 0.0
+        self._widgets = None
+        self._widgets_at = 0.0
+
+    @property
+    def visible(self) -> bool:
+        return self.label is not None and self.label.parent is not None
+
+    def toggle(self) -> bool:
+        """Показывает/скрывает панель; возвращает новое состояние."""
+        if self.visible:
+            self.hide()
+        else:
+            self.show()
+        return self.visible
+
+    def show(self) -> None:
+        from kivy.core.window import Window
+        from kivy.clock import Clock
+        if self.visible:
+            return
+        if self.label is None:
+            self.label = self._create_label()
+        Window.add_widget(self.label)
+        self._frames = 0
+        self._worst = 0.0
+        self._elapsed = 0.0
+        self._widgets = None
+        self._frame_event = Clock.schedule_interval(self._on_frame, 0)
+        self._refresh_event = Clock.schedule_interval(self._refresh, self.interval)
+        self._refresh(0)
+
+    def hide(self) -> None:
+        from kivy.core.window import Window
+        for event in (self._frame_event, self._refresh_event):
+            if event is not None:
+                event.cancel()
+        self._frame_event = self._refresh_event = None
+        if self.visible:
+            Window.remove_widget(self.label)
+
+    # Internal
+    def _create_label(self):
+        from kivy.uix.label import Label
+        from kivy.graphics import Color, Rectangle
+        from kivy.metrics import dp
+        label = Label(size_hint=(None, None), size=(dp(230), dp(110)), font_size='11sp',
+                      halign='left', valign='top', color=(0.2, 1, 0.2, 1),
+                      pos_hint={'x': 0, 'top': 1})
+        label.text_size = label.size
+        with label.canvas.before:
+            Color(0, 0, 0, 0.6)
+            label.bg = Rectangle(pos=label.pos, size=label.size)
+        label.bind(pos=lambda inst, pos: setattr(inst.bg, 'pos', pos))
+        return label
+
+    def _on_frame(self, dt):
+        self._frames += 1
+        self._elapsed += dt
+        if dt > self._worst:
+            self._worst = dt
+
+    def _refresh(self, dt):
+        fps = self._frames / self._elapsed if self._elapsed > 0 else 0.0
+        refresh = perf_metrics.last('refresh_notes')
+        save = perf_metrics.last('save_notes')
+        rss = _read_rss_mb()
+        self.label.text = (
+            f"FPS: {fps:.1f}\n"
+            f"Худший кадр: {self._worst * 1000:.1f} мс\n"
+            f"refresh_notes: {self._fmt_ms(refresh)}\n"
+            f"save_notes: {self._fmt_ms(save)}\n"
+            f"Виджетов: {self._widget_count()}\n"
+            f"RSS: {'—' if rss is None else f'{rss:.1f} МБ'}"
+        )
+        self._frames = 0
+        self._worst = 0.0
+        self._elapsed = 0.0
+
+    def _widget_count(self):
+        now = time.monotonic()
+        if self._widgets is None or now - self._widgets_at >= self.widget_interval:
+            from kivy.core.window import Window
+            self._widgets = count_widgets(Window)
+            self._widgets_at = now
+        return self._widgets
+
+    @staticmethod
+    def _fmt_ms(seconds):
+        return '—' if seconds is None else f"{seconds * 1000:.1f} мс"
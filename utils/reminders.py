@@ -0,0 +1,198 @@
+"""
+Напоминания по заметкам: планировщик на двоичной куче.
+
+Сроки лежат в min-куче, а таймер (Clock.schedule_once) заводится один — на
+ближайший срок; опроса по интервалу нет. Добавление и снятие напоминания —
+O(log n): снятое помечается в записи и выбрасывается, когда дойдет до
+вершины кучи. Повторяющееся напоминание после срабатывания возвращается в
+кучу со следующим сроком.
+
+Пока приложение приостановлено, таймеры Kivy не идут: pause() снимает
+таймер, resume() срабатывает за все пропущенные сроки сразу (повторяющееся
+— один раз, с числом пропущенных повторов) и заводит таймер заново.
+"""
+
+import heapq
+import itertools
+import time
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+# Дольше таймер не спит: если часы устройства перевели, срок пересчитается
+MAX_SLEEP = 3600.0
+
+_REMOVED = object()
+
+
+class Fired(NamedTuple):
+    """Сработавшее напоминание.
+
+    due — первый пропущенный срок; missed — сколько повторов пришлось на
+    пропущенное время сверх него (только у повторяющихся).
+    """
+    key: Hashable
+    due: float
+    interval: Optional[float]
+    missed: int
+
+
+class ReminderScheduler:
+    """Очередь напоминаний с одним таймером на ближайший срок.
+
+    clock — объект с schedule_once(callback, timeout), возвращающим событие
+    с cancel() (по умолчанию kivy.clock.Clock); time_func — текущее время в
+    секундах эпохи. Оба подменяются в тестах (tests/test_reminders.py) и бенчмарках.
+    on_due(fired) вызывается одним списком на все сроки, наступившие к моменту
+    проверки.
+    """
+
+    def __init__(self, on_due: Optional[Callable[[List[Fired]], None]] = None, clock=None,
+                 time_func: Callable[[], float] = time.time):
+        self.on_due = on_due
+        self._clock = clock
+        self._time = time_func
+        # Записи кучи: [срок, порядковый номер, ключ, интервал]
+        self._heap: List[list] = []
+        self._entries: Dict[Hashable, list] = {}
+        self._counter = itertools.count()
+        self._removed = 0
+        self._running = False
+        self._event = None
+        self._armed_for: Optional[float] = None
+
+    @property
+    def clock(self):
+        if self._clock is None:
+            from kivy.clock import Clock
+            self._clock = Clock
+        return self._clock
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def get(self, key) -> Optional[Tuple[float, Optional[float]]]:
+        """(срок, интервал) напоминания или None."""
+        entry = self._entries.get(key)
+        return (entry[0], entry[3]) if entry else None
+
+    def add(self, key, due: float, interval: Optional[float] = None) -> None:
+        """Ставит напоминание (прежнее с тем же ключом заменяется)."""
+        if interval is not None and interval <= 0:
+            raise ValueError(f"Reminder interval must be positive: {interval}")
+        self._discard(key)
+        entry = [due, next(self._counter), key, interval]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            self._arm()
+
+    def remove(self, key) -> bool:
+        if not self._discard(key):
+            return False
+        self._arm()
+        return True
+
+    def reset(self, items) -> None:
+        """Заменяет все напоминания: items — (ключ, срок, интервал); куча строится за O(n)."""
+        self._entries = {}
+        for key, due, interval in items:
+            self._entries[key] = [due, next(self._counter), key, interval]
+        self._heap = list(self._entries.values())
+        heapq.heapify(self._heap)
+        self._removed = 0
+        self._arm()
+
+    def next_due(self) -> Optional[float]:
+        heap = self._heap
+        while heap and heap[0][2] is _REMOVED:
+            heapq.heappop(heap)
+            self._removed -= 1
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now: Optional[float] = None) -> List[Fired]:
+        """Снимает все напоминания со сроком <= now; повторяющиеся переставляет вперед."""
+        if now is None:
+            now = self._time()
+        fired: List[Fired] = []
+        heap = self._heap
+        while True:
+            due = self.next_due()
+            if due is None or due > now:
+                break
+            entry = heap[0]
+            key, interval = entry[2], entry[3]
+            if interval:
+                # Пропущенные повторы не выдаются по одному — только их число
+                steps = int((now - due) // interval) + 1
+                entry[0] = due + steps * interval
+                heapq.heapreplace(heap, entry)
+                fired.append(Fired(key, due, interval, steps - 1))
+            else:
+                heapq.heappop(heap)
+                del self._entries[key]
+                fired.append(Fired(key, due, None, 0))
+        return fired
+
+    def start(self) -> None:
+        """Срабатывает за уже наступившие сроки и заводит таймер."""
+        self._running = True
+        self._on_timer()
+
+    def pause(self) -> None:
+        """Снимает таймер (приложение уходит в фон или закрывается)."""
+        self._running = False
+        self._cancel_event()
+
+    def resume(self) -> None:
+        """Сверка после паузы: все пропущенные сроки срабатывают сразу."""
+        self.start()
+
+    # Internal
+    def _discard(self, key) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        entry[2] = _REMOVED
+        self._removed += 1
+        # Помеченных записей больше половины — пересобираем кучу, чтобы не росла
+        if self._removed > len(self._heap) // 2:
+            self._heap = [e for e in self._heap if e[2] is not _REMOVED]
+            heapq.heapify(self._heap)
+            self._removed = 0
+        return True
+
+    def _cancel_event(self) -> None:
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        self._armed_for = None
+
+    def _arm(self) -> None:
+        if not self._running:
+            return
+        due = self.next_due()
+        if due is None:
+            self._cancel_event()
+            return
+        if self._event is not None and self._armed_for == due:
+            return
+        self._cancel_event()
+        delay = min(max(0.0, due - self._time()), MAX_SLEEP)
+        self._event = self.clock.schedule_once(self._on_timer, delay)
+        self._armed_for = due
+
+    def _on_timer(self, *args) -> None:
+        self._event = None
+        self._armed_for = None
+        if not self._running:
+            return
+        fired = self.pop_due()
+        if fired and self.on_due is not None:
+            try:
+                self.on_due(fired)
+            except Exception as e:
+                from kivy.logger import Logger
+                Logger.error(f"ReminderScheduler: on_due failed: {e}")
+        self._arm()
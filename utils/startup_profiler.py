@@ -0,0 +1,169 @@
+"""
+Профилирование запуска приложения (main.py --profile-startup).
+
+Записывает длительность фаз старта и время импорта модулей в JSON-отчет.
+Когда профилирование не включено, phase() возвращает пустой контекст и
+ничего не измеряет.
+"""
+
+import builtins
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any
+
+_active = None
+
+
+class StartupProfiler:
+    """Собирает тайминги фаз старта и импортов."""
+
+    def __init__(self, report_file: str = "startup_profile.json"):
+        self.report_file = report_file
+        self.started_at = time.perf_counter()
+        self.phases: List[Dict[str, Any]] = []
+        self.imports: Dict[str, Dict[str, float]] = {}
+        self._depth = 0
+        self._import_stack: List[float] = []
+        self._original_import = None
+        self._main_thread = threading.get_ident()
+        self._finished = False
+
+    # Фазы
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            end = time.perf_counter()
+            self.phases.append({
+                "name": name,
+                "depth": self._depth,
+                "start_ms": round((start - self.started_at) * 1000, 2),
+                "duration_ms": round((end - start) * 1000, 2),
+            })
+
+    def mark(self, name: str) -> None:
+        """Отмечает момент времени (например, первый кадр)."""
+        self.phases.append({
+            "name": name,
+            "depth": self._depth,
+            "start_ms": round((time.perf_counter() - self.started_at) * 1000, 2),
+            "duration_ms": 0.0,
+        })
+
+    # Импорты
+    def install_import_hook(self) -> None:
+        """Подменяет __import__, чтобы замерить время первой загрузки модулей."""
+        if self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        original = self._original_import
+        import sys
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if threading.get_ident() != self._main_thread:
+                return original(name, globals, locals, fromlist, level)
+            key = name
+            if level > 0 and globals:
+                package = globals.get('__package__') or ''
+                key = '.'.join(package.split('.')[:len(package.split('.')) - level + 1] + [name]).strip('.')
+            if key in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            self._import_stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = self._import_stack.pop()
+                if self._import_stack:
+                    self._import_stack[-1] += elapsed
+                if key not in self.imports:
+                    self.imports[key] = {
+                        "inclusive_ms": round(elapsed * 1000, 2),
+                        "self_ms": round((elapsed - children) * 1000, 2),
+                    }
+
+        builtins.__import__ = timed_import
+
+    def remove_import_hook(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    # Отчет
+    def report(self, top: int = 40) -> Dict[str, Any]:
+        imports = sorted(self.imports.items(), key=lambda item: item[1]["inclusive_ms"], reverse=True)
+        top_level = [name for name in self.imports if '.' not in name]
+        return {
+            "total_ms": round((time.perf_counter() - self.started_at) * 1000, 2),
+            "phases": sorted(self.phases, key=lambda p: p["start_ms"]),
+            "imports_total_ms": round(sum(self.imports[name]["inclusive_ms"] for name in top_level), 2),
+            "imports_by_self_ms": sorted(
+                ({"module": name, **times} for name, times in self.imports.items()),
+                key=lambda item: item["self_ms"], reverse=True)[:top],
+            "imports_by_inclusive_ms": [{"module": name, **times} for name, times in imports[:top]],
+        }
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """Снимает перехват импортов и записывает отчет."""
+        if self._finished:
+            return None
+        self._finished = True
+        self.remove_import_hook()
+        data = self.report()
+        try:
+            with open(self.report_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        except OSError:
+            pass
+        return data
+
+
+def start(report_file: str = "startup_profile.json") -> StartupProfiler:
+    """Включает профилирование старта (вызывается до импорта kivy)."""
+    global _active
+    _active = StartupProfiler(report_file)
+    _active.install_import_hook()
+    return _active
+
+
+def get_profiler() -> Optional[StartupProfiler]:
+    return _active
+
+
+def phase(name: str):
+    """Контекст фазы старта; без активного профилировщика ничего не делает."""
+    if _active is None:
+        return _null_phase()
+    return _active.phase(name)
+
+
+@contextmanager
+def _null_phase():
+    yield
+
+
+def finish_on_first_frame() -> None:
+    """Записывает отчет после отрисовки первого кадра."""
+    if _active is None:
+        return
+    from kivy.clock import Clock
+    from kivy.logger import Logger
+
+    def _on_frame(dt):
+        _active.mark("first_frame")
+        data = _active.finish()
+        if data is None:
+            return
+        Logger.info(f"StartupProfiler: First frame at {data['phases'][-1]['start_ms']:.1f} ms, "
+                    f"imports {data['imports_total_ms']:.1f} ms, report: {_active.report_file}")
+        for item in data["phases"]:
+            Logger.info(f"StartupProfiler: {'  ' * item['depth']}{item['name']}: {item['duration_ms']:.1f} ms")
+
+    Clock.schedule_once(_on_frame, 0)
@@ -0,0 +1,365 @@
+"""
+Синхронизация заметок между устройствами через HTTP-сервер.
+
+Сервер хранит последнюю версию каждой заметки (по uid) с номером ревизии rev;
+номера растут на весь сервер, поэтому курсор устройства — это просто номер
+последней полученной ревизии. Синхронизация:
+
+1. отправляет заметки, измененные после прошлой отправки (DataManager.sync_seq),
+   и удаления — пакетами по batch_size; с каждой заметкой идет base_rev —
+   ревизия, от которой она правилась. Если на сервере уже другая ревизия,
+   заметка возвращается как устаревшая вместе с серверной версией;
+2. забирает изменения после курсора, тоже пакетами;
+3. сливает их с локальными: если заметку правили и здесь, и на сервере,
+   побеждает версия с более поздним updated_at, а проигравшая сохраняется
+   отдельной заметкой с пометкой «(конфликт)».
+
+Объем работы и трафика зависит от числа изменений, а не от числа заметок:
+измененные выбираются по номеру правки, сервер отдает записи после курсора.
+Тела запросов и ответов — JSON в gzip; соединения держатся открытыми (keep-alive)
+и переиспользуются из пула.
+
+Вложения (файлы изображений) не синхронизируются. Зашифрованное хранилище не
+синхронизируется: на сервер ушел бы открытый текст.
+"""
+
+import gzip
+import http.client
+import json
+import os
+import queue
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from .data_manager import LOCAL_KEYS
+
+BATCH_SIZE = 200
+# Раундов отправки за одну синхронизацию: повторный нужен для копий конфликтов
+MAX_ROUNDS = 3
+CONFLICT_SUFFIX = " (конфликт)"
+
+
+class SyncError(Exception):
+    pass
+
+
+def encode_payload(payload: Any) -> bytes:
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return gzip.compress(data, compresslevel=6)
+
+
+def decode_payload(data: bytes, encoding: Optional[str] = None) -> Any:
+    if encoding == 'gzip':
+        data = gzip.decompress(data)
+    return json.loads(data.decode('utf-8')) if data else None
+
+
+def sync_record(note: Dict[str, Any]) -> Dict[str, Any]:
+    """Поля заметки, которые уходят на сервер (вложенные списки и словари копируются)."""
+    return {key: (value.copy() if isinstance(value, (list, dict)) else value)
+            for key, value in note.items() if key not in LOCAL_KEYS}
+
+
+class ConnectionPool:
+    """Не больше size одновременных HTTP-соединений к серверу; свободные переиспользуются."""
+
+    def __init__(self, url: str, size: int = 2, timeout: float = 15.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported sync URL: {url}")
+        self._connection_class = (http.client.HTTPSConnection if parts.scheme == "https"
+                                  else http.client.HTTPConnection)
+        self._host = parts.hostname
+        self._port = parts.port
+        self._base_path = parts.path.rstrip('/')
+        self._timeout = timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._stats_lock = threading.Lock()
+        self.size = size
+        self.stats = {"requests": 0, "connections": 0, "bytes_sent": 0, "bytes_received": 0}
+
+    def request(self, method: str, path: str, payload: Any = None) -> Any:
+        """Запрос с телом payload (JSON в gzip); возвращает разобранный ответ."""
+        body = encode_payload(payload) if payload is not None else None
+        headers = {"Accept-Encoding": "gzip"}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+            headers["Content-Encoding"] = "gzip"
+        with self._slots:
+            for attempt in range(2):
+                connection, reused = self._acquire()
+                try:
+                    if connection.sock is None:
+                        connection.connect()
+                        # Заголовки и тело уходят отдельными send(): без TCP_NODELAY тело
+                        # ждет подтверждения заголовков (задержка ACK — до 40 мс на запрос)
+                        connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    connection.request(method, self._base_path + path, body=body, headers=headers)
+                    response = connection.getresponse()
+                    data = response.read()
+                except (http.client.HTTPException, OSError) as e:
+                    connection.close()
+                    # Сервер мог закрыть простаивавшее соединение — повторяем на новом
+                    if reused and attempt == 0:
+                        continue
+                    raise SyncError(f"Sync request {method} {path} failed: {e}")
+                if response.will_close:
+                    connection.close()
+                else:
+                    self._idle.put(connection)
+                with self._stats_lock:
+                    self.stats["requests"] += 1
+                    self.stats["bytes_sent"] += len(body or b"")
+                    self.stats["bytes_received"] += len(data)
+                if response.status != 200:
+                    raise SyncError(f"Sync server answered {response.status} to {method} {path}")
+                return decode_payload(data, response.getheader("Content-Encoding"))
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            pass
+        with self._stats_lock:
+            self.stats["connections"] += 1
+        return self._connection_class(self._host, self._port, timeout=self._timeout), False
+
+
+class SyncEngine:
+    """Синхронизация заметок DataManager с сервером url.
+
+    Состояние (курсор сервера, номер последней отправленной правки, еще не
+    отправленные удаления) хранится в state_file отдельно для каждого адреса
+    сервера. Методы DataManager вызываются только через ui_call — на потоке,
+    которому принадлежат заметки; сетевые запросы идут в вызывающем потоке.
+    """
+
+    def __init__(self, data_manager, url: str, state_file: str = "sync.json",
+                 batch_size: int = BATCH_SIZE, pool_size: int = 2):
+        self.data_manager = data_manager
+        self.url = url.rstrip('/')
+        self.state_file = state_file
+        self.batch_size = batch_size
+        self.pool = ConnectionPool(self.url, size=pool_size)
+        self.state = self._load_state()
+        self._running = threading.Lock()
+        data_manager.deletion_listeners.append(self._on_deleted)
+
+    @property
+    def peer(self) -> Dict[str, Any]:
+        return self.state["peers"].setdefault(self.url, {"cursor": 0, "pushed_seq": -1})
+
+    def sync(self, ui_call: Optional[Callable[[Callable[[], Any]], Any]] = None) -> Dict[str, Any]:
+        """Один сеанс синхронизации; возвращает счетчики (pushed, pulled, deleted, conflicts, ...)."""
+        call = ui_call or (lambda func: func())
+        if not self._running.acquire(blocking=False):
+            raise SyncError("Sync is already running")
+        try:
+            before = dict(self.pool.stats)
+            totals = {"pushed": 0, "pulled": 0, "deleted": 0, "conflicts": 0, "rounds": 0}
+            for _ in range(MAX_ROUNDS):
+                items, upto, cursor = call(self._prepare_push)
+                accepted, stale = self._push(items)
+                changes, cursor = self._pull(cursor)
+                stats, again = call(lambda: self._merge(items, accepted, stale, changes, cursor, upto))
+                for key, value in stats.items():
+                    totals[key] += value
+                totals["rounds"] += 1
+                if not again:
+                    break
+            for key, value in self.pool.stats.items():
+                totals[key] = value - before[key]
+            return totals
+        finally:
+            self._running.release()
+
+    def sync_async(self, on_done: Optional[Callable[[Optional[Dict[str, Any]], Optional[Exception]], None]] = None
+                   ) -> threading.Thread:
+        """sync() в фоновом потоке; on_done(счетчики, ошибка) вызывается на UI-потоке."""
+        from kivy.clock import Clock
+
+        def run():
+            try:
+                result, error = self.sync(ui_call=_call_on_ui), None
+            except Exception as e:
+                result, error = None, e
+            if on_done is not None:
+                Clock.schedule_once(lambda dt: on_done(result, error), 0)
+        thread = threading.Thread(target=run, name="NotesSync", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        self.pool.close()
+        if self._on_deleted in self.data_manager.deletion_listeners:
+            self.data_manager.deletion_listeners.remove(self._on_deleted)
+
+    # Internal
+    def _prepare_push(self) -> Tuple[List[Dict[str, Any]], int, int]:
+        data_manager = self.data_manager
+        if data_manager.is_encrypted:
+            raise SyncError("Encrypted notes cannot be synced")
+        upto = data_manager.sync_seq
+        items = [{"uid": note["uid"], "base_rev": note.get("sync_rev", 0), "note": sync_record(note)}
+                 for note in data_manager.changed_notes(self.peer["pushed_seq"])]
+        items.extend({"uid": uid, "base_rev": rev, "deleted": True}
+                     for uid, rev in self.state["tombstones"].items())
+        return items, upto, self.peer["cursor"]
+
+    def _push(self, items: List[Dict[str, Any]]) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+        batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+        accepted: Dict[str, int] = {}
+        stale: List[Dict[str, Any]] = []
+        if not batches:
+            return accepted, stale
+        # Пакеты независимы — отправляем их параллельно, по соединению на поток
+        with ThreadPoolExecutor(max_workers=min(self.pool.size, len(batches))) as executor:
+            for response in executor.map(lambda batch: self.pool.request("POST", "/push", {"changes": batch}),
+                                         batches):
+                accepted.update(response.get("accepted", {}))
+                stale.extend(response.get("stale", []))
+        return accepted, stale
+
+    def _pull(self, cursor: int) -> Tuple[List[Dict[str, Any]], int]:
+        changes: List[Dict[str, Any]] = []
+        while True:
+            query = urlencode({"since": cursor, "limit": self.batch_size})
+            response = self.pool.request("GET", f"/changes?{query}")
+            changes.extend(response.get("changes", []))
+            cursor = response.get("cursor", cursor)
+            if not response.get("more"):
+                return changes, cursor
+
+    def _merge(self, items, accepted, stale, changes, cursor, upto) -> Tuple[Dict[str, int], bool]:
+        data_manager = self.data_manager
+        stats = {"pushed": 0, "pulled": 0, "deleted": 0, "conflicts": 0}
+        tombstones = self.state["tombstones"]
+        stale_uids = {change["uid"] for change in stale}
+        for item in items:
+            uid = item["uid"]
+            if item.get("deleted"):
+                # Удаление принято или заметку успели изменить на другом устройстве — тогда она вернется
+                if uid in accepted or uid in stale_uids:
+                    tombstones.pop(uid, None)
+                continue
+            note = data_manager.note_by_uid(uid)
+            if uid in accepted:
+                stats["pushed"] += 1
+                if note is not None:
+                    note["sync_rev"] = accepted[uid]
+                elif uid in tombstones:
+                    tombstones[uid] = accepted[uid]  # удалена, пока шла отправка
+        changed = False
+        # Серверные версии устаревших заметок сливаются так же, как полученные изменения
+        for change in stale + changes:
+            uid, rev = change["uid"], change["rev"]
+            note = data_manager.note_by_uid(uid)
+            if note is not None and note.get("sync_rev") == rev:
+                continue  # своя же отправка или уже слитая версия
+            dirty = note is not None and (uid in stale_uids or note.get("sync_seq", 0) > upto)
+            if change.get("deleted"):
+                if note is None:
+                    continue
+                if dirty:
+                    # Правка здесь важнее удаления там: заметка уйдет на сервер заново
+                    note["sync_rev"] = rev
+                    data_manager.mark_changed(note)
+                else:
+                    data_manager.drop_remote_note(note)
+                    stats["deleted"] += 1
+                changed = True
+                continue
+            record = change["note"]
+            changed = True
+            if note is None or not dirty:
+                data_manager.store_remote_note(record, rev, note)
+                stats["pulled"] += 1
+                continue
+            local = sync_record(note)
+            local.pop("uid", None)
+            remote = {key: value for key, value in record.items() if key != "uid"}
+            if local == remote:
+                note["sync_rev"] = rev  # одинаковые правки — не конфликт
+                continue
+            stats["conflicts"] += 1
+            if record.get("updated_at", "") > note.get("updated_at", ""):
+                loser = local
+                data_manager.store_remote_note(record, rev, note)
+                stats["pulled"] += 1
+            else:
+                loser = remote
+                note["sync_rev"] = rev
+                data_manager.mark_changed(note)
+            loser["uid"] = uuid.uuid4().hex
+            loser["title"] = loser.get("title", "") + CONFLICT_SUFFIX
+            copy = data_manager.store_remote_note(loser, 0)
+            data_manager.mark_changed(copy)
+        peer = self.peer
+        peer["cursor"] = cursor
+        peer["pushed_seq"] = upto
+        if changed or accepted:
+            # Курсор сервера записывается следом — заметки должны оказаться на диске раньше него
+            data_manager.save_notes(force=True)
+        self._save_state()
+        # Копии конфликтов и заметки, выигравшие у удаления, надо отправить еще раз
+        return stats, data_manager.sync_seq > upto
+
+    def _on_deleted(self, notes: List[Dict[str, Any]]) -> None:
+        added = False
+        for note in notes:
+            # Заметки, которых на сервере еще нет, удалять там незачем
+            if note.get("uid") and note.get("sync_rev"):
+                self.state["tombstones"][note["uid"]] = note["sync_rev"]
+                added = True
+        if added:
+            self._save_state()
+
+    def _load_state(self) -> Dict[str, Any]:
+        state: Dict[str, Any] = {}
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = {}
+        state.setdefault("peers", {})
+        state.setdefault("tombstones", {})
+        return state
+
+    def _save_state(self) -> None:
+        tmp_file = self.state_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_file, self.state_file)
+
+
+def _call_on_ui(func: Callable[[], Any]) -> Any:
+    """Выполняет func на UI-потоке Kivy и ждет результата."""
+    from kivy.clock import Clock
+    done = threading.Event()
+    box: Dict[str, Any] = {}
+
+    def run(dt):
+        try:
+            box["result"] = func()
+        except Exception as e:
+            box["error"] = e
+        finally:
+            done.set()
+    Clock.schedule_once(run, 0)
+    done.wait()
+    if "error" in box:
+        raise box["error"]
+    return box["result"]
@@ -0,0 +1,192 @@
+"""
+Индекс тегов и папок заметок на битовых картах.
+
+Каждой заметке выдается порядковый номер (ordinal); тег и папка хранятся
+как целое число Python, где бит с номером заметки установлен, если у нее
+есть этот тег. Фильтр из нескольких тегов — несколько побитовых операций
+над такими числами, без прохода по заметкам. Счетчики заметок по тегам и
+папкам обновляются при каждом изменении, а не пересчитываются.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+
+def normalize_tags(tags: Iterable[str]) -> List[str]:
+    """Теги без пробелов по краям, без '#' в начале, без повторов; регистр не важен."""
+    result = []
+    seen = set()
+    for tag in tags:
+        tag = tag.strip().lstrip('#').strip().lower()
+        if tag and tag not in seen:
+            seen.add(tag)
+            result.append(tag)
+    return result
+
+
+def parse_tags(text: str) -> List[str]:
+    """Теги из строки ввода: через запятую или пробел."""
+    return normalize_tags(text.replace(',', ' ').split())
+
+
+class TagFilter:
+    """Условие фильтра: все теги all_of (И), хотя бы один из any_of (ИЛИ),
+    ни одного из none_of (НЕ) и, если задана, папка folder."""
+
+    def __init__(self, all_of: Iterable[str] = (), any_of: Iterable[str] = (),
+                 none_of: Iterable[str] = (), folder: Optional[str] = None):
+        self.all_of = normalize_tags(all_of)
+        self.any_of = normalize_tags(any_of)
+        self.none_of = normalize_tags(none_of)
+        self.folder = folder
+
+    def is_empty(self) -> bool:
+        return not (self.all_of or self.any_of or self.none_of or self.folder is not None)
+
+    def __len__(self) -> int:
+        return len(self.all_of) + len(self.any_of) + len(self.none_of) + (self.folder is not None)
+
+
+class TagIndex:
+    """Битовые карты тегов и папок по порядковым номерам заметок."""
+
+    def __init__(self, notes: Iterable[Dict[str, Any]] = ()):
+        self.clear()
+        for note in notes:
+            self.add(note)
+
+    def clear(self) -> None:
+        self._ordinals: Dict[Any, int] = {}
+        self._ids: List[Any] = []
+        # Ссылки на сами записи заметок по порядковым номерам
+        self._notes: List[Optional[Dict[str, Any]]] = []
+        self._free: List[int] = []
+        self._all = 0
+        self._tags: Dict[str, int] = {}
+        self._folders: Dict[str, int] = {}
+        # Теги и папка заметки на момент индексации — для обновления по разнице
+        self._note_tags: Dict[Any, Set[str]] = {}
+        self._note_folder: Dict[Any, Optional[str]] = {}
+        self.tag_counts: Dict[str, int] = {}
+        self.folder_counts: Dict[str, int] = {}
+
+    def add(self, note: Dict[str, Any]) -> None:
+        note_id = note["id"]
+        if note_id in self._ordinals:
+            self.update(note)
+            return
+        ordinal = self._free.pop() if self._free else len(self._ids)
+        if ordinal == len(self._ids):
+            self._ids.append(note_id)
+            self._notes.append(note)
+        else:
+            self._ids[ordinal] = note_id
+            self._notes[ordinal] = note
+        self._ordinals[note_id] = ordinal
+        self._all |= 1 << ordinal
+        self._note_tags[note_id] = set()
+        self._note_folder[note_id] = None
+        self.update(note)
+
+    def update(self, note: Dict[str, Any]) -> None:
+        """Переиндексирует теги и папку заметки (только изменившиеся биты)."""
+        note_id = note["id"]
+        ordinal = self._ordinals.get(note_id)
+        if ordinal is None:
+            self.add(note)
+            return
+        bit = 1 << ordinal
+        self._notes[ordinal] = note
+        old_tags = self._note_tags[note_id]
+        new_tags = set(note.get("tags") or ())
+        for tag in old_tags - new_tags:
+            self._unset(self._tags, self.tag_counts, tag, bit)
+        for tag in new_tags - old_tags:
+            self._set(self._tags, self.tag_counts, tag, bit)
+        self._note_tags[note_id] = new_tags
+        old_folder = self._note_folder[note_id]
+        new_folder = note.get("folder") or None
+        if old_folder != new_folder:
+            if old_folder is not None:
+                self._unset(self._folders, self.folder_counts, old_folder, bit)
+            if new_folder is not None:
+                self._set(self._folders, self.folder_counts, new_folder, bit)
+            self._note_folder[note_id] = new_folder
+
+    def remove(self, note_id) -> None:
+        ordinal = self._ordinals.pop(note_id, None)
+        if ordinal is None:
+            return
+        bit = 1 << ordinal
+        for tag in self._note_tags.pop(note_id):
+            self._unset(self._tags, self.tag_counts, tag, bit)
+        folder = self._note_folder.pop(note_id)
+        if folder is not None:
+            self._unset(self._folders, self.folder_counts, folder, bit)
+        self._all &= ~bit
+        self._ids[ordinal] = None
+        self._notes[ordinal] = None
+        self._free.append(ordinal)
+
+    def tags(self) -> List[str]:
+        return sorted(self._tags)
+
+    def folders(self) -> List[str]:
+        return sorted(self._folders)
+
+    def bitmap(self, tag_filter: TagFilter) -> int:
+        """Битовая карта заметок, подходящих под фильтр."""
+        result = self._all
+        for tag in tag_filter.all_of:
+            result &= self._tags.get(tag, 0)
+        if tag_filter.any_of:
+            any_bits = 0
+            for tag in tag_filter.any_of:
+                any_bits |= self._tags.get(tag, 0)
+            result &= any_bits
+        for tag in tag_filter.none_of:
+            result &= ~self._tags.get(tag, 0)
+        if tag_filter.folder is not None:
+            result &= self._folders.get(tag_filter.folder, 0)
+        return result
+
+    def ids(self, bitmap: int) -> Iterator[Any]:
+        """id заметок по установленным битам (проход только по единицам)."""
+        ids = self._ids
+        for ordinal in self._ordinals_of(bitmap):
+            yield ids[ordinal]
+
+    def notes(self, bitmap: int) -> Iterator[Dict[str, Any]]:
+        """Записи заметок по установленным битам."""
+        notes = self._notes
+        for ordinal in self._ordinals_of(bitmap):
+            yield notes[ordinal]
+
+    def query(self, tag_filter: TagFilter) -> Set[Any]:
+        return set(self.ids(self.bitmap(tag_filter)))
+
+    def count(self, tag_filter: TagFilter) -> int:
+        return bin(self.bitmap(tag_filter)).count('1')
+
+    # Internal
+    @staticmethod
+    def _ordinals_of(bitmap: int) -> Iterator[int]:
+        # Поиск единиц в двоичной строке идет на уровне C; сброс младшего бита
+        # у большого числа стоил бы O(размера числа) на каждую заметку
+        bits = bin(bitmap)[:1:-1]
+        index = bits.find('1')
+        while index >= 0:
+            yield index
+            index = bits.find('1', index + 1)
+
+    @staticmethod
+    def _set(bitmaps: Dict[str, int], counts: Dict[str, int], key: str, bit: int) -> None:
+        bitmaps[key] = bitmaps.get(key, 0) | bit
+        counts[key] = counts.get(key, 0) + 1
+
+    @staticmethod
+    def _unset(bitmaps: Dict[str, int], counts: Dict[str, int], key: str, bit: int) -> None:
+        bitmaps[key] &= ~bit
+        counts[key] -= 1
+        if not counts[key]:
+            del bitmaps[key]
+            del counts[key]
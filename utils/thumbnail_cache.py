@@ -0,0 +1,261 @@
+"""
+Миниатюры вложений: кэш на диске и ограниченный LRU текстур в памяти.
+
+Уровень 1 — текстуры Kivy в памяти (последние memory_items миниатюр).
+Уровень 2 — файлы в каталоге cache_dir: заголовок (ширина, высота) и уже
+уменьшенные пиксели RGBA, поэтому чтение миниатюры не требует декодирования.
+Исходное изображение декодируется один раз, в фоновом потоке; при наличии
+Pillow JPEG сразу декодируется в уменьшенном масштабе (Image.draft).
+Текстуры создаются только на UI-потоке.
+"""
+
+import hashlib
+import os
+import struct
+import threading
+from array import array
+from collections import OrderedDict, deque
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image as PILImage
+except ImportError:  # Pillow необязателен: без него декодирует загрузчик Kivy
+    PILImage = None
+
+_HEADER = struct.Struct('<II')
+THUMB_SUFFIX = '.thumb'
+
+# (ширина, высота, пиксели RGBA построчно сверху вниз)
+Thumbnail = Tuple[int, int, bytes]
+
+
+def _fit(width: int, height: int, max_size: int) -> Tuple[int, int]:
+    scale = max(width, height) / float(max_size)
+    if scale <= 1:
+        return width, height
+    return max(1, int(round(width / scale))), max(1, int(round(height / scale)))
+
+
+def downscale_rgba(data, width: int, height: int, fmt: str, rowlength: int, max_size: int) -> Thumbnail:
+    """Уменьшение методом ближайшего соседа; результат — RGBA."""
+    out_w, out_h = _fit(width, height, max_size)
+    bpp = 4 if fmt in ('rgba', 'bgra', 'argb', 'abgr') else 3
+    stride = rowlength or width * bpp
+    xs = [min(width - 1, int((i + 0.5) * width / out_w)) for i in range(out_w)]
+    pick = itemgetter(*xs) if out_w > 1 else (lambda row: (row[xs[0]],))
+    view = memoryview(data)
+    rows: List[bytes] = []
+    for j in range(out_h):
+        y = min(height - 1, int((j + 0.5) * height / out_h))
+        row_bytes = view[y * stride:y * stride + width * bpp]
+        if bpp == 4:
+            # Пиксель как одно 32-битное значение: выборка идет на уровне C
+            row = array('I')
+            row.frombytes(row_bytes)
+            rows.append(array('I', pick(row)).tobytes())
+        else:
+            rows.append(b''.join(bytes(row_bytes[x * 3:x * 3 + 3]) + b'\xff' for x in xs))
+    pixels = b''.join(rows)
+    if fmt == 'bgra':
+        # Меняем местами каналы B и R
+        swapped = bytearray(pixels)
+        swapped[0::4], swapped[2::4] = pixels[2::4], pixels[0::4]
+        pixels = bytes(swapped)
+    return out_w, out_h, pixels
+
+
+def decode_thumbnail(path: str, max_size: int) -> Thumbnail:
+    """Декодирует изображение и уменьшает его до max_size по большей стороне."""
+    if PILImage is not None:
+        with PILImage.open(path) as image:
+            # Для JPEG декодер сразу выдает уменьшенное в 2-8 раз изображение
+            image.draft('RGB', (max_size, max_size))
+            image = image.convert('RGBA')
+            image.thumbnail((max_size, max_size))
+            return image.width, image.height, image.tobytes()
+    from kivy.core.image import ImageLoader
+    loader = ImageLoader.load(path, keep_data=True, nocache=True)
+    image = loader._data[0]
+    width, height, data, rowlength = image.mipmaps[0]
+    return downscale_rgba(data, width, height, image.fmt, rowlength, max_size)
+
+
+class ThumbnailCache:
+    """Асинхронная выдача миниатюр для карточек заметок.
+
+    request(path, callback) вызывает callback(texture) на UI-потоке: сразу,
+    если текстура есть в памяти, иначе после чтения с диска или декодирования
+    в фоновом потоке. cancel() снимает еще не начатую загрузку — карточка,
+    ушедшая за край экрана, не заставляет декодировать ее изображение.
+    """
+
+    def __init__(self, cache_dir: str = "thumbnails", size: int = 160, memory_items: int = 100,
+                 max_disk_bytes: int = 32 * 1024 * 1024, clock=None,
+                 texture_factory: Optional[Callable[[Thumbnail], Any]] = None):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._clock = clock
+        self._texture_factory = texture_factory or self._create_texture
+        self._textures: "OrderedDict[str, Any]" = OrderedDict()
+        self._callbacks: Dict[str, List[Callable[[Any], None]]] = {}
+        self._lock = threading.Condition()
+        self._queue: deque = deque()
+        self._closed = False
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "decoded": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._worker, name="ThumbnailLoader", daemon=True)
+        self._thread.start()
+
+    @property
+    def clock(self):
+        if self._clock is None:
+            from kivy.clock import Clock
+            self._clock = Clock
+        return self._clock
+
+    def get(self, path: str):
+        """Текстура из памяти или None (без загрузки)."""
+        texture = self._textures.get(path)
+        if texture is not None:
+            self._textures.move_to_end(path)
+        return texture
+
+    def request(self, path: str, callback: Callable[[Any], None]) -> None:
+        texture = self.get(path)
+        if texture is not None:
+            self.stats["memory_hits"] += 1
+            callback(texture)
+            return
+        with self._lock:
+            callbacks = self._callbacks.get(path)
+            if callbacks is not None:
+                callbacks.append(callback)
+                return
+            self._callbacks[path] = [callback]
+            # Последние запрошенные (только что показанные) карточки — первыми
+            self._queue.appendleft(path)
+            self._lock.notify()
+
+    def cancel(self, path: str, callback: Callable[[Any], None]) -> None:
+        with self._lock:
+            callbacks = self._callbacks.get(path)
+            if not callbacks or callback not in callbacks:
+                return
+            callbacks.remove(callback)
+            if not callbacks:
+                del self._callbacks[path]
+                try:
+                    self._queue.remove(path)
+                except ValueError:
+                    pass  # уже загружается
+
+    def invalidate(self, path: str) -> None:
+        """Забывает миниатюру; вызывать до удаления файла вложения (ключ зависит от mtime)."""
+        self._textures.pop(path, None)
+        try:
+            os.remove(self._cache_path(path))
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._queue.clear()
+            self._lock.notify()
+
+    # Internal
+    def _cache_path(self, path: str) -> str:
+        try:
+            st = os.stat(path)
+            version = f"{st.st_mtime_ns}:{st.st_size}"
+        except OSError:
+            version = ""
+        key = hashlib.sha1(f"{os.path.abspath(path)}|{version}|{self.size}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key + THUMB_SUFFIX)
+
+    def _prune_disk(self) -> None:
+        # Старые миниатюры (по времени записи) удаляются сверх лимита каталога
+        try:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                st = os.stat(path)
+                entries.append((st.st_mtime, st.st_size, path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def _worker(self) -> None:
+        self._prune_disk()
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._lock.wait()
+                if self._closed:
+                    return
+                path = self._queue.popleft()
+            try:
+                thumbnail = self._load(path)
+            except Exception:
+                thumbnail = None
+                self.stats["errors"] += 1
+            # Clock.schedule_once потокобезопасен — текстура создается на UI-потоке
+            self.clock.schedule_once(lambda dt, p=path, t=thumbnail: self._deliver(p, t), 0)
+
+    def _load(self, path: str) -> Thumbnail:
+        cache_path = self._cache_path(path)
+        try:
+            with open(cache_path, 'rb') as f:
+                raw = f.read()
+            width, height = _HEADER.unpack_from(raw)
+            if len(raw) == _HEADER.size + width * height * 4:
+                self.stats["disk_hits"] += 1
+                return width, height, raw[_HEADER.size:]
+        except (OSError, struct.error):
+            pass
+        thumbnail = decode_thumbnail(path, self.size)
+        self.stats["decoded"] += 1
+        width, height, pixels = thumbnail
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER.pack(width, height))
+                f.write(pixels)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # без кэша на диске миниатюра просто декодируется снова
+        return thumbnail
+
+    def _deliver(self, path: str, thumbnail: Optional[Thumbnail]) -> None:
+        with self._lock:
+            callbacks = self._callbacks.pop(path, [])
+        if thumbnail is None:
+            return
+        texture = self._texture_factory(thumbnail)
+        self._textures[path] = texture
+        self._textures.move_to_end(path)
+        while len(self._textures) > self.memory_items:
+            self._textures.popitem(last=False)
+        for callback in callbacks:
+            callback(texture)
+
+    @staticmethod
+    def _create_texture(thumbnail: Thumbnail):
+        from kivy.graphics.texture import Texture
+        width, height, pixels = thumbnail
+        texture = Texture.create(size=(width, height), colorfmt='rgba')
+        texture.blit_buffer(pixels, colorfmt='rgba', bufferfmt='ubyte')
+        # Пиксели идут сверху вниз, а текстура Kivy — снизу вверх
+        texture.flip_vertical()
+        return texture
@@ -0,0 +1,77 @@
+"""
+Запись потока касаний (MotionEvent) для последующего воспроизведения.
+
+Координаты сохраняются нормализованными (sx, sy в 0..1), поэтому запись
+воспроизводится на окне другого размера. Формат файла:
+
+    {"version": 1, "window": [w, h], "events": [[t, etype, uid, sx, sy], ...]}
+
+где t — секунды от начала записи, etype — begin/update/end, uid — номер
+касания внутри записи. Воспроизведение — benchmarks/bench_touch.py.
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+TOUCH_FORMAT_VERSION = 1
+
+
+class TouchRecorder:
+    """Записывает касания окна Kivy (включается настройкой "touch_record")."""
+
+    def __init__(self, path: str = "touches.json", max_events: int = 100000):
+        self.path = path
+        self.max_events = max_events
+        self.events: List[List[Any]] = []
+        self._uids: Dict[Any, int] = {}
+        self._next_uid = 0
+        self._started: Optional[float] = None
+        self._window = None
+
+    def start(self) -> None:
+        from kivy.core.window import Window
+        if self._window is not None:
+            return
+        self._window = Window
+        self._started = time.perf_counter()
+        Window.bind(on_motion=self._on_motion)
+
+    def stop(self) -> None:
+        if self._window is not None:
+            self._window.unbind(on_motion=self._on_motion)
+            self._window = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        size = list(self._window.size) if self._window is not None else None
+        return {"version": TOUCH_FORMAT_VERSION, "window": size, "events": list(self.events)}
+
+    def save(self, path: Optional[str] = None) -> str:
+        path = path or self.path
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        return path
+
+    # Internal
+    def _on_motion(self, window, etype, me):
+        if not me.is_touch or len(self.events) >= self.max_events:
+            return False
+        uid = self._uids.get(me.uid)
+        if uid is None:
+            uid = self._uids[me.uid] = self._next_uid
+            self._next_uid += 1
+        self.events.append([round(time.perf_counter() - self._started, 6), etype, uid,
+                            round(me.sx, 6), round(me.sy, 6)])
+        if etype == 'end':
+            self._uids.pop(me.uid, None)
+        # Событие не поглощаем — дальше его обрабатывает окно как обычно
+        return False
+
+
+def load_touches(path: str) -> Dict[str, Any]:
+    """Читает запись касаний и проверяет версию формата."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get("version") != TOUCH_FORMAT_VERSION:
+        raise ValueError(f"Unsupported touch recording version: {data.get('version')}")
+    return data
@@ -0,0 +1,163 @@
+"""
+Трассировка операций в формате Chrome Trace Event (chrome://tracing, Perfetto).
+
+Пока трассировка выключена, span() возвращает общий пустой контекст, а
+обертка traced() делает одну проверку глобальной переменной — поэтому
+инструментирование можно оставлять в релизной сборке. Включается
+настройкой "tracing" в settings.json, файл пишется при паузе/остановке.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+_perf_counter = time.perf_counter
+_get_ident = threading.get_ident
+
+
+class Tracer:
+    """Буфер завершенных интервалов (хранятся последние max_events)."""
+
+    def __init__(self, path: str = "trace.json", max_events: int = 200000):
+        self.path = path
+        self._origin = _perf_counter()
+        # Кортежи (name, cat, start, end, tid) — форматируются только при экспорте
+        self._events = deque(maxlen=max_events)
+        self._thread_names: Dict[int, str] = {}
+
+    def complete(self, name: str, cat: str, start: float, end: float) -> None:
+        """Добавляет завершенный интервал (deque.append атомарен, блокировка не нужна)."""
+        self._events.append((name, cat, start, end, _get_ident()))
+
+    def instant(self, name: str, cat: str = "app") -> None:
+        now = _perf_counter()
+        self._events.append((name, cat, now, None, _get_ident()))
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        origin = self._origin
+        for thread in threading.enumerate():
+            self._thread_names[thread.ident] = thread.name
+        events: List[Dict[str, Any]] = []
+        tids = set()
+        for name, cat, start, end, tid in list(self._events):
+            tids.add(tid)
+            event = {"name": name, "cat": cat, "pid": pid, "tid": tid,
+                     "ts": round((start - origin) * 1e6, 3)}
+            if end is None:
+                event.update(ph="i", s="t")
+            else:
+                event.update(ph="X", dur=round((end - start) * 1e6, 3))
+            events.append(event)
+        for tid in tids:
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                           "args": {"name": self._thread_names.get(tid, str(tid))}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path: Optional[str] = None) -> str:
+        """Записывает трассу в JSON-файл и возвращает его путь."""
+        path = path or self.path
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "start")
+
+    def __init__(self, tracer: Tracer, name: str, cat: str):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+
+    def __enter__(self):
+        self.start = _perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.complete(self.name, self.cat, self.start, _perf_counter())
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+_tracer: Optional[Tracer] = None
+
+
+def enable(path: str = "trace.json", max_events: int = 200000) -> Tracer:
+    """Включает трассировку (повторный вызов возвращает текущий трассировщик)."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(path, max_events)
+    return _tracer
+
+
+def disable() -> None:
+    global _tracer
+    _tracer = None
+
+
+def is_enabled() -> bool:
+    return _tracer is not None
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def span(name: str, cat: str = "app"):
+    """Контекстный менеджер интервала: with span('refresh_notes', 'ui'): ..."""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name, cat)
+
+
+def instant(name: str, cat: str = "app") -> None:
+    """Отметка момента (например, смена экрана)."""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.instant(name, cat)
+
+
+def traced(name: Optional[str] = None, cat: str = "app") -> Callable:
+    """Декоратор: каждый вызов функции записывается как интервал."""
+    def decorator(func: Callable) -> Callable:
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            start = _perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.complete(label, cat, start, _perf_counter())
+
+        return wrapper
+    return decorator
+
+
+def write() -> Optional[str]:
+    """Сохраняет трассу, если трассировка включена; возвращает путь к файлу."""
+    tracer = _tracer
+    if tracer is None:
+        return None
+    return tracer.write()
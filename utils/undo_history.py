@@ -0,0 +1,163 @@
+"""
+История отмены/повтора редактора: хранятся правки (позиция и текст), а не снимки.
+"""
+
+import time
+from typing import List, Optional
+
+
+class EditOperation:
+    """Одна правка: в позиции pos текст removed заменен на inserted."""
+
+    __slots__ = ('pos', 'removed', 'inserted', 'timestamp', 'serial')
+
+    def __init__(self, pos: int, removed: str = "", inserted: str = ""):
+        self.pos = pos
+        self.removed = removed
+        self.inserted = inserted
+        self.timestamp = time.monotonic()
+        self.serial = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.removed) + len(self.inserted)
+
+    @classmethod
+    def from_texts(cls, old: str, new: str) -> Optional["EditOperation"]:
+        """Правка, превращающая old в new (участок между общим префиксом и суффиксом)."""
+        if old == new:
+            return None
+        start = 0
+        limit = min(len(old), len(new))
+        while start < limit and old[start] == new[start]:
+            start += 1
+        end = 0
+        while end < limit - start and old[-1 - end] == new[-1 - end]:
+            end += 1
+        return cls(start, old[start:len(old) - end], new[start:len(new) - end])
+
+
+class UndoHistory:
+    """История правок с ограничением по числу операций и объему текста.
+
+    Хранятся сами операции, а не снимки текста. При превышении лимитов
+    вытесняются самые старые операции. Отметка "чистого" состояния позволяет
+    понять, что после отмены документ вернулся к исходному виду.
+    """
+
+    def __init__(self, max_operations: int = 500, max_chars: int = 200000, merge_window: float = 1.0):
+        self.max_operations = max_operations
+        self.max_chars = max_chars
+        self.merge_window = merge_window
+        self.clear()
+
+    def configure(self, max_operations: Optional[int] = None, max_chars: Optional[int] = None) -> None:
+        """Меняет лимиты истории; лишние операции вытесняются сразу."""
+        if max_operations is not None:
+            self.max_operations = max(1, int(max_operations))
+        if max_chars is not None:
+            self.max_chars = max(1, int(max_chars))
+        self._evict()
+
+    def clear(self) -> None:
+        self._undo: List[EditOperation] = []
+        self._redo: List[EditOperation] = []
+        self._chars = 0
+        self._serial = 0
+        # Состояние под самой старой операцией (меняется при вытеснении)
+        self._base_state = 0
+        self._clean_state: Optional[int] = 0
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def mark_clean(self) -> None:
+        """Запоминает текущее состояние как исходное (без изменений)."""
+        self._clean_state = self._state()
+
+    def is_clean(self) -> bool:
+        return self._clean_state is not None and self._clean_state == self._state()
+
+    def record(self, op: EditOperation) -> None:
+        """Добавляет новую правку (с объединением последовательного ввода)."""
+        self._drop_redo()
+        top = self._undo[-1] if self._undo else None
+        if top is not None and self._merge(top, op):
+            top.serial = self._next_serial()
+        else:
+            op.serial = self._next_serial()
+            self._undo.append(op)
+            self._chars += op.size
+        self._evict()
+
+    def undo(self) -> Optional[EditOperation]:
+        """Снимает последнюю правку; возвращает ее для отката в редакторе."""
+        if not self._undo:
+            return None
+        op = self._undo.pop()
+        self._redo.append(op)
+        return op
+
+    def redo(self) -> Optional[EditOperation]:
+        """Возвращает отмененную правку для повторного применения."""
+        if not self._redo:
+            return None
+        op = self._redo.pop()
+        self._undo.append(op)
+        return op
+
+    # Internal
+    def _state(self) -> int:
+        return self._undo[-1].serial if self._undo else self._base_state
+
+    def _next_serial(self) -> int:
+        self._serial += 1
+        return self._serial
+
+    def _merge(self, top: EditOperation, op: EditOperation) -> bool:
+        if op.timestamp - top.timestamp > self.merge_window:
+            return False
+        if not top.removed and not op.removed and top.inserted and op.inserted:
+            # Ввод подряд объединяем до границы слова или строки
+            if top.pos + len(top.inserted) != op.pos or '\n' in op.inserted:
+                return False
+            if top.inserted[-1:].isspace() and not op.inserted[:1].isspace():
+                return False
+            top.inserted += op.inserted
+        elif not top.inserted and not op.inserted and top.removed and op.removed:
+            if op.pos + len(op.removed) == top.pos:
+                # Backspace: удаление левее предыдущего
+                top.removed = op.removed + top.removed
+                top.pos = op.pos
+            elif op.pos == top.pos:
+                # Delete: удаление в той же позиции
+                top.removed += op.removed
+            else:
+                return False
+        else:
+            return False
+        top.timestamp = op.timestamp
+        self._chars += op.size
+        return True
+
+    def _drop_redo(self) -> None:
+        for op in self._redo:
+            self._chars -= op.size
+        self._redo = []
+
+    def _evict(self) -> None:
+        while self._undo and (len(self._undo) > self.max_operations or self._chars > self.max_chars):
+            op = self._undo.pop(0)
+            self._chars -= op.size
+            if self._clean_state == self._base_state:
+                # Исходное состояние больше недостижимо отменой
+                self._clean_state = None
+            self._base_state = op.serial
+        while self._redo and self._chars > self.max_chars:
+            op = self._redo.pop(0)
+            self._chars -= op.size